@@ -0,0 +1,5 @@
+from ._env import apply_defaults
+
+# Every benchmark runs as python -m benchmarks.<name>, which imports this
+# package first, so the settings are in place before src is imported.
+apply_defaults()
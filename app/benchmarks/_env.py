@@ -0,0 +1,25 @@
+"""
+Placeholder settings for running the benchmarks without a .env file.
+
+src.core.config requires the DB_* settings at import time. The package
+__init__ applies these before any benchmark module imports src. Values
+already in the environment win, and BILLING_DB_URL / COKLIT_DB_URL still
+point the app at a stand-in database.
+"""
+import os
+
+DEFAULTS = {
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_NAME": "billing",
+    "COKLIT_DB_NAME": "coklit",
+    "DB_USER": "bench",
+    "DB_PASS": "bench",
+    "SQUIDS_MIN_LENGTH": "8",
+    "ALLOWED_ORIGINS": '["*"]',
+}
+
+
+def apply_defaults() -> None:
+    for name, value in DEFAULTS.items():
+        os.environ.setdefault(name, value)
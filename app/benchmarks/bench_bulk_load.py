@@ -0,0 +1,93 @@
+"""
+Compare the pandas to_sql transfer with the bulk loader on a real periode.
+
+Needs the billing and coklit databases from .env. Each loader writes into a
+scratch copy of rekening_tni (CREATE TABLE ... LIKE) that is dropped
+afterwards, and runs in a fresh process so peak RSS is per loader. Run from
+the app directory:
+
+    python -m benchmarks.bench_bulk_load 202406
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+SCRATCH_TABLE = "rekening_tni_bench"
+
+
+def run_pandas(periode: str) -> dict:
+    from src.core.db import coklitEngine
+    from src.services.rekair import get_rekening_tni
+    from src.services.sync_svc import row_hash
+
+    start = time.perf_counter()
+    data = get_rekening_tni(periode)
+    extracted = time.perf_counter()
+    data["row_hash"] = [row_hash(row) for row in data.to_dict("records")]
+    data.to_sql(
+        con=coklitEngine,
+        name=SCRATCH_TABLE,
+        if_exists="append",
+        index=False,
+        method="multi",
+        chunksize=1000,
+    )
+    seconds = time.perf_counter() - start
+    return {
+        "rows": len(data),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(len(data) / seconds, 1),
+        "stages": {"extract": round(extracted - start, 3),
+                   "transform_load": round(seconds - (extracted - start), 3)},
+    }
+
+
+def run_bulk(periode: str) -> dict:
+    from src.services.bulk_loader import bulk_load
+
+    stats = bulk_load(periode, table=SCRATCH_TABLE).as_dict()
+    return {key: stats[key] for key in ("rows", "seconds", "rows_per_sec", "batch_size", "stages")}
+
+
+LOADERS = {"pandas": run_pandas, "bulk": run_bulk}
+
+
+def scratch_table(create: bool) -> None:
+    from sqlalchemy import text
+
+    from src.core.db import coklitEngine
+
+    with coklitEngine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+        if create:
+            conn.execute(text(f"CREATE TABLE {SCRATCH_TABLE} LIKE rekening_tni"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("periode")
+    parser.add_argument("--loader", choices=LOADERS)
+    args = parser.parse_args()
+
+    if args.loader:
+        result = LOADERS[args.loader](args.periode)
+        result["peak_rss_mb"] = round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        print(json.dumps({"loader": args.loader, **result}))
+        return
+
+    for loader in LOADERS:
+        scratch_table(create=True)
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_bulk_load",
+                args.periode, "--loader", loader],
+            check=True,
+        )
+    scratch_table(create=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure bytes on the wire and CPU cost of compressing a full-periode export.
+
+A synthetic periode is rendered with the rekening CSV layout in
+EXPORT_BATCH_SIZE chunks and streamed through CompressionMiddleware the way
+StreamingResponse sends it. Run from the app directory:
+
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --rows 200000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from src.core.compression import CompressionMiddleware
+from src.core.exporter import iter_csv
+from src.schema.rekening_tni import CsvColumns
+
+BATCH_SIZE = 5000
+MATRA = ["AD", "AU", "AL"]
+SATKER = ["KODIM 0701/BANYUMAS", "YONIF 405/SK", "DENPOM IV/4", "LANUD WIRASABA"]
+CASES = [
+    ("identity", None, 0),
+    ("gzip", "gzip", 1),
+    ("gzip", "gzip", 6),
+    ("gzip", "gzip", 9),
+    ("deflate", "deflate", 6),
+]
+
+
+def periode_csv(rows: int) -> list[bytes]:
+    rnd = random.Random(rows)
+
+    def batches():
+        for start in range(0, rows, BATCH_SIZE):
+            batch = []
+            for i in range(start, min(rows, start + BATCH_SIZE)):
+                met_l = rnd.randrange(1000)
+                pakai = rnd.randrange(60)
+                tagihan = 4100 * pakai
+                denda = rnd.choice([0, 0, 5000])
+                batch.append((
+                    "PDAM TIRTA SATRIA", rnd.choice(MATRA), rnd.choice(SATKER),
+                    f"{1000000 + i}", f"PELANGGAN {rnd.randrange(100000)}",
+                    f"JL. JEND. SUDIRMAN NO. {rnd.randrange(300)}", "202406",
+                    met_l, met_l + pakai, 0, pakai, 0, tagihan, denda,
+                    tagihan + denda, 0, 0, "",
+                ))
+            yield batch
+
+    return list(iter_csv([column.header for column in CsvColumns], batches()))
+
+
+async def stream(chunks: list[bytes], encoding: str | None, level: int) -> int:
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/csv")],
+        })
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    wire = 0
+
+    async def send(message):
+        nonlocal wire
+        if message["type"] == "http.response.body":
+            wire += len(message["body"])
+
+    async def receive():
+        return {"type": "http.request"}
+
+    headers = [(b"accept-encoding", encoding.encode())] if encoding else []
+    scope = {"type": "http", "method": "GET", "headers": headers}
+    await CompressionMiddleware(app, level=level)(scope, receive, send)
+    return wire
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    args = parser.parse_args()
+
+    print("encoding,level,rows,raw_bytes,wire_bytes,ratio,cpu_seconds,raw_mb_per_cpu_sec")
+    for rows in args.rows:
+        chunks = periode_csv(rows)
+        raw = sum(map(len, chunks))
+        for name, encoding, level in CASES:
+            cpu = time.process_time()
+            wire = asyncio.run(stream(chunks, encoding, level))
+            cpu = time.process_time() - cpu
+            print(
+                f"{name},{level},{rows},{raw},{wire},{raw / wire:.1f},{cpu:.2f},"
+                f"{raw / 1e6 / cpu:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare the per-row rekening CSV export with the columnar one.
+
+A scratch SQLite database with synthetic rekening_tni rows stands in for the
+coklit database, so no server is needed. Both paths stream the same rows in
+EXPORT_BATCH_SIZE batches and must produce identical bytes. Run from the app
+directory:
+
+    python -m benchmarks.bench_csv_export
+    python -m benchmarks.bench_csv_export --rows 10000 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+
+from src.core.exporter import columnar, iter_csv, select_columns, stream_rows
+from src.models.detail_export_model import RekeningTniModel
+from src.schema.rekening_tni import CsvColumns
+
+ROW_COUNTS = [10_000, 100_000, 500_000]
+PERIODE = "202406"
+SATKER = "KODIM 0701/BANYUMAS"
+
+
+def populate(engine, rows: int) -> None:
+    RekeningTniModel.__table__.create(engine)
+    rnd = random.Random(rows)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            met_l = rnd.randrange(1000)
+            pakai = rnd.randrange(60)
+            batch.append({
+                "id": i + 1, "pdam": "PDAM", "matra": "AD", "satker": SATKER,
+                "nosamw": f"{1000000 + i}", "nama": f"PELANGGAN {i}",
+                "alamat": f"JL. MERDEKA {i % 300}", "periode": PERIODE,
+                "met_l": met_l, "met_k": met_l + pakai, "pakai": pakai,
+                "dnmet": 0, "r1": 4100.5 * min(10, pakai),
+                "r2": 5200.25 * min(10, max(0, pakai - 10)),
+                "r3": 6300.75 * max(0, pakai - 20), "r4": 0,
+                "denda": rnd.choice([0, 0, 5000]), "ang_sb": 0, "jasa_sb": 0,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(RekeningTniModel), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(RekeningTniModel), batch)
+
+
+def legacy_row(row) -> tuple:
+    # The converter export_csv used before the columnar layout.
+    return (
+        row.pdam, row.matra, row.satker, row.nosamw, row.nama, row.alamat, row.periode,
+        int(row.met_l), int(row.met_k), 0, int(row.pakai), 0,
+        int(row.r1 + row.r2 + row.r3 + row.r4 + row.dnmet),
+        int(row.denda),
+        int(row.dnmet + row.r1 + row.r2 + row.r3 + row.r4 + row.denda
+            + row.ang_sb + row.jasa_sb),
+        0, 0, "",
+    )
+
+
+def run_legacy(engine) -> bytes:
+    m = RekeningTniModel
+    stmt = select(
+        m.pdam, m.matra, m.satker, m.nosamw, m.nama, m.alamat, m.periode, m.met_l,
+        m.met_k, m.pakai, m.r1, m.r2, m.r3, m.r4, m.dnmet, m.denda, m.ang_sb, m.jasa_sb,
+    ).where(m.periode == PERIODE, m.satker == SATKER)
+    header = [column.header for column in CsvColumns]
+    return b"".join(iter_csv(header, stream_rows(engine, stmt), legacy_row))
+
+
+def run_columnar(engine) -> bytes:
+    stmt = select_columns(RekeningTniModel, CsvColumns).where(
+        RekeningTniModel.periode == PERIODE, RekeningTniModel.satker == SATKER
+    )
+    header = [column.header for column in CsvColumns]
+    return b"".join(iter_csv(header, map(columnar(CsvColumns), stream_rows(engine, stmt))))
+
+
+PATHS = {"legacy": run_legacy, "columnar": run_columnar}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=ROW_COUNTS)
+    args = parser.parse_args()
+
+    print("path,rows,seconds,rows_per_sec,bytes")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            populate(engine, rows)
+            outputs = {}
+            for name, run in PATHS.items():
+                start = time.perf_counter()
+                outputs[name] = run(engine)
+                elapsed = time.perf_counter() - start
+                print(f"{name},{rows},{elapsed:.2f},{rows / elapsed:.0f},{len(outputs[name])}")
+            engine.dispose()
+        if len(set(outputs.values())) != 1:
+            raise SystemExit("outputs differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Per-page cost of encoding row ids: legacy time-salted tokens versus the
+deterministic codec, cold and with a warm memo cache. Run from the app
+directory:
+
+    python -m benchmarks.bench_ids
+"""
+import timeit
+
+from src.core import utility
+from src.core.utility import Utility
+
+PAGE_SIZES = [10, 100, 1000]
+REPEAT = 20
+
+
+def per_page_ms(func, ids, setup=None) -> float:
+    def run():
+        if setup:
+            setup()
+        func(ids)
+
+    return min(timeit.repeat(run, number=1, repeat=REPEAT)) * 1000
+
+
+def main() -> None:
+    print("page_size,legacy_ms,deterministic_cold_ms,deterministic_warm_ms,decode_warm_ms")
+    for size in PAGE_SIZES:
+        ids = list(range(100_000, 100_000 + size))
+        legacy = per_page_ms(lambda ids: [Utility.encodeLegacyId(i) for i in ids], ids)
+        cold = per_page_ms(
+            Utility.encodeIds, ids, setup=utility._encode_deterministic.cache_clear)
+        Utility.encodeIds(ids)
+        warm = per_page_ms(Utility.encodeIds, ids)
+        tokens = Utility.encodeIds(ids)
+        Utility.decodeIds(tokens)
+        decode = per_page_ms(Utility.decodeIds, tokens)
+        print(f"{size},{legacy:.3f},{cold:.3f},{warm:.3f},{decode:.3f}")
+
+
+if __name__ == "__main__":
+    main()
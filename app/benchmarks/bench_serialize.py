@@ -0,0 +1,115 @@
+"""
+Compare ORM + jsonable_encoder page serialization with the Core row path.
+
+A scratch SQLite database with synthetic rekening_tni rows stands in for the
+coklit database. For each page size, "orm" loads RekeningTniModel instances,
+swaps in encoded ids and renders them the way FastAPI does for a returned
+dict (jsonable_encoder, then JSONResponse); "core" selects the columns and
+renders with the precompiled serializer. Both are timed with and without
+the query, and peak allocations are measured with tracemalloc. Run from the app
+directory:
+
+    python -m benchmarks.bench_serialize
+    python -m benchmarks.bench_serialize --limits 10 100 1000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from benchmarks.bench_csv_export import PERIODE, populate
+from src.core.serializer import RawJSONResponse
+from src.core.utility import Utility
+from src.models.detail_export_model import RekeningTniModel
+from src.services.export_svc import TAGIHAN_COLUMNS, serialize_tagihan
+
+ROWS = 20_000
+LIMITS = [10, 100, 1000]
+REPEAT = 20
+
+
+def page(content: list) -> dict:
+    return Utility.pagination(
+        status=200, message="Data Found", error=[], data=content, total=ROWS,
+        limit=len(content), page=1, totalPages=1, isFirst=True, isLast=False,
+    )
+
+
+def fetch_orm(db: Session, limit: int) -> list:
+    return db.query(RekeningTniModel).filter(
+        RekeningTniModel.periode == PERIODE).order_by(RekeningTniModel.id).limit(limit).all()
+
+
+def render_orm(rows: list) -> bytes:
+    for r, token in zip(rows, Utility.encodeIds([r.id for r in rows])):
+        r.id = token
+    return JSONResponse(jsonable_encoder(page(rows))).body
+
+
+def fetch_core(db: Session, limit: int) -> list:
+    return db.execute(
+        select(*TAGIHAN_COLUMNS).where(RekeningTniModel.periode == PERIODE)
+        .order_by(RekeningTniModel.id).limit(limit)
+    ).all()
+
+
+def render_core(rows: list) -> bytes:
+    return RawJSONResponse(page([serialize_tagihan(row) for row in rows])).body
+
+
+PATHS = {"orm": (fetch_orm, render_orm), "core": (fetch_core, render_core)}
+
+
+def measure(func) -> tuple[float, int]:
+    """Mean seconds per call, then peak bytes allocated during one call."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    seconds = (time.perf_counter() - start) / REPEAT
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limits", type=int, nargs="+", default=LIMITS)
+    args = parser.parse_args()
+
+    print("path,limit,fetch_render_ms,render_ms,render_peak_kb,page_bytes")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", poolclass=NullPool)
+        populate(engine, ROWS)
+        sessions = []
+
+        def session() -> Session:
+            # One session per page, like a request; the ORM path rewrites
+            # ids on the instances it loaded, so they must not be shared.
+            sessions.append(Session(engine, autoflush=False))
+            return sessions[-1]
+
+        for limit in args.limits:
+            for name, (fetch, render) in PATHS.items():
+                both, _ = measure(lambda: render(fetch(session(), limit)))
+                batches = [fetch(session(), limit) for _ in range(REPEAT + 1)]
+                body = render(fetch(session(), limit))
+                rendered, peak = measure(lambda: render(batches.pop()))
+                print(
+                    f"{name},{limit},{both * 1000:.2f},{rendered * 1000:.2f},"
+                    f"{peak / 1024:.0f},{len(body)}"
+                )
+                for db in sessions:
+                    db.close()
+                sessions.clear()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
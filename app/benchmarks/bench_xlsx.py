@@ -0,0 +1,115 @@
+"""
+Compare the pandas XLSX export with the write-only streaming export.
+
+Each case runs in a fresh interpreter so peak RSS is measured per engine and
+size. Run from the app directory:
+
+    python -m benchmarks.bench_xlsx
+    python -m benchmarks.bench_xlsx --rows 10000 100000
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+BATCH_SIZE = 5000
+ROW_COUNTS = [10_000, 100_000, 500_000]
+KOTAMA = ["KODAM IV/DIPONEGORO", "LANUD WIRASABA", "LANAL CILACAP"]
+SATKER = ["KODIM 0701/BANYUMAS", "YONIF 405/SK", "DENPOM IV/4", "RINDAM IV"]
+
+
+def roster(rows: int):
+    rnd = random.Random(rows)
+    for i in range(rows):
+        yield (
+            f"{1000000 + i}",
+            f"PELANGGAN {rnd.randrange(100000)}",
+            rnd.choice(KOTAMA),
+            rnd.choice(SATKER),
+            True,
+            rnd.choice(["4A", "4B", "3C"]),
+        )
+
+
+def batches(rows: int):
+    batch = []
+    for row in roster(rows):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_pandas(rows: int) -> str:
+    import pandas as pd
+
+    data = []
+    for urut, row in enumerate(roster(rows), start=1):
+        data.append(
+            {
+                "urut": urut,
+                "nosamw": row[0],
+                "nama": row[1],
+                "kotama": row[2],
+                "satker": row[3],
+                "is_aktif": row[4],
+                "urjlw": row[5],
+            }
+        )
+    path = f"bench_master_tni_{os.getpid()}.xlsx"
+    pd.DataFrame(data).to_excel(path, index=False)
+    return path
+
+
+def run_write_only(rows: int) -> str:
+    from itertools import count
+
+    from src.core.exporter import write_xlsx
+    from src.services.master_tni_svc import MASTER_TNI_XLSX_HEADER
+
+    urut = count(1)
+    return write_xlsx(
+        MASTER_TNI_XLSX_HEADER, batches(rows), lambda row: (next(urut), *row)
+    )
+
+
+ENGINES = {"pandas": run_pandas, "write_only": run_write_only}
+
+
+def run_case(engine: str, rows: int) -> None:
+    start = time.perf_counter()
+    path = ENGINES[engine](rows)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    os.remove(path)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{engine},{rows},{elapsed:.2f},{rows / elapsed:.0f},{peak_mb:.1f},{size}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=ROW_COUNTS)
+    parser.add_argument("--engine", choices=ENGINES)
+    args = parser.parse_args()
+
+    if args.engine:
+        run_case(args.engine, args.rows[0])
+        return
+
+    print("engine,rows,seconds,rows_per_sec,peak_rss_mb,bytes")
+    for rows in args.rows:
+        for engine in ENGINES:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_xlsx",
+                    "--engine", engine, "--rows", str(rows)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
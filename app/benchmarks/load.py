@@ -0,0 +1,393 @@
+"""
+Concurrent HTTP load harness replaying weighted mixes of API calls.
+
+Virtual users loop over scenarios picked by weight, each waiting for its
+response before sending the next request (a closed loop, like operators
+clicking through the app). Concurrency is ramped through --ramp and each
+step runs for --duration seconds. Every step reports requests, errors,
+throughput and p50/p95/p99 latency per route, and the run ends with the
+saturation point: the last step after which adding users stopped adding
+throughput, or pushed the error rate over --max-error-rate.
+
+Without --url the app in main.py is served in-process through
+httpx.ASGITransport, against the synthetic stand-in of --rows rows (built
+with benchmarks.synthetic on first use). Client and server then share one
+process and event loop, so absolute numbers are pessimistic; use --url
+against `uvicorn main:app` for real ones. The read mix never writes. The
+mixed mix adds tagihan corrections and delta tarik_data jobs, so never
+point it at production; a tarik_data sample lasts until its job finishes
+and counts as an error if the job failed. tarik_data needs pymysql and is
+left out of in-process runs on the SQLite stand-in. Run from the app
+directory:
+
+    python -m benchmarks.load --rows 100000 --ramp 1 5 10 25 50
+    python -m benchmarks.load --url http://localhost:8000 --periode 202406 --mix mixed
+    python -m benchmarks.load --mix list_tni=60,detail_tni=30,export_csv=10
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERIODE = "202406"
+RAMP = [1, 5, 10, 25, 50]
+DURATION = 20.0
+TIMEOUT = 120.0
+MAX_ERROR_RATE = 0.01
+# A step must add at least this much throughput over the previous one.
+SATURATION_GAIN = 0.05
+PAGE_SIZE = 10
+JOB_POLL = 0.5
+SORTS = [None, "nama,asc", "satker,asc", "pakai,desc"]
+
+
+@dataclass
+class Pool:
+    """Ids harvested from the API before the run, for detail and write calls."""
+
+    periode: str
+    tagihan: list[dict] = field(default_factory=list)
+    nosamw: list[str] = field(default_factory=list)
+    satker: list[str] = field(default_factory=list)
+    tagihan_pages: int = 1
+    master_pages: int = 1
+
+
+@dataclass
+class Sample:
+    route: str
+    seconds: float
+    error: bool
+    rejected: bool
+    size: int
+
+
+def deep_page(rnd: random.Random, pages: int) -> int:
+    # Operators mostly stay on the first pages and rarely go deep.
+    return min(pages, 1 + int(rnd.expovariate(1 / 5)))
+
+
+async def list_tni(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    params = {"page": deep_page(rnd, pool.tagihan_pages), "limit": PAGE_SIZE}
+    sort = rnd.choice(SORTS)
+    if sort:
+        params["sort"] = sort
+    return await client.get(f"/api/tni/{pool.periode}", params=params)
+
+
+async def list_master(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    params = {"page": deep_page(rnd, pool.master_pages), "limit": PAGE_SIZE}
+    return await client.get("/api/master_tni/", params=params)
+
+
+async def detail_tni(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    return await client.get(f"/api/tni/{rnd.choice(pool.tagihan)['id']}/detail")
+
+
+async def detail_master(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    return await client.get(f"/api/master_tni/{rnd.choice(pool.nosamw)}")
+
+
+async def export_csv(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    return await client.get(f"/api/tni/{pool.periode}/{rnd.choice(pool.satker)}/csv")
+
+
+async def export_xlsx(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    return await client.get(
+        "/api/master_tni/export/excel", params={"satker_id": rnd.choice(pool.satker)}
+    )
+
+
+async def correction(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    tagihan = rnd.choice(pool.tagihan)
+    met_l = float(tagihan["met_l"] or 0)
+    return await client.put(f"/api/tni/{tagihan['id']}", json={
+        "nosamw": tagihan["nosamw"],
+        "met_l": met_l,
+        "met_k": met_l + rnd.randrange(0, 40),
+    })
+
+
+async def tarik_data(client: httpx.AsyncClient, pool: Pool, rnd: random.Random):
+    # The sync runs as a background job: time it to completion, and report
+    # a failed job as a server error rather than the 202 that queued it.
+    response = await client.get(
+        f"/api/tni/{pool.periode}/tarik_data", params={"mode": "delta"}
+    )
+    body = response.json()
+    if body.get("status") != 202:
+        return response
+    while True:
+        await asyncio.sleep(JOB_POLL)
+        response = await client.get(f"/api/jobs/{body['data']['id']}")
+        job = response.json()["data"]
+        if job.get("status") not in ("queued", "running"):
+            break
+    if job.get("status") == "failed":
+        return httpx.Response(500, json=job, request=response.request)
+    return response
+
+
+Scenario = Callable[[httpx.AsyncClient, Pool, random.Random], Awaitable[httpx.Response]]
+
+# name -> (route reported, scenario)
+SCENARIOS: dict[str, tuple[str, Scenario]] = {
+    "list_tni": ("GET /api/tni/{periode}", list_tni),
+    "list_master": ("GET /api/master_tni/", list_master),
+    "detail_tni": ("GET /api/tni/{id}/detail", detail_tni),
+    "detail_master": ("GET /api/master_tni/{nosamw}", detail_master),
+    "export_csv": ("GET /api/tni/{periode}/{satker_id}/csv", export_csv),
+    "export_xlsx": ("GET /api/master_tni/export/excel", export_xlsx),
+    "correction": ("PUT /api/tni/{id}", correction),
+    "tarik_data": ("GET /api/tni/{periode}/tarik_data", tarik_data),
+}
+
+MIXES = {
+    "read": {
+        "list_tni": 45, "list_master": 20, "detail_tni": 15, "detail_master": 12,
+        "export_csv": 6, "export_xlsx": 2,
+    },
+    "mixed": {
+        "list_tni": 40, "list_master": 18, "detail_tni": 14, "detail_master": 10,
+        "export_csv": 6, "export_xlsx": 2, "correction": 9, "tarik_data": 1,
+    },
+}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """A preset name from MIXES or "scenario=weight,..."."""
+    if text in MIXES:
+        return MIXES[text]
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name.strip()}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def classify(response: httpx.Response) -> tuple[bool, bool]:
+    """
+    (error, rejected) for a response.
+
+    Server errors are HTTP 5xx. Most endpoints answer failures inside a
+    200 body ({"status": 404, ...}), so JSON bodies are checked as well;
+    4xx either way counts as rejected, not as an error.
+    """
+    status = response.status_code
+    if status < 400 and response.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = response.json()
+        except ValueError:
+            return True, False
+        if isinstance(body, dict) and isinstance(body.get("status"), int):
+            status = max(status, body["status"])
+    return status >= 500, 400 <= status < 500
+
+
+async def prime(client: httpx.AsyncClient, periode: str) -> Pool:
+    pool = Pool(periode)
+    satker = (await client.get("/api/satker/")).json()["data"]
+    pool.satker = [item["id"] for item in satker]
+    data = (await client.get(f"/api/tni/{periode}", params={"limit": 1000})).json()["data"]
+    pool.tagihan = data["content"]
+    pool.tagihan_pages = max(1, -(-(data.get("total") or 0) // PAGE_SIZE))
+    data = (await client.get("/api/master_tni/", params={"limit": 1000})).json()["data"]
+    pool.nosamw = [item["nosamw"] for item in data["content"]]
+    pool.master_pages = max(1, -(-(data.get("total") or 0) // PAGE_SIZE))
+    if not (pool.satker and pool.tagihan and pool.nosamw):
+        raise SystemExit(f"no satker, tagihan or master_tni rows for periode {periode}")
+    return pool
+
+
+async def user(
+    client: httpx.AsyncClient,
+    pool: Pool,
+    mix: dict[str, float],
+    rnd: random.Random,
+    stop_at: float,
+    samples: list[Sample],
+) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < stop_at:
+        route, scenario = SCENARIOS[rnd.choices(names, weights)[0]]
+        start = time.perf_counter()
+        try:
+            response = await scenario(client, pool, rnd)
+        except httpx.HTTPError:
+            samples.append(Sample(route, time.perf_counter() - start, True, False, 0))
+            continue
+        error, rejected = classify(response)
+        samples.append(Sample(
+            route, time.perf_counter() - start, error, rejected, len(response.content)
+        ))
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+def summarize(route: str, samples: list[Sample], seconds: float) -> dict:
+    times = sorted(sample.seconds for sample in samples)
+    errors = sum(sample.error for sample in samples)
+    return {
+        "route": route,
+        "requests": len(samples),
+        "errors": errors,
+        "rejected": sum(sample.rejected for sample in samples),
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "rps": len(samples) / seconds,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "avg_kb": sum(sample.size for sample in samples) / len(samples) / 1024 if samples else 0.0,
+    }
+
+
+async def step(
+    client: httpx.AsyncClient, pool: Pool, mix: dict, users: int, duration: float, seed: int
+) -> list[dict]:
+    samples: list[Sample] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        user(client, pool, mix, random.Random(f"{seed}/{users}/{i}"), start + duration, samples)
+        for i in range(users)
+    ))
+    # Requests in flight at the deadline finish late; divide by the real span.
+    seconds = time.perf_counter() - start
+    routes = sorted({sample.route for sample in samples})
+    rows = [summarize(route, [s for s in samples if s.route == route], seconds) for route in routes]
+    return rows + [summarize("ALL", samples, seconds)]
+
+
+def saturation(steps: list[tuple[int, dict]], max_error_rate: float) -> tuple[int, dict] | None:
+    """The last (users, totals) step before throughput stopped growing or errors rose."""
+    for previous, current in zip(steps, steps[1:]):
+        if (current[1]["rps"] < previous[1]["rps"] * (1 + SATURATION_GAIN)
+                or current[1]["error_rate"] > max_error_rate):
+            return previous
+    return None
+
+
+COLUMNS = [
+    "users", "route", "requests", "errors", "rejected", "error_rate", "rps",
+    "p50_ms", "p95_ms", "p99_ms", "avg_kb",
+]
+
+
+def print_rows(users: int, rows: list[dict]) -> None:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row in rows:
+        writer.writerow([
+            users, row["route"], row["requests"], row["errors"], row["rejected"],
+            f"{row['error_rate']:.3f}", f"{row['rps']:.1f}", f"{row['p50_ms']:.1f}",
+            f"{row['p95_ms']:.1f}", f"{row['p99_ms']:.1f}", f"{row['avg_kb']:.1f}",
+        ])
+    print(out.getvalue(), end="", flush=True)
+
+
+async def run(client: httpx.AsyncClient, args) -> None:
+    pool = await prime(client, args.periode)
+    print(",".join(COLUMNS))
+    steps = []
+    for users in args.ramp:
+        rows = await step(client, pool, args.mix, users, args.duration, args.seed)
+        print_rows(users, rows)
+        steps.append((users, rows[-1]))
+    found = saturation(steps, args.max_error_rate)
+    if found:
+        users, totals = found
+        print(
+            f"saturation: {users} users, {totals['rps']:.1f} req/s, "
+            f"p95 {totals['p95_ms']:.0f} ms", file=sys.stderr,
+        )
+    else:
+        print("saturation: not reached; extend --ramp", file=sys.stderr)
+
+
+def stand_in(rows: int, seed: int, data_dir: str | None) -> tuple[str, str]:
+    # Built by a separate process: importing src here would create the
+    # engines before BILLING_DB_URL / COKLIT_DB_URL are set.
+    command = [sys.executable, "-m", "benchmarks.synthetic", "--rows", str(rows),
+               "--seed", str(seed)]
+    if data_dir:
+        command += ["--data-dir", data_dir]
+    done = subprocess.run(command, cwd=APP_DIR, stdout=subprocess.PIPE, text=True, check=True)
+    _, _, billing, coklit = done.stdout.strip().splitlines()[-1].split(",")
+    return billing, coklit
+
+
+async def in_process(args) -> None:
+    from main import app
+    from src.core.db import billingEngine
+
+    if billingEngine.dialect.name == "sqlite" and "tarik_data" in args.mix:
+        # As in benchmarks.suite: the sync reads billing through pymysql.
+        args.mix = {name: weight for name, weight in args.mix.items() if name != "tarik_data"}
+        print("skip tarik_data: needs a MySQL stand-in", file=sys.stderr)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load", timeout=args.timeout
+        ) as client:
+            await run(client, args)
+
+
+async def remote(args) -> None:
+    limits = httpx.Limits(max_connections=max(args.ramp), max_keepalive_connections=max(args.ramp))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        await run(client, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="base URL of a running server; in-process if omitted")
+    parser.add_argument("--periode", default=PERIODE)
+    parser.add_argument("--mix", type=parse_mix, default=MIXES["read"],
+                        help=f"one of {', '.join(MIXES)} or scenario=weight,...")
+    parser.add_argument("--ramp", type=int, nargs="+", default=RAMP)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=100_000, help="in-process stand-in size")
+    parser.add_argument("--data-dir")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(remote(args))
+        return
+    billing, coklit = stand_in(args.rows, args.seed, args.data_dir)
+    with tempfile.TemporaryDirectory(prefix="export-tni-load-") as tmp:
+        os.environ.update({
+            "BILLING_DB_URL": billing,
+            "COKLIT_DB_URL": coklit,
+            "ARTIFACT_CACHE_DIR": os.path.join(tmp, "artifacts"),
+            "DATA_VERSION_DIR": os.path.join(tmp, "versions"),
+            "EXPORT_TMP_DIR": tmp,
+        })
+        asyncio.run(in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Benchmark the main service functions on synthetic data and catch regressions.
+
+For every dataset size the synthetic stand-in (see benchmarks.synthetic) is
+built or reused, then the cases run in a fresh process pointed at it through
+BILLING_DB_URL / COKLIT_DB_URL, with its own artifact cache and data
+version directories. Each case gets one warm-up call and --repeat timed
+calls, then one more call under tracemalloc for its peak Python memory.
+Exports start from an empty artifact cache every call, so they measure the
+real export, not a cached download.
+
+Results can be saved as a baseline and later runs compared against it; a
+mean latency or peak memory more than --threshold above the baseline is
+reported as a regression and makes the run exit with status 1.
+
+tarik_data reads billing through pymysql server-side cursors and only runs
+against a MySQL stand-in (--billing-url / --coklit-url); on SQLite it is
+skipped. It rewrites the benchmark periode of rekening_tni, so it runs last.
+Run from the app directory:
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --rows 10000 100000 1000000 --save-baseline
+    python -m benchmarks.suite --rows 100000 --only get_tagihan export_csv
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.synthetic import DATA_DIR, PERIODE, SIZES, ensure_dataset, populate
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(APP_DIR, "benchmarks", "baseline.json")
+ROW_COUNTS = SIZES[:2]
+REPEAT = 5
+THRESHOLD = 0.2
+PAGE = 100
+COLUMNS = [
+    "rows", "case", "mean_ms", "p50_ms", "min_ms", "max_ms",
+    "out_rows", "rows_per_sec", "peak_kb",
+]
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], int]
+    setup: Callable[[], None] = lambda: None
+    mysql_only: bool = False
+
+
+def drain(response) -> int:
+    """Consume a streamed response body and return its number of lines."""
+
+    async def read() -> int:
+        lines = 0
+        async for chunk in response.body_iterator:
+            lines += chunk.count(b"\n")
+        return lines
+
+    return asyncio.run(read())
+
+
+def page_rows(response) -> int:
+    body = json.loads(response.body) if hasattr(response, "body") else response
+    data = body["data"]
+    return len(data["content"]) if isinstance(data, dict) else 0
+
+
+def cases(rows: int) -> list[Case]:
+    # Only the worker process needs the services.
+    from src.core.artifact_cache import artifact_cache
+    from src.core.db import SessionCoklit, SessionLocal
+    from src.models.detail_export_model import RekeningTniModel
+    from src.models.master_tni_model import MasterTniModel
+    from src.models.sync_log_model import SyncLogModel
+    from src.services.export_svc import export_csv, get_tagihan, tarik_data
+    from src.services.master_tni_svc import export_master_tni, get_master_tni
+
+    def tagihan(**kwargs) -> Callable[[], int]:
+        def run() -> int:
+            with SessionCoklit() as db:
+                return page_rows(get_tagihan(db, PERIODE, **kwargs))
+        return run
+
+    def master(**kwargs) -> Callable[[], int]:
+        def run() -> int:
+            with SessionLocal() as db, SessionCoklit() as dbCoklit:
+                return page_rows(get_master_tni(db, dbCoklit, **kwargs))
+        return run
+
+    def csv() -> int:
+        with SessionCoklit() as db:
+            return drain(export_csv(PERIODE, 1, db)) - 1
+
+    with SessionLocal() as db:
+        aktif = db.scalar(select(func.count()).where(MasterTniModel.is_aktif.is_(True)))
+
+    def xlsx() -> int:
+        with SessionLocal() as db, SessionCoklit() as dbCoklit:
+            export_master_tni(db, dbCoklit, None, None, True, None)
+        return aktif
+
+    def reset_periode() -> None:
+        with SessionCoklit() as db:
+            db.execute(delete(RekeningTniModel).where(RekeningTniModel.periode == PERIODE))
+            db.execute(delete(SyncLogModel).where(SyncLogModel.periode == PERIODE))
+            db.commit()
+
+    def sync(mode: str) -> Callable[[], int]:
+        def run() -> int:
+            with SessionCoklit() as db:
+                data = tarik_data(PERIODE, db, mode)["data"]
+            if mode == "full":
+                return data["total"]
+            return sum(data[k] for k in ("inserted", "updated", "removed", "unchanged"))
+        return run
+
+    middle = max(1, rows // PAGE // 2)
+    return [
+        Case("get_tagihan/page1", tagihan(page=1, limit=PAGE)),
+        Case("get_tagihan/offset_middle", tagihan(page=middle, limit=PAGE)),
+        Case("get_tagihan/cursor_nama", tagihan(page=1, limit=PAGE, sort=["nama,asc"], cursor="")),
+        Case("get_tagihan/satker", tagihan(page=1, limit=PAGE, satker_id=1)),
+        Case("get_tagihan/fields", tagihan(page=1, limit=PAGE, fields=["nosamw,nama,pakai"])),
+        Case("get_master_tni/page1", master(page=1, limit=PAGE, sort=None, nosamw=None, nama=None)),
+        Case("get_master_tni/satker", master(
+            page=1, limit=PAGE, sort=None, nosamw=None, nama=None, satker_id=1)),
+        Case("export_csv/satker", csv, artifact_cache.clear),
+        Case("export_master_tni/xlsx", xlsx, artifact_cache.clear),
+        Case("tarik_data/full", sync("full"), reset_periode, mysql_only=True),
+        Case("tarik_data/delta", sync("delta"), mysql_only=True),
+    ]
+
+
+def measure(case: Case, repeat: int) -> dict:
+    case.setup()
+    case.run()
+    times = []
+    for _ in range(repeat):
+        case.setup()
+        start = time.perf_counter()
+        out_rows = case.run()
+        times.append(time.perf_counter() - start)
+    case.setup()
+    tracemalloc.start()
+    case.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mean = statistics.fmean(times)
+    return {
+        "case": case.name,
+        "mean_ms": mean * 1000,
+        "p50_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "out_rows": out_rows,
+        "rows_per_sec": out_rows / mean if mean else 0.0,
+        "peak_kb": peak / 1024,
+    }
+
+
+def worker(rows: int, repeat: int, only: list[str] | None) -> None:
+    from src.core.db import billingEngine
+
+    sqlite = billingEngine.dialect.name == "sqlite"
+    for case in cases(rows):
+        if only and not any(case.name.startswith(prefix) for prefix in only):
+            continue
+        if case.mysql_only and sqlite:
+            print(f"skip {case.name}: needs a MySQL stand-in", file=sys.stderr)
+            continue
+        print(json.dumps({"rows": rows, **measure(case, repeat)}), flush=True)
+
+
+def run_dataset(rows: int, urls: tuple[str, str], args) -> list[dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "BILLING_DB_URL": urls[0],
+            "COKLIT_DB_URL": urls[1],
+            "ARTIFACT_CACHE_DIR": os.path.join(tmp, "artifacts"),
+            "DATA_VERSION_DIR": os.path.join(tmp, "versions"),
+            "EXPORT_TMP_DIR": tmp,
+        }
+        command = [
+            sys.executable, "-m", "benchmarks.suite", "--worker", str(rows),
+            "--repeat", str(args.repeat),
+        ]
+        if args.only:
+            command += ["--only", *args.only]
+        done = subprocess.run(
+            command, cwd=APP_DIR, env=env, stdout=subprocess.PIPE, text=True
+        )
+    if done.returncode:
+        raise SystemExit(f"benchmark worker for {rows} rows failed")
+    return [json.loads(line) for line in done.stdout.splitlines() if line.startswith("{")]
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Mark each result with its change against the baseline; return regressions."""
+    regressions = []
+    for result in results:
+        base = baseline.get(f"{result['rows']}/{result['case']}")
+        if not base:
+            continue
+        for metric in ("mean_ms", "peak_kb"):
+            change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+            result[f"{metric}_change"] = change
+            if change > threshold:
+                regressions.append(
+                    f"{result['rows']}/{result['case']} {metric}: "
+                    f"{base[metric]:.1f} -> {result[metric]:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path: str, results: list[dict]) -> None:
+    stored = load_baseline(path)
+    for result in results:
+        stored[f"{result['rows']}/{result['case']}"] = {
+            "mean_ms": result["mean_ms"],
+            "peak_kb": result["peak_kb"],
+        }
+    with open(path, "w") as f:
+        json.dump({
+            "saved": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": stored,
+        }, f, indent=2, sort_keys=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=ROW_COUNTS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", nargs="+", help="case name prefixes to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--billing-url")
+    parser.add_argument("--coklit-url")
+    parser.add_argument(
+        "--populate", action="store_true", help="fill the --*-url databases first"
+    )
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args.worker, args.repeat, args.only)
+        return
+    if bool(args.billing_url) != bool(args.coklit_url):
+        parser.error("--billing-url and --coklit-url go together")
+    if args.billing_url and len(args.rows) != 1:
+        parser.error("give exactly the stand-in's --rows with --billing-url")
+
+    baseline = load_baseline(args.baseline)
+    results = []
+    print(",".join(COLUMNS + ["vs_baseline"]))
+    for rows in args.rows:
+        if args.billing_url:
+            urls = (args.billing_url, args.coklit_url)
+            if args.populate:
+                from sqlalchemy import create_engine
+                populate(create_engine(urls[0]), create_engine(urls[1]), rows, args.seed)
+        else:
+            urls = ensure_dataset(rows, args.seed, args.data_dir)
+        batch = run_dataset(rows, urls, args)
+        compare(batch, baseline, args.threshold)
+        for r in batch:
+            change = r.get("mean_ms_change")
+            print(
+                f"{rows},{r['case']},{r['mean_ms']:.1f},{r['p50_ms']:.1f},{r['min_ms']:.1f},"
+                f"{r['max_ms']:.1f},{r['out_rows']},{r['rows_per_sec']:.0f},{r['peak_kb']:.0f},"
+                f"{'' if change is None else f'{change:+.0%}'}"
+            )
+        results += batch
+
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+    if regressions:
+        print(f"regressions over {args.threshold:.0%}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
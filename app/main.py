@@ -1,11 +1,34 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from src.core.compression import CompressionMiddleware
 from src.core.config import settings
+from src.core.metrics import MetricsMiddleware
+from src.core.query_log import QueryProfileMiddleware
 from src.core.utility import Utility
 from src.routers import main
+from src.services.satker_map_svc import ensure_satker_map
+from src.services.search_svc import build_search_indexes
+
+
+def warm_up():
+    build_search_indexes()
+    ensure_satker_map()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the search indexes and the satker map in the background; until
+    # then the nama filters build their index on first use.
+    threading.Thread(target=warm_up, daemon=True).start()
+    yield
+
 
 app = FastAPI(
     title="Export Data TNI",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +36,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    level=settings.COMPRESSION_LEVEL,
+    skip_types=settings.COMPRESSION_SKIP_TYPES,
+)
+app.add_middleware(QueryProfileMiddleware)
+# Outermost, so timings and sizes cover compression and streamed bodies.
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(main.api_route)
 
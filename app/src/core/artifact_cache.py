@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Iterator
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+from .config import settings
+
+_META = ".json"
+_DATA = ".bin"
+
+
+@dataclass
+class Artifact:
+    path: str
+    etag: str
+    filename: str
+    media_type: str
+
+
+class ArtifactCache:
+    """
+    Finished export files on local disk, shared by every worker on the host.
+
+    Keys should include the data version of every table the export reads
+    (see core.cache.get_version), so a write makes older artifacts
+    unreachable instead of having to delete them. Artifacts older than
+    max_age seconds are dropped, and the least recently read ones go once
+    the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(key: Hashable) -> str:
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+
+    def etag(self, key: Hashable) -> str:
+        """The ETag of key's artifact; known before the artifact is built."""
+        return f'"{self.digest(key)}"'
+
+    def _paths(self, key: Hashable) -> tuple[str, str]:
+        base = os.path.join(self.directory, self.digest(key))
+        return base + _DATA, base + _META
+
+    def get(self, key: Hashable) -> Artifact | None:
+        data, meta = self._paths(key)
+        try:
+            with open(meta) as f:
+                info = json.load(f)
+            if time.time() - info["created"] > self.max_age:
+                raise FileNotFoundError(data)
+            os.utime(data)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return Artifact(data, self.etag(key), info["filename"], info["media_type"])
+
+    def _commit(self, key: Hashable, tmp: str, filename: str, media_type: str) -> Artifact:
+        data, meta = self._paths(key)
+        fd, tmp_meta = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"filename": filename, "media_type": media_type, "created": time.time()}, f)
+        os.replace(tmp_meta, meta)
+        os.replace(tmp, data)
+        self.evict(keep=data)
+        return Artifact(data, self.etag(key), filename, media_type)
+
+    def put(self, key: Hashable, path: str, filename: str, media_type: str) -> Artifact:
+        """Move a finished file into the cache and return its artifact."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        os.close(fd)
+        shutil.move(path, tmp)
+        return self._commit(key, tmp, filename, media_type)
+
+    def put_bytes(self, key: Hashable, content: bytes, filename: str, media_type: str) -> Artifact:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return self._commit(key, tmp, filename, media_type)
+
+    def tee(
+        self, key: Hashable, chunks: Iterable[bytes], filename: str, media_type: str
+    ) -> Iterator[bytes]:
+        """
+        Pass a streamed export through while writing it to the cache.
+
+        The artifact is committed only when the stream ends normally; an
+        aborted download leaves nothing behind.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            self._commit(key, tmp, filename, media_type)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _entries(self) -> list[tuple[str, os.stat_result]]:
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if name.endswith(_DATA):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _created(self, path: str, stat: os.stat_result) -> float:
+        try:
+            with open(path[: -len(_DATA)] + _META) as f:
+                return json.load(f)["created"]
+        except (OSError, ValueError, KeyError):
+            return stat.st_mtime
+
+    def _remove(self, path: str) -> None:
+        for p in (path, path[: -len(_DATA)] + _META):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep: str | None = None) -> int:
+        """
+        Drop expired artifacts, then least recently used ones over max_bytes.
+
+        Args:
+            keep (str | None): Path that must survive, e.g. the one just added.
+
+        Returns:
+            int: Number of artifacts removed.
+        """
+        now = time.time()
+        removed = 0
+        entries = []
+        for path, stat in self._entries():
+            if now - self._created(path, stat) > self.max_age and path != keep:
+                self._remove(path)
+                removed += 1
+            else:
+                entries.append((path, stat))
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path, _ in self._entries():
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "files": len(entries),
+                "bytes": sum(stat.st_size for _, stat in entries),
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def artifact_response(artifact: Artifact, if_none_match: str | None = None) -> Response:
+    """Send a cached artifact, or 304 when the client already has it."""
+    if etag_matches(if_none_match, artifact.etag):
+        return Response(status_code=304, headers={"ETag": artifact.etag})
+    return FileResponse(
+        artifact.path,
+        filename=artifact.filename,
+        media_type=artifact.media_type,
+        headers={"ETag": artifact.etag},
+    )
+
+
+artifact_cache = ArtifactCache(
+    settings.ARTIFACT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "export-tni-artifacts"),
+    settings.ARTIFACT_CACHE_MAX_BYTES,
+    settings.ARTIFACT_CACHE_MAX_AGE,
+)
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator
+
+from .config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one key, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _version_dir() -> str:
+    return settings.DATA_VERSION_DIR or os.path.join(
+        tempfile.gettempdir(), "export-tni-versions"
+    )
+
+
+def _version_path(name: str) -> str:
+    return os.path.join(_version_dir(), name)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive lock on path across processes, blocking until granted."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+            return
+        # LK_LOCK retries for about 10 seconds before raising.
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_version(name: str) -> int:
+    """
+    Current data version of a table; part of every derived cache key.
+
+    Versions are small files under DATA_VERSION_DIR, so every worker on the
+    host sees a bump made by any of them.
+    """
+    try:
+        with open(_version_path(name)) as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_version(name: str) -> int:
+    """
+    Mark a table as changed, invalidating every cache entry keyed on it.
+
+    Args:
+        name (str): Table name, e.g. "rekening_tni".
+
+    Returns:
+        int: The new version.
+    """
+    os.makedirs(_version_dir(), exist_ok=True)
+    path = _version_path(name)
+    with _file_lock(path + ".lock"):
+        version = get_version(name) + 1
+        _write_version(path, version)
+    return version
+
+
+def set_version(name: str, version: int) -> None:
+    """Record an externally derived version, e.g. a fingerprint of a table."""
+    os.makedirs(_version_dir(), exist_ok=True)
+    path = _version_path(name)
+    with _file_lock(path + ".lock"):
+        _write_version(path, version)
+
+
+def _write_version(path: str, version: int) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as f:
+        f.write(str(version))
+    # Readers see either the old or the new file, never a partial one.
+    os.replace(tmp, path)
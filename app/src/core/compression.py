@@ -0,0 +1,142 @@
+import zlib
+from typing import Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# zlib wbits producing each Content-Encoding.
+ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    Pick gzip or deflate from an Accept-Encoding header, preferring gzip.
+
+    Args:
+        accept_encoding (str): The request header.
+
+    Returns:
+        str | None: The encoding to use, or None to send identity.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    scores = {coding: weights.get(coding, weights.get("*", 0.0)) for coding in ENCODINGS}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with gzip or deflate as they are sent.
+
+    Streaming bodies are compressed chunk by chunk and flushed after every
+    chunk, so a long export still reaches the client progressively. Bodies
+    are held back only until minimum_size bytes are known; smaller complete
+    bodies, HEAD requests, non-200 responses, responses that already have a
+    Content-Encoding and content types starting with one of skip_types
+    (already compressed formats such as ZIP or XLSX) are sent unchanged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        level: int = 6,
+        skip_types: Sequence[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.skip_types = tuple(skip_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, encoding, send)(scope, receive)
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Message | None = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.on_send)
+
+    def _skip(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            message["status"] != 200
+            or "content-encoding" in headers
+            or content_type.startswith(self.middleware.skip_types)
+        )
+
+    async def _begin(self, compress: bool) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        if compress:
+            self.compressor = zlib.compressobj(
+                self.middleware.level, zlib.DEFLATED, ENCODINGS[self.encoding]
+            )
+            del headers["content-length"]
+            headers["content-encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["etag"] = f"W/{etag}"
+        headers.add_vary_header("Accept-Encoding")
+        await self.send(self.start)
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = self._skip(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.pending.append(body)
+            self.pending_size += len(body)
+            if more_body and self.pending_size < self.middleware.minimum_size:
+                return
+            body = b"".join(self.pending)
+            self.pending = []
+            if not more_body and self.pending_size < self.middleware.minimum_size:
+                self.passthrough = True
+                await self._begin(compress=False)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self._begin(compress=True)
+
+        data = self.compressor.compress(body)
+        if more_body:
+            data += self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            data += self.compressor.flush(zlib.Z_FINISH)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
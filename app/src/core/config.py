@@ -14,9 +14,69 @@ class Settings(BaseSettings):
     COKLIT_DB_NAME: str
     DB_USER: str
     DB_PASS: str
+    # Full SQLAlchemy URLs that replace the DB_* settings, e.g. to point the
+    # app at a local stand-in database for the benchmark suite.
+    BILLING_DB_URL: str | None = None
+    COKLIT_DB_URL: str | None = None
     SQUIDS_ALPHABET: str = "Asd"
     SQUIDS_MIN_LENGTH: int
+    SQUIDS_DETERMINISTIC: bool = True
+    SQUIDS_CACHE_SIZE: int = 65536
     ALLOWED_ORIGINS: list[str]
+    EXPORT_BATCH_SIZE: int = 5000
+    TAGIHAN_COUNT_STRATEGY: str = "exact"
+    MASTER_TNI_COUNT_STRATEGY: str = "exact"
+    MAX_PAGE_LIMIT: int = 1000
+    NDJSON_BATCH_SIZE: int = 1000
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL: int = 300
+    REFERENCE_CACHE_TTL: int = 600
+    URJLW_CACHE_SIZE: int = 100000
+    SEARCH_INDEX_TTL: int = 900
+    SEARCH_MAX_PERIODES: int = 3
+    SEARCH_MAX_CANDIDATES: int = 5000
+    EXPORT_TMP_DIR: str | None = None
+    EXPORT_WORKERS: int = 2
+    ARTIFACT_CACHE_DIR: str | None = None
+    ARTIFACT_CACHE_MAX_BYTES: int = 1 << 30
+    ARTIFACT_CACHE_MAX_AGE: int = 3600
+    DATA_VERSION_DIR: str | None = None
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+    COMPRESSION_SKIP_TYPES: list[str] = [
+        "application/zip",
+        "application/gzip",
+        "application/vnd.openxmlformats-officedocument.",
+        "image/",
+        "video/",
+        "audio/",
+    ]
+    CORRECTION_MAX_ROWS: int = 10000
+    CORRECTION_MAX_BYTES: int = 4 << 20
+    DB_WORKERS: int = 20
+    SYNC_BATCH_SIZE: int = 2000
+    SYNC_MIN_BATCH_SIZE: int = 500
+    SYNC_MAX_BATCH_SIZE: int = 20000
+    SYNC_TARGET_BATCH_SECONDS: float = 0.5
+    MAX_SYNC_JOBS: int = 2
+    SYNC_JOB_PROGRESS_SECONDS: float = 1.0
+    SYNC_JOB_STALE_SECONDS: int = 600
+    DB_ECHO: bool = False
+    SLOW_QUERY_SECONDS: float = 0.5
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_LOG_FILE: str | None = None
+    SLOW_QUERY_KEEP: int = 200
+    REPEATED_QUERY_THRESHOLD: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    BILLING_POOL_SIZE: int = 5
+    BILLING_MAX_OVERFLOW: int = 10
+    BILLING_POOL_RECYCLE: int = 3600
+    BILLING_POOL_PRE_PING: bool = True
+    COKLIT_POOL_SIZE: int = 10
+    COKLIT_MAX_OVERFLOW: int = 10
+    COKLIT_POOL_RECYCLE: int = 3600
+    COKLIT_POOL_PRE_PING: bool = True
+    HEAVY_WORKERS: int = 2
 
     @property
     def SQLALCHEMY_DATABASE_URL(self):
@@ -1,13 +1,106 @@
-from math import e
-from typing import Generator
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Generator
 
-import pymysql
 from src.core.config import settings
-from sqlalchemy import create_engine
+from src.core.metrics import instrument_engine
+from src.core.query_log import ProfiledConnection, query_log
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
-billingEngine = create_engine(str(settings.SQLALCHEMY_DATABASE_URL), echo=True)
-coklitEngine = create_engine(str(settings.COKLIT_DATABASE_URL), echo=True)
+
+class PoolStats:
+    """Checkout and wait counters for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "avg_wait_seconds": round(
+                    self.wait_seconds / self.checkouts, 6) if self.checkouts else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def create_pooled_engine(url: str, prefix: str) -> Engine:
+    """
+    Create an engine whose pool is configured by the <prefix>_POOL_* settings.
+
+    Args:
+        url (str): Database URL.
+        prefix (str): Settings prefix, BILLING or COKLIT.
+
+    Returns:
+        Engine: The configured engine.
+    """
+    engine = create_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=TimedQueuePool,
+        pool_size=getattr(settings, f"{prefix}_POOL_SIZE"),
+        max_overflow=getattr(settings, f"{prefix}_MAX_OVERFLOW"),
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=getattr(settings, f"{prefix}_POOL_RECYCLE"),
+        pool_pre_ping=getattr(settings, f"{prefix}_POOL_PRE_PING"),
+    )
+    stats = engine.pool.stats
+    event.listen(engine, "connect", lambda *_: stats.incr("connects"))
+    event.listen(engine, "checkout", lambda *_: stats.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *_: stats.incr("checkins"))
+    event.listen(engine, "invalidate", lambda *_: stats.incr("invalidated"))
+    instrument_engine(engine, prefix.lower(), on_query=query_log.observe)
+    query_log.register(engine, prefix.lower())
+    return engine
+
+
+billingEngine = create_pooled_engine(
+    settings.BILLING_DB_URL or str(settings.SQLALCHEMY_DATABASE_URL), "BILLING")
+coklitEngine = create_pooled_engine(
+    settings.COKLIT_DB_URL or str(settings.COKLIT_DATABASE_URL), "COKLIT")
 
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=billingEngine)
@@ -18,28 +111,72 @@ Base = declarative_base()
 
 
 def get_database_session() -> Generator:
+    # Sessions only check a connection out of the pool on their first query.
+    db = SessionLocal()
     try:
-        # print(settings.get_mysql_dsn())
-        db = SessionLocal()
         yield db
     finally:
         db.close()
 
 
 def get_coklit_database_session() -> Generator:
+    db = SessionCoklit()
     try:
-        db = SessionCoklit()
         yield db
     finally:
         db.close()
 
 
-def get_raw_database_session():
-    return pymysql.connect(
-        host=settings.DB_HOST,
-        user=settings.DB_USER,
-        password=settings.DB_PASS,
-        database=settings.DB_NAME,
-        port=settings.DB_PORT,
-        # cursorclass=pymysql.cursors.DictCursor
-    )
+@contextmanager
+def get_raw_database_session() -> Generator:
+    """
+    Borrow a raw pymysql connection to the billing database from the pool.
+
+    The connection is returned to the pool, not closed, when the block exits.
+    Its cursors are profiled like the engine's, for the metrics and the slow
+    query log.
+    """
+    connection = billingEngine.raw_connection()
+    try:
+        yield ProfiledConnection(connection, "billing")
+    finally:
+        connection.close()
+
+
+def abort_unbuffered(connection) -> None:
+    """
+    Drop a raw pool connection in the middle of an unbuffered result.
+
+    pymysql can only stop an unbuffered result by reading the rest of it,
+    which closing the cursor does. Invalidating the connection closes its
+    socket instead, so the server aborts the query and the pool opens a
+    fresh connection in its place. Cursors of the connection may still be
+    closed afterwards.
+
+    Args:
+        connection: The connection from get_raw_database_session.
+    """
+    result = getattr(connection.dbapi_connection, "_result", None)
+    if result is not None:
+        result.unbuffered_active = False
+    connection.invalidate()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Return pool occupancy plus checkout and wait counters for each database.
+
+    Returns:
+        Dict[str, Any]: Stats keyed by database name.
+    """
+    result = {}
+    for name, engine in (("billing", billingEngine), ("coklit", coklitEngine)):
+        pool = engine.pool
+        result[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **pool.stats.as_dict(),
+        }
+    return result
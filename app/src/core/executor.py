@@ -0,0 +1,91 @@
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+
+from .config import settings
+
+T = TypeVar("T")
+
+_limiters: dict[str, CapacityLimiter] = {}
+_DONE = object()
+
+
+def get_limiter(heavy: bool = False) -> CapacityLimiter:
+    """
+    Return the worker limiter for regular or heavy blocking calls.
+
+    Limiters are created lazily because anyio needs a running event loop.
+
+    The heavy limiter also bounds streamed bodies (CSV and ZIP exports,
+    NDJSON lists): each chunk they produce is computed under it, see
+    iterate_blocking.
+
+    Args:
+        heavy (bool): Whether the call is an export, a stream or a sync job.
+
+    Returns:
+        CapacityLimiter: The limiter bounding that class of calls.
+    """
+    name = "heavy" if heavy else "db"
+    if name not in _limiters:
+        _limiters[name] = CapacityLimiter(
+            settings.HEAVY_WORKERS if heavy else settings.DB_WORKERS
+        )
+    return _limiters[name]
+
+
+async def run_blocking(
+    func: Callable[..., T], *args: Any, heavy: bool = False, **kwargs: Any
+) -> T:
+    """
+    Run a blocking DB or pandas call on a worker thread.
+
+    Regular calls and heavy calls (exports, tarik_data) use separate bounded
+    pools, so a few heavy requests can never take every worker away from the
+    list and detail endpoints, and none of them block the event loop.
+
+    Args:
+        func (Callable): The blocking function.
+        *args: Positional arguments for func.
+        heavy (bool): Run on the heavy pool instead of the regular pool.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        T: Whatever func returns.
+    """
+    return await to_thread.run_sync(
+        partial(func, *args, **kwargs), limiter=get_limiter(heavy)
+    )
+
+
+async def iterate_blocking(iterable: Iterable[T], heavy: bool = True) -> AsyncIterator[T]:
+    """
+    Iterate a blocking iterator on worker threads, one next() at a time.
+
+    Starlette would iterate a sync body on its own unbounded thread pool;
+    wrapped in this, every chunk of a streamed response is produced under
+    the heavy limiter, so streaming requests count against HEAVY_WORKERS
+    like the call that built them.
+
+    Args:
+        iterable (Iterable[T]): The response body, e.g. CSV or NDJSON chunks.
+        heavy (bool): Use the heavy limiter instead of the regular one.
+
+    Returns:
+        AsyncIterator[T]: The same items, for StreamingResponse.
+    """
+    iterator = iter(iterable)
+    limiter = get_limiter(heavy)
+    try:
+        while True:
+            item = await to_thread.run_sync(next, iterator, _DONE, limiter=limiter)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # Runs the generator's cleanup, e.g. returning its connection to the
+        # pool, when the client disconnects half way.
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await to_thread.run_sync(close)
@@ -0,0 +1,268 @@
+import csv
+import io
+import operator
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from functools import reduce
+from itertools import repeat
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+from openpyxl import Workbook
+from sqlalchemy import Engine, Executable, Select, func, select
+
+from .config import settings
+
+# Shared by every export request, so concurrent ZIP downloads queue for
+# EXPORT_WORKERS render threads instead of each starting their own.
+export_pool = ThreadPoolExecutor(
+    max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export"
+)
+
+
+def stream_rows(
+    engine: Engine, stmt: Executable, batch_size: int | None = None
+) -> Iterator[Sequence[Any]]:
+    """
+    Execute a statement on a server-side (unbuffered) cursor and yield rows in batches.
+
+    The generator owns its connection, so it stays usable after the request's
+    session dependency has been closed.
+
+    Args:
+        engine (Engine): Engine to check the connection out from.
+        stmt (Executable): Statement to execute.
+        batch_size (int | None): Rows per batch. Defaults to EXPORT_BATCH_SIZE.
+
+    Returns:
+        Iterator[Sequence[Any]]: Batches of at most batch_size rows.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(stmt)
+        for batch in result.partitions():
+            yield batch
+
+
+def select_columns(model, spec: Sequence[Any]) -> Select:
+    """
+    Build the SELECT for an export layout (see schema.rekening_tni.ExportColumn).
+
+    Summed columns are added up in SQL, and int columns are coalesced to 0,
+    so totals never reach Python row by row. Constant columns are not
+    selected.
+
+    Args:
+        model: Mapped model the source columns belong to.
+        spec (Sequence[ExportColumn]): The layout.
+
+    Returns:
+        Select: One selected expression per non-constant column.
+    """
+    exprs = []
+    for i, column in enumerate(spec):
+        if column.source is None:
+            continue
+        names = (column.source,) if isinstance(column.source, str) else column.source
+        if column.type == "int" or len(names) > 1:
+            expr = reduce(operator.add, (func.coalesce(getattr(model, n), 0) for n in names))
+        else:
+            expr = getattr(model, names[0])
+        exprs.append(expr.label(f"c{i}"))
+    return select(*exprs)
+
+
+def columnar(spec: Sequence[Any]) -> Callable[[Sequence[Any]], Iterable[tuple]]:
+    """
+    Return a batch converter for rows read with select_columns(spec).
+
+    Each batch is transposed into column arrays once; int columns are
+    truncated in a single NumPy pass and constants are repeated, so there is
+    no per-row Python work beyond the final zip. Extra trailing columns in
+    the rows are ignored.
+
+    Args:
+        spec (Sequence[ExportColumn]): The layout.
+
+    Returns:
+        Callable: Maps a batch of rows to an iterable of output tuples.
+    """
+    def convert(batch: Sequence[Any]) -> Iterable[tuple]:
+        if not batch:
+            return ()
+        selected = iter(zip(*batch))
+        columns = []
+        for column in spec:
+            if column.source is None:
+                columns.append(repeat(column.value, len(batch)))
+                continue
+            values = next(selected)
+            if column.type == "int":
+                values = np.trunc(np.asarray(values, dtype=float)).astype(np.int64).tolist()
+            columns.append(values)
+        return zip(*columns)
+
+    return convert
+
+
+def iter_csv(
+    header: Sequence[str],
+    batches: Iterable[Sequence[Any]],
+    convert: Callable[[Any], Sequence[Any]] | None = None,
+    encoding: str = "utf-8",
+) -> Iterator[bytes]:
+    """
+    Encode batches of rows to CSV bytes, one chunk per batch.
+
+    Args:
+        header (Sequence[str]): Header row.
+        batches (Iterable[Sequence[Any]]): Batches of rows, e.g. from stream_rows.
+        convert (Callable | None): Optional per-row conversion.
+        encoding (str): Output encoding.
+
+    Returns:
+        Iterator[bytes]: CSV chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    for batch in batches:
+        writer.writerows(map(convert, batch) if convert else batch)
+        yield buffer.getvalue().encode(encoding)
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode(encoding)
+
+
+def write_xlsx(
+    header: Sequence[str],
+    batches: Iterable[Sequence[Any]],
+    convert: Callable[[Any], Sequence[Any]] = tuple,
+    title: str = "Sheet1",
+) -> str:
+    """
+    Write batches of rows to a per-request temporary XLSX file.
+
+    Uses openpyxl's write-only mode, so rows are flushed to disk as they are
+    appended instead of being kept in a workbook in memory. The caller owns
+    the returned file and must remove it once it has been sent.
+
+    Args:
+        header (Sequence[str]): Header row.
+        batches (Iterable[Sequence[Any]]): Batches of rows, e.g. from stream_rows.
+        convert (Callable): Per-row conversion to a list or tuple.
+        title (str): Worksheet title.
+
+    Returns:
+        str: Path of the written file.
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx", dir=settings.EXPORT_TMP_DIR)
+    os.close(fd)
+    try:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+        ws.append(list(header))
+        for batch in batches:
+            for row in batch:
+                ws.append(convert(row))
+        wb.save(path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def iter_ordered(
+    items: Iterable[tuple[Any, Any]],
+    func: Callable[[Any], Any],
+    pool: Executor = export_pool,
+    window: int | None = None,
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Apply func to each (key, item) on a thread pool, yielding (key, result) in order.
+
+    At most window + 1 items are in flight, so a slow consumer holds back
+    the producer instead of letting results pile up in memory.
+
+    Args:
+        items (Iterable[tuple[Any, Any]]): Keyed work items.
+        func (Callable): Work to run on each item.
+        pool (Executor): Pool to run on. Defaults to the shared export pool.
+        window (int | None): Items submitted ahead. Defaults to EXPORT_WORKERS.
+
+    Returns:
+        Iterator[tuple[Any, Any]]: Keyed results in input order.
+    """
+    window = window or settings.EXPORT_WORKERS
+    pending = deque()
+    try:
+        for key, item in items:
+            pending.append((key, pool.submit(func, item)))
+            if len(pending) > window:
+                key, future = pending.popleft()
+                yield key, future.result()
+        while pending:
+            key, future = pending.popleft()
+            yield key, future.result()
+    finally:
+        # The client went away: drop the work not started yet.
+        for _, future in pending:
+            future.cancel()
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable file object collecting what zipfile writes until drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(
+    entries: Iterable[tuple[str, bytes]],
+    compress: Callable[[str], bool] = lambda name: True,
+    chunk_size: int = 1 << 20,
+) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive entry by entry without building it in memory.
+
+    The archive is written to an unseekable sink, so zipfile uses data
+    descriptors, and the bytes are yielded as soon as each chunk is written.
+
+    Args:
+        entries (Iterable[tuple[str, bytes]]): (file name, content) pairs.
+        compress (Callable[[str], bool]): Whether to deflate an entry; already
+            compressed files such as XLSX are better stored.
+        chunk_size (int): Bytes written to the archive per step.
+
+    Returns:
+        Iterator[bytes]: ZIP chunks.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if compress(name) else zipfile.ZIP_STORED
+            with archive.open(info, "w") as entry:
+                for i in range(0, len(content), chunk_size):
+                    entry.write(content[i:i + chunk_size])
+                    if sink.chunks:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
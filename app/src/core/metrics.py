@@ -0,0 +1,299 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Sequence
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1 << 20, 4 << 20, 16 << 20, 64 << 20)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+DATABASES = ("billing", "coklit")
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """One metric family; samples are keyed by their label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, Any] = {}
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in items
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: Any, value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, *labels: Any, value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def dec(self, *labels: Any, value: float = 1) -> None:
+        self.inc(*labels, value=-value)
+
+    def set(self, *labels: Any, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, *labels: Any, value: float) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[labels] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total)) for key, (counts, total) in self._values.items()
+            )
+        lines = self.header()
+        names = self.labels + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+requests_total = Counter(
+    "http_requests_total", "Requests handled.", ("method", "route", "status"))
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time from request to the last body byte sent.",
+    ("method", "route"), LATENCY_BUCKETS)
+response_bytes = Histogram(
+    "http_response_size_bytes", "Body bytes sent, after compression.",
+    ("method", "route"), SIZE_BUCKETS)
+in_flight = Gauge(
+    "http_requests_in_flight", "Requests being handled.", ("method",))
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.",
+    ("method", "route", "db"), QUERY_BUCKETS)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.",
+    ("method", "route", "db"), LATENCY_BUCKETS)
+queries_total = Counter(
+    "db_queries_total", "SQL statements executed, in requests or not.", ("db",))
+query_seconds_total = Counter(
+    "db_query_seconds_total", "Time spent executing SQL, in requests or not.", ("db",))
+
+METRICS = [
+    requests_total, request_seconds, response_bytes, in_flight,
+    request_queries, request_db_seconds, queries_total, query_seconds_total,
+]
+
+
+class RequestStats:
+    """SQL statements and time per database for one request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = dict.fromkeys(DATABASES, 0)
+        self.seconds = dict.fromkeys(DATABASES, 0.0)
+
+    def record(self, db: str, seconds: float) -> None:
+        with self._lock:
+            self.queries[db] = self.queries.get(db, 0) + 1
+            self.seconds[db] = self.seconds.get(db, 0.0) + seconds
+
+
+# Set by MetricsMiddleware. anyio's worker threads (run_blocking, streamed
+# bodies) run with a copy of the request's context, so they see it too.
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def record_query(db: str, seconds: float) -> None:
+    queries_total.inc(db)
+    query_seconds_total.inc(db, value=seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.record(db, seconds)
+
+
+def instrument_engine(
+    engine: Engine,
+    db: str,
+    on_query: Callable[[str, str, Any, float, bool], None] | None = None,
+) -> None:
+    """
+    Time every statement the engine executes and count it against the request.
+
+    Only execution is timed; rows fetched later from a server-side cursor
+    are not.
+
+    Args:
+        engine (Engine): Engine to instrument.
+        db (str): Database label, "billing" or "coklit".
+        on_query (Callable | None): Also called with (db, statement,
+            parameters, seconds, executemany) after each statement, from the
+            same timing, e.g. core.query_log.query_log.observe.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        record_query(db, seconds)
+        if on_query is not None:
+            on_query(db, statement, parameters, seconds, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def error(context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            record_query(db, time.perf_counter() - starts.pop())
+
+
+def route_name(scope: Scope) -> str:
+    # The matched route's path template keeps the label set small; anything
+    # unrouted (404s, probes) shares one label.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status, response size and DB usage of every request.
+
+    Registered last so it wraps the other middleware: the latency covers
+    the whole response, streamed bodies included, and sizes are what went
+    on the wire.
+    """
+
+    def __init__(self, app: ASGIApp, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = tuple(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        size = 0
+
+        async def on_send(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, on_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec(method)
+            current_request.reset(token)
+            route = route_name(scope)
+            requests_total.inc(method, route, status)
+            request_seconds.observe(method, route, value=elapsed)
+            response_bytes.observe(method, route, value=size)
+            for db in DATABASES:
+                request_queries.observe(method, route, db, value=stats.queries[db])
+                request_db_seconds.observe(method, route, db, value=stats.seconds[db])
+
+
+def _pool_metrics(pools: Dict[str, Dict[str, Any]]) -> list[str]:
+    families = [
+        ("db_pool_size", "gauge", "size", "Configured pool size."),
+        ("db_pool_checked_out", "gauge", "checked_out", "Connections in use."),
+        ("db_pool_checked_in", "gauge", "checked_in", "Idle connections in the pool."),
+        ("db_pool_overflow", "gauge", "overflow", "Connections over pool_size."),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Connection checkouts."),
+        ("db_pool_connects_total", "counter", "connects", "New DBAPI connections."),
+        ("db_pool_invalidated_total", "counter", "invalidated", "Connections invalidated."),
+        ("db_pool_wait_seconds_total", "counter", "wait_seconds",
+         "Time spent waiting for a connection."),
+        ("db_pool_max_wait_seconds", "gauge", "max_wait_seconds",
+         "Longest wait for a connection."),
+    ]
+    lines = []
+    for name, type, key, help in families:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+        lines += [
+            f'{name}{{db="{db}"}} {_number(stats[key])}' for db, stats in sorted(pools.items())
+        ]
+    return lines
+
+
+def render_metrics(pools: Dict[str, Dict[str, Any]] | None = None) -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+
+    Args:
+        pools (Dict | None): core.db.pool_stats(), rendered as db_pool_* metrics.
+
+    Returns:
+        str: The exposition, newline terminated.
+    """
+    lines: list[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    if pools:
+        lines += _pool_metrics(pools)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,197 @@
+import base64
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import and_, false, func, or_
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from .cache import TTLCache, get_version
+from .config import settings
+
+SortSpec = list[tuple[InstrumentedAttribute, str]]
+
+COUNT_STRATEGIES = ("exact", "window", "cached", "none")
+
+count_cache = TTLCache(settings.COUNT_CACHE_SIZE, settings.COUNT_CACHE_TTL)
+
+
+def parse_sort(
+    sort: Sequence[str] | None,
+    allowed: dict[str, InstrumentedAttribute],
+    tie_breaker: str,
+) -> SortSpec:
+    """
+    Parse "field,asc|desc" sort parameters against a whitelist of columns.
+
+    The tie-breaker column is appended (ascending) unless already present,
+    so the resulting order is total and can be used for keyset pagination.
+
+    Args:
+        sort (Sequence[str] | None): Raw sort parameters.
+        allowed (dict[str, InstrumentedAttribute]): Sortable columns by name.
+        tie_breaker (str): Name of a unique column in allowed.
+
+    Returns:
+        SortSpec: (column, direction) pairs.
+
+    Raises:
+        ValueError: If a field is not sortable or a direction is unknown.
+    """
+    spec = []
+    for s in sort or []:
+        field, _, order = s.partition(",")
+        order = order or "asc"
+        if field not in allowed:
+            raise ValueError(f"Invalid sort field: {field}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid sort order: {order}")
+        spec.append((allowed[field], order))
+    if all(column.key != tie_breaker for column, _ in spec):
+        spec.append((allowed[tie_breaker], "asc"))
+    return spec
+
+
+def order_by(spec: SortSpec) -> list:
+    return [column.asc() if order == "asc" else column.desc() for column, order in spec]
+
+
+def _signature(spec: SortSpec) -> list[str]:
+    return [f"{column.key}:{order}" for column, order in spec]
+
+
+def encode_cursor(spec: SortSpec, row: Any) -> str:
+    """
+    Build an opaque cursor pointing just after the given row.
+
+    Args:
+        spec (SortSpec): The sort the page was read with.
+        row (Any): Last row of the page; sort values are read by attribute.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    payload = {
+        "s": _signature(spec),
+        "v": [getattr(row, column.key) for column, _ in spec],
+    }
+    raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(spec: SortSpec, token: str) -> list[Any]:
+    """
+    Decode a cursor token and check it was issued for the same sort.
+
+    Args:
+        spec (SortSpec): The sort of the current request.
+        token (str): Cursor token from a previous page.
+
+    Returns:
+        list[Any]: Sort values of the last row of the previous page.
+
+    Raises:
+        ValueError: If the token is malformed or was issued for another sort.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if payload.get("s") != _signature(spec) or len(payload.get("v", [])) != len(spec):
+        raise ValueError("Cursor does not match sort")
+    return payload["v"]
+
+
+def _after(column: InstrumentedAttribute, order: str, value: Any):
+    # NULL sorts below every value, as on MySQL and SQLite: first when
+    # ascending, last when descending. A plain comparison with NULL is never
+    # true, so those cases need IS [NOT] NULL.
+    if order == "asc":
+        return column.is_not(None) if value is None else column > value
+    return false() if value is None else or_(column < value, column.is_(None))
+
+
+def keyset_filter(spec: SortSpec, values: list[Any]):
+    """
+    Build the WHERE clause selecting rows strictly after the cursor position.
+
+    For a sort (a asc, b desc, id asc) this is
+    a > va OR (a = va AND b < vb) OR (a = va AND b = vb AND id > vid).
+    Nullable columns (nama, alamat) are compared with NULL as the lowest
+    value, matching the order the database returns them in.
+
+    Args:
+        spec (SortSpec): The sort of the current request.
+        values (list[Any]): Decoded cursor values.
+
+    Returns:
+        ColumnElement: The filter expression.
+    """
+    clauses = []
+    for i, (column, order) in enumerate(spec):
+        # == None compiles to IS NULL.
+        equal = [spec[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, _after(column, order, values[i])))
+    return or_(*clauses)
+
+
+def filter_key(endpoint: str, table: str, **filters: Any) -> tuple:
+    """
+    Normalise an endpoint's filters into a count cache key.
+
+    Empty filters are dropped and the table's data version is included, so
+    any write to the table makes older entries unreachable.
+    """
+    items = tuple(sorted((k, v) for k, v in filters.items() if v not in (None, "")))
+    return (endpoint, items, get_version(table))
+
+
+def paginate(
+    query: Query,
+    spec: SortSpec,
+    page: int,
+    limit: int,
+    strategy: str,
+    cache_key: tuple | None = None,
+) -> tuple[list, int | None, bool]:
+    """
+    Read one offset page and its total with the given count strategy.
+
+    - exact: a separate COUNT query, as before.
+    - window: COUNT(*) OVER () on the page query itself, one round trip.
+    - cached: exact count memoised under cache_key (see filter_key).
+    - none: no count; limit + 1 rows are read to tell whether a next page exists.
+
+    Args:
+        query (Query): Filtered query.
+        spec (SortSpec): Sort to apply.
+        page (int): Page number.
+        limit (int): Page size.
+        strategy (str): One of COUNT_STRATEGIES.
+        cache_key (tuple | None): Key for the cached strategy.
+
+    Returns:
+        tuple[list, int | None, bool]: Rows, total (None for "none") and hasNext.
+    """
+    offset = max(0, page - 1) * limit
+    ordered = query.order_by(*order_by(spec))
+
+    if strategy == "none":
+        rows = ordered.offset(offset).limit(limit + 1).all()
+        return rows[:limit], None, len(rows) > limit
+
+    if strategy == "window":
+        single = len(query.column_descriptions) == 1
+        rows = ordered.add_columns(
+            func.count().over().label("_total")).offset(offset).limit(limit).all()
+        # Past the last page there is no row to carry the total.
+        total = rows[0][-1] if rows else query.count()
+        if single:
+            rows = [row[0] for row in rows]
+    elif strategy == "cached" and cache_key is not None:
+        total = count_cache.get_or_set(cache_key, query.count)
+        rows = ordered.offset(offset).limit(limit).all()
+    else:
+        total = query.count()
+        rows = ordered.offset(offset).limit(limit).all()
+    return rows, total, offset + len(rows) < total
@@ -0,0 +1,296 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import settings
+from .metrics import record_query, route_name
+
+MAX_STATEMENT = 4000
+MAX_PARAMETERS = 500
+# The same statement is explained at most once per interval.
+EXPLAIN_INTERVAL = 600
+
+_SRC = os.sep + "src" + os.sep
+_SERVICES = _SRC + "services" + os.sep
+_SKIP = (
+    __file__,
+    os.path.join("src", "core", "db.py"),
+    os.path.join("src", "core", "metrics.py"),
+)
+
+
+def _caller() -> Dict[str, str | None]:
+    """
+    Where the statement came from: the service function, and the first app
+    frame when that is a core helper (e.g. pagination running the count).
+    """
+    frame = sys._getframe(2)
+    site = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _SRC in filename and not filename.endswith(_SKIP):
+            here = f"{filename[filename.rindex(_SRC) + 1:]}:{frame.f_lineno} {frame.f_code.co_name}"
+            site = site or here
+            if _SERVICES in filename:
+                return {"caller": here, "site": site}
+        frame = frame.f_back
+    return {"caller": site, "site": site}
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _parameters(parameters: Any, executemany: bool) -> str:
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return _truncate(f"{len(parameters)} rows, first {first!r}", MAX_PARAMETERS)
+    return _truncate(repr(parameters), MAX_PARAMETERS)
+
+
+class RequestProfile:
+    """Statements seen during one request, to spot N+1 patterns."""
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self._lock = threading.Lock()
+        self.statements: Dict[str, list] = {}
+
+    def seen(self, statement: str, seconds: float) -> int:
+        with self._lock:
+            entry = self.statements.setdefault(statement, [0, 0.0, None])
+            entry[0] += 1
+            entry[1] += seconds
+            return entry[0]
+
+    def set_caller(self, statement: str, caller: Dict[str, str | None]) -> None:
+        with self._lock:
+            self.statements[statement][2] = caller
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+class QueryLog:
+    """
+    Slow statements and N+1 reports, kept in memory and optionally appended
+    to a JSON-lines file.
+
+    A statement is slow when it runs at least threshold seconds. With
+    explain set, SELECTs that were slow get their EXPLAIN captured on a
+    background thread, on a connection of their own, so the request is not
+    held up and a streaming cursor is never disturbed.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        explain: bool,
+        path: str | None,
+        keep: int,
+        repeat_threshold: int,
+    ):
+        self.threshold = threshold
+        self.explain = explain
+        self.path = path
+        self.repeat_threshold = repeat_threshold
+        self.slow: deque = deque(maxlen=keep)
+        self.repeated: deque = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Engine] = {}
+        # Last EXPLAIN per statement, bounded like the entries themselves.
+        self._explained: OrderedDict[str, float] = OrderedDict()
+        self._keep = keep
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def register(self, engine: Engine, db: str) -> None:
+        """Engine to run EXPLAIN on for statements of db."""
+        self._engines[db] = engine
+
+    def observe(
+        self, db: str, statement: str, parameters: Any, seconds: float, executemany: bool = False
+    ) -> None:
+        """
+        Called after every statement: by the engine listener of
+        metrics.instrument_engine, or by a profiled raw cursor.
+        """
+        profile = current_profile.get()
+        if profile is not None:
+            count = profile.seen(statement, seconds)
+            if count == self.repeat_threshold:
+                profile.set_caller(statement, _caller())
+        if seconds < self.threshold:
+            return
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "db": db,
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": _truncate(statement, MAX_STATEMENT),
+            "parameters": _parameters(parameters, executemany),
+            **_caller(),
+            "route": route_name(profile.scope) if profile is not None else None,
+            "explain": None,
+        }
+        if self.explain and not executemany and self._should_explain(statement):
+            self._explainer.submit(self._explain, entry, db, statement, parameters)
+        else:
+            self._add(self.slow, entry)
+
+    def _should_explain(self, statement: str) -> bool:
+        if statement.split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(statement, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+                return False
+            self._explained[statement] = now
+            self._explained.move_to_end(statement)
+            while len(self._explained) > self._keep:
+                self._explained.popitem(last=False)
+            return True
+
+    def _explain(self, entry: dict, db: str, statement: str, parameters: Any) -> None:
+        engine = self._engines.get(db)
+        try:
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(prefix + statement, parameters)
+                columns = [column[0] for column in cursor.description]
+                entry["explain"] = [
+                    dict(zip(columns, map(str, row))) for row in cursor.fetchall()
+                ]
+                cursor.close()
+            finally:
+                connection.close()
+        except Exception as e:
+            entry["explain"] = f"EXPLAIN failed: {e}"
+        self._add(self.slow, entry)
+
+    def finish(self, profile: RequestProfile) -> None:
+        """Report statements a request ran repeat_threshold times or more."""
+        route = route_name(profile.scope)
+        for statement, (count, seconds, caller) in profile.statements.items():
+            if count >= self.repeat_threshold:
+                self._add(self.repeated, {
+                    "time": datetime.now().isoformat(timespec="milliseconds"),
+                    "route": route,
+                    "method": profile.scope.get("method"),
+                    "count": count,
+                    "total_ms": round(seconds * 1000, 3),
+                    "statement": _truncate(statement, MAX_STATEMENT),
+                    **(caller or {}),
+                })
+
+    def _add(self, target: deque, entry: dict) -> None:
+        kind = "slow" if target is self.slow else "repeated"
+        with self._lock:
+            target.append(entry)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"kind": kind, **entry}, default=str) + "\n")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_seconds": self.threshold,
+                "explain": self.explain,
+                "repeat_threshold": self.repeat_threshold,
+                "file": self.path,
+                "slow": list(self.slow),
+                "repeated": list(self.repeated),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.slow.clear()
+            self.repeated.clear()
+            self._explained.clear()
+
+
+query_log = QueryLog(
+    settings.SLOW_QUERY_SECONDS,
+    settings.SLOW_QUERY_EXPLAIN,
+    settings.SLOW_QUERY_LOG_FILE,
+    settings.SLOW_QUERY_KEEP,
+    settings.REPEATED_QUERY_THRESHOLD,
+)
+
+
+class ProfiledCursor:
+    """DB-API cursor proxy timing execute/executemany for raw connections."""
+
+    def __init__(self, cursor, db: str):
+        self._cursor = cursor
+        self._db = db
+
+    def _run(self, method, query, args, executemany: bool):
+        start = time.perf_counter()
+        try:
+            return method(query, args)
+        finally:
+            seconds = time.perf_counter() - start
+            record_query(self._db, seconds)
+            query_log.observe(self._db, query, args, seconds, executemany)
+
+    def execute(self, query, args=None):
+        return self._run(self._cursor.execute, query, args, False)
+
+    def executemany(self, query, args):
+        return self._run(self._cursor.executemany, query, args, True)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """Raw pool connection whose cursors are profiled; everything else passes through."""
+
+    def __init__(self, connection, db: str):
+        self._connection = connection
+        self._db = db
+
+    def cursor(self, *args, **kwargs) -> ProfiledCursor:
+        return ProfiledCursor(self._connection.cursor(*args, **kwargs), self._db)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class QueryProfileMiddleware:
+    """Collect the statements of each request and report repeated ones at the end."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(scope)
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            query_log.finish(profile)
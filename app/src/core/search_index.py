@@ -0,0 +1,122 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: Any) -> str:
+    return _SPACES.sub(" ", str(text)).strip().lower() if text is not None else ""
+
+
+class NgramIndex:
+    """
+    In-memory n-gram index answering case-insensitive substring queries.
+
+    Each document has a key and a few text fields. search() intersects the
+    posting sets of the query's n-grams, smallest first, then checks the
+    candidates with a plain substring test, so results match LIKE '%q%'.
+    Queries shorter than n fall back to a scan of the stored texts.
+    """
+
+    def __init__(self, fields: Iterable[str], n: int = 3):
+        self.fields = tuple(fields)
+        self.n = n
+        self._lock = threading.RLock()
+        self._docs: Dict[Hashable, Dict[str, Any]] = {}
+        self._texts: Dict[str, Dict[Hashable, str]] = {f: {} for f in self.fields}
+        self._postings: Dict[str, Dict[str, set]] = {f: defaultdict(set) for f in self.fields}
+        self.ready = False
+        self.built_at = 0.0
+
+    def _grams(self, text: str) -> set[str]:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def _add(self, key: Hashable, doc: Dict[str, Any]) -> None:
+        self._docs[key] = doc
+        for field in self.fields:
+            text = normalize(doc.get(field))
+            self._texts[field][key] = text
+            for gram in self._grams(text):
+                self._postings[field][gram].add(key)
+
+    def _remove(self, key: Hashable) -> None:
+        if self._docs.pop(key, None) is None:
+            return
+        for field in self.fields:
+            text = self._texts[field].pop(key, "")
+            postings = self._postings[field]
+            for gram in self._grams(text):
+                keys = postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del postings[gram]
+
+    def add(self, key: Hashable, doc: Dict[str, Any]) -> None:
+        """Insert or replace a document."""
+        with self._lock:
+            self._remove(key)
+            self._add(key, doc)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def rebuild(self, docs: Iterable[tuple[Hashable, Dict[str, Any]]]) -> None:
+        """Replace the whole index with (key, doc) pairs and mark it ready."""
+        fresh = NgramIndex(self.fields, self.n)
+        for key, doc in docs:
+            fresh._add(key, doc)
+        with self._lock:
+            self._docs = fresh._docs
+            self._texts = fresh._texts
+            self._postings = fresh._postings
+            self.ready = True
+            self.built_at = time.monotonic()
+
+    def search(self, query: str, fields: Iterable[str] | None = None) -> set | None:
+        """
+        Return the keys whose fields contain the query, or None if not ready.
+
+        Args:
+            query (str): Substring to look for, case-insensitive.
+            fields (Iterable[str] | None): Fields to match. Defaults to all.
+
+        Returns:
+            set | None: Matching keys.
+        """
+        if not self.ready:
+            return None
+        query = normalize(query)
+        result = set()
+        with self._lock:
+            for field in fields or self.fields:
+                texts = self._texts[field]
+                if len(query) < self.n:
+                    result.update(k for k, text in texts.items() if query in text)
+                    continue
+                postings = self._postings[field]
+                candidates = None
+                for gram in sorted(self._grams(query), key=lambda g: len(postings.get(g, ()))):
+                    keys = postings.get(gram)
+                    if not keys:
+                        candidates = set()
+                        break
+                    candidates = set(keys) if candidates is None else candidates & keys
+                result.update(k for k in candidates or () if query in texts[k])
+        return result
+
+    def get(self, key: Hashable) -> Dict[str, Any] | None:
+        with self._lock:
+            return self._docs.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "docs": len(self._docs),
+                "grams": sum(len(p) for p in self._postings.values()),
+            }
@@ -0,0 +1,182 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Date, DateTime, Numeric, Time
+from sqlalchemy.orm import InstrumentedAttribute
+
+from .executor import iterate_blocking
+
+
+def decimal_value(value: Decimal | None) -> int | float | None:
+    # Same rule as FastAPI's jsonable_encoder: whole decimals become int.
+    if value is None:
+        return None
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+def isoformat(value: date | datetime | time | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps default for raw DB-API values (decimals and dates)."""
+    if isinstance(value, Decimal):
+        return decimal_value(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def compile_serializer(
+    names: Sequence[str], convert: Mapping[str, Callable[[Any], Any]] | None = None
+) -> Callable[[Sequence[Any]], dict]:
+    """
+    Generate a function turning a result row into a dict, once per layout.
+
+    The function is a single dict literal indexing the row by position, so
+    serializing a row costs no attribute lookups or per-field dispatch.
+
+    Args:
+        names (Sequence[str]): Output keys, in the order of the row's columns.
+        convert (Mapping[str, Callable] | None): Per-key value conversions.
+
+    Returns:
+        Callable[[Sequence[Any]], dict]: The row serializer.
+    """
+    convert = convert or {}
+    namespace = {f"c{i}": convert[name] for i, name in enumerate(names) if name in convert}
+    items = ", ".join(
+        f"{name!r}: c{i}(r[{i}])" if name in convert else f"{name!r}: r[{i}]"
+        for i, name in enumerate(names)
+    )
+    return eval(f"lambda r: {{{items}}}", namespace)
+
+
+def column_converters(columns: Sequence[InstrumentedAttribute]) -> dict[str, Callable]:
+    """Conversions to JSON-ready values implied by the columns' SQL types."""
+    convert = {}
+    for column in columns:
+        if isinstance(column.type, Numeric) and column.type.asdecimal:
+            convert[column.key] = decimal_value
+        elif isinstance(column.type, (Date, DateTime, Time)):
+            convert[column.key] = isoformat
+    return convert
+
+
+def model_columns(model) -> list[InstrumentedAttribute]:
+    """Every mapped column attribute of a model, in declaration order."""
+    return [attr.class_attribute for attr in model.__mapper__.column_attrs]
+
+
+def model_serializer(
+    columns: Sequence[InstrumentedAttribute],
+    convert: Mapping[str, Callable[[Any], Any]] | None = None,
+) -> Callable[[Sequence[Any]], dict]:
+    """
+    Serializer for rows selected as exactly these columns.
+
+    Args:
+        columns (Sequence[InstrumentedAttribute]): The selected columns.
+        convert (Mapping[str, Callable] | None): Extra conversions, applied
+            instead of the type-derived ones, e.g. encoding the id.
+
+    Returns:
+        Callable[[Sequence[Any]], dict]: The row serializer.
+    """
+    return compile_serializer(
+        [column.key for column in columns],
+        {**column_converters(columns), **(convert or {})},
+    )
+
+
+def parse_fields(
+    fields: Sequence[str] | None, allowed: Sequence[str], always: Sequence[str] = ()
+) -> list[str] | None:
+    """
+    Validate a sparse fieldset parameter.
+
+    Each value may itself be comma separated, so both fields=a,b and
+    fields=a&fields=b work. The always fields (e.g. the id) are included
+    first whether requested or not.
+
+    Args:
+        fields (Sequence[str] | None): Raw fields parameters.
+        allowed (Sequence[str]): Selectable field names.
+        always (Sequence[str]): Fields every response carries.
+
+    Returns:
+        list[str] | None: Field names without duplicates, or None when no
+        fieldset was requested.
+
+    Raises:
+        ValueError: If a field is not selectable.
+    """
+    names = [name.strip() for value in fields or [] for name in value.split(",") if name.strip()]
+    if not names:
+        return None
+    for name in names:
+        if name not in allowed:
+            raise ValueError(f"Invalid field: {name}")
+    return list(dict.fromkeys([*always, *names]))
+
+
+class RawJSONResponse(Response):
+    """
+    JSON response for payloads that are already plain dicts, lists and scalars.
+
+    Skips FastAPI's jsonable_encoder pass and renders straight to bytes with
+    the same settings as JSONResponse.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return json_bytes(content)
+
+
+def json_bytes(content: Any) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+NDJSON = "application/x-ndjson"
+
+
+def iter_ndjson(
+    batches: Iterable[Iterable[Any]], serialize: Callable[[Any], dict] | None = None
+) -> Iterator[bytes]:
+    """
+    Render batches of rows as newline-delimited JSON, one chunk per batch.
+
+    Batches are pulled one at a time, so when the chunks are sent through a
+    StreamingResponse the next batch is only fetched once the client has
+    taken the previous one, and memory stays at one batch per request.
+
+    Args:
+        batches (Iterable[Iterable[Any]]): Rows, e.g. from stream_rows.
+        serialize (Callable | None): Row to dict; rows are dicts already if None.
+
+    Returns:
+        Iterator[bytes]: One UTF-8 chunk of lines per non-empty batch.
+    """
+    encode = json.JSONEncoder(
+        ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default
+    ).encode
+    for batch in batches:
+        if serialize is not None:
+            lines = [encode(serialize(row)) for row in batch]
+        else:
+            lines = [encode(row) for row in batch]
+        if lines:
+            lines.append("")
+            yield "\n".join(lines).encode("utf-8")
+
+
+def ndjson_response(chunks: Iterable[bytes]) -> StreamingResponse:
+    return StreamingResponse(iterate_blocking(chunks), media_type=NDJSON)
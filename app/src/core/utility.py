@@ -1,6 +1,7 @@
 import uuid
 from ast import List
 from datetime import datetime
+from functools import lru_cache
 
 from fastapi.responses import JSONResponse
 from sqids import Sqids
@@ -57,8 +58,38 @@ class Utility:
             ),
         }
 
+    @staticmethod
+    def cursor_pagination(
+        status: int,
+        message: str,
+        error: List,
+        data: List | None,
+        limit: int,
+        nextCursor: str | None,
+        hasNext: bool,
+    ):
+        return {
+            "status": status,
+            "message": message,
+            "errors": error,
+            "data": (
+                {
+                    "content": data if data else [],
+                    "limit": limit,
+                    "nextCursor": nextCursor,
+                    "hasNext": hasNext,
+                }
+            ),
+        }
+
     @staticmethod
     def encodeId(id: int):
+        if settings.SQUIDS_DETERMINISTIC:
+            return _encode_deterministic(id)
+        return Utility.encodeLegacyId(id)
+
+    @staticmethod
+    def encodeLegacyId(id: int):
         now = datetime.now()
         list_int = [
             *map(int, f"{now.second:02}{now.minute:02}{now.day:02}{now.month:02}"),
@@ -69,7 +100,34 @@ class Utility:
 
     @staticmethod
     def decodeId(id: str):
-        try:
-            return Utility.squids.decode(id)[-5]
-        except ValueError:
-            return 0
+        return _decode(id)
+
+    @staticmethod
+    def encodeIds(ids: list[int]) -> list[str]:
+        if settings.SQUIDS_DETERMINISTIC:
+            return [_encode_deterministic(id) for id in ids]
+        return [Utility.encodeLegacyId(id) for id in ids]
+
+    @staticmethod
+    def decodeIds(ids: list[str]) -> list[int]:
+        return [_decode(id) for id in ids]
+
+
+# Deterministic tokens encode just [id]; legacy tokens carry 8 timestamp
+# digits, the id and 4 year digits, so the id sits at [-5]. Both decode here.
+@lru_cache(maxsize=settings.SQUIDS_CACHE_SIZE)
+def _encode_deterministic(id: int) -> str:
+    return Utility.squids.encode([id])
+
+
+@lru_cache(maxsize=settings.SQUIDS_CACHE_SIZE)
+def _decode(id: str) -> int:
+    try:
+        numbers = Utility.squids.decode(id)
+    except ValueError:
+        return 0
+    if len(numbers) == 1:
+        return numbers[0]
+    if len(numbers) >= 5:
+        return numbers[-5]
+    return 0
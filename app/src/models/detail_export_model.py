@@ -1,4 +1,4 @@
-from sqlalchemy import DECIMAL, Column, String, Integer, Double
+from sqlalchemy import DECIMAL, Boolean, Column, String, Integer, Double
 from src.core.db import Base
 
 
@@ -33,3 +33,5 @@ class RekeningTniModel(Base):
     denda = Column(Double)
     ang_sb = Column(Double)
     jasa_sb = Column(Double)
+    row_hash = Column(String(32))
+    is_removed = Column(Boolean, default=False)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+
+from src.core.db import Base
+
+
+class MasterTniSatkerModel(Base):
+    __tablename__ = "master_tni_satker"
+    nosamw = Column(String, primary_key=True)
+    satker_id = Column(Integer, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Boolean, Column, DateTime, Double, Integer, String, Text
+from ..core.db import Base
+
+
+class SyncJobModel(Base):
+    __tablename__ = "sync_job"
+    id = Column(String(36), primary_key=True)
+    periode = Column(String)
+    # The periode while the job is queued or running, NULL once finished.
+    active_periode = Column(String, unique=True)
+    mode = Column(String)
+    status = Column(String)
+    stage = Column(String)
+    rows_processed = Column(Integer, default=0)
+    rows_total = Column(Integer)
+    rows_per_sec = Column(Double)
+    cancel_requested = Column(Boolean, default=False)
+    message = Column(String)
+    result = Column(Text)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
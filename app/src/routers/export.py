@@ -1,11 +1,15 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from src.schema.rekening_tni import RekeningTniUpdateRequest
-from ..services.export_svc import export_csv, get_tagihan, getTagihanById, tarik_data, update_tagihan
+from src.schema.rekening_tni import RekeningTniCorrection, RekeningTniUpdateRequest
+from ..services.correction_svc import apply_corrections, apply_corrections_csv
+from ..services.export_svc import export_csv, export_zip, get_tagihan, getTagihanById, update_tagihan
+from ..services.job_svc import submit_sync_job
+from ..core.config import settings
+from ..core.executor import run_blocking
 from ..core.utility import Utility
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, UploadFile
 from sqlalchemy.orm import Session
-from ..core.db import get_coklit_database_session, get_database_session
+from ..core.db import get_coklit_database_session
 
 router = APIRouter(
     prefix="/api/tni",
@@ -15,7 +19,7 @@ router = APIRouter(
 
 
 @router.get("/{periode}")
-def index(
+async def index(
     periode: str,
     page: int = Query(1, ge=1),
     limit: int = 10,
@@ -23,12 +27,17 @@ def index(
     nosamw: str | None = None,
     nama: str | None = None,
     satker_id: str | None = None,
+    cursor: str | None = None,
+    count: Literal["exact", "window", "cached", "none"] | None = None,
+    fields: Annotated[list[str] | None, Query()] = None,
+    format: Literal["json", "ndjson"] = "json",
     db: Session = Depends(get_coklit_database_session)
 ):
     satker = Utility.decodeId(satker_id) if satker_id else None
     try:
-        data = get_tagihan(db, periode, page, limit,
-                           sort, nosamw, nama, satker)
+        data = await run_blocking(get_tagihan, db, periode, page, limit,
+                                  sort, nosamw, nama, satker, cursor, count, fields,
+                                  format)
         return data
     except Exception as e:
         print(e)
@@ -36,10 +45,14 @@ def index(
 
 
 @router.get("/{id}/detail")
-def detail(id: str, db: Session = Depends(get_coklit_database_session)):
+async def detail(
+    id: str,
+    fields: Annotated[list[str] | None, Query()] = None,
+    db: Session = Depends(get_coklit_database_session),
+):
     try:
         id = Utility.decodeId(id)
-        data = getTagihanById(id, db)
+        data = await run_blocking(getTagihanById, id, db, fields)
         return data
     except Exception as e:
         print(e)
@@ -47,23 +60,42 @@ def detail(id: str, db: Session = Depends(get_coklit_database_session)):
 
 
 @router.get("/{periode}/{satker_id}/csv")
-async def get_csv(periode: str, satker_id: str, db: Session = Depends(get_coklit_database_session)):
+async def get_csv(
+    periode: str,
+    satker_id: str,
+    db: Session = Depends(get_coklit_database_session),
+    if_none_match: str | None = Header(None),
+):
     satker_id = Utility.decodeId(satker_id)
     try:
-        data = export_csv(periode, satker_id, db)
+        data = await run_blocking(export_csv, periode, satker_id, db, if_none_match, heavy=True)
         return data
     except Exception as e:
         print(e)
         return Utility.json_response(status=e, message="Server Error", error=[], data={})
 
 
+@router.get("/{periode}/zip")
+async def get_zip(
+    periode: str,
+    format: Literal["csv", "xlsx"] = "csv",
+    db: Session = Depends(get_coklit_database_session),
+):
+    try:
+        return await run_blocking(export_zip, periode, db, format, heavy=True)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
 @router.get("/{periode}/tarik_data")
 async def sync(
     periode: str,
+    mode: Literal["full", "delta"] = "full",
     coklitSession: Session = Depends(get_coklit_database_session)
 ):
     try:
-        data = tarik_data(periode, coklitSession)
+        data = await run_blocking(submit_sync_job, periode, mode, coklitSession)
         return data
     except Exception as e:
         print(e)
@@ -75,11 +107,55 @@ async def update(
     id: str,
     request: RekeningTniUpdateRequest,
     db: Session = Depends(get_coklit_database_session),
-    db1: Session = Depends(get_database_session)
 ):
     try:
         id = Utility.decodeId(id)
-        return update_tagihan(id, request, db, db1)
+        return await run_blocking(update_tagihan, id, request, db)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.post("/{periode}/koreksi")
+async def koreksi(
+    periode: str,
+    request: list[RekeningTniCorrection],
+    db: Session = Depends(get_coklit_database_session),
+):
+    try:
+        return await run_blocking(apply_corrections, periode, request, db, heavy=True)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+async def _read_upload(file: UploadFile, limit: int) -> bytes | None:
+    # Read in chunks and give up past limit, instead of loading any size.
+    chunks, size = [], 0
+    while chunk := await file.read(1 << 16):
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post("/{periode}/koreksi/csv")
+async def koreksi_csv(
+    periode: str,
+    file: UploadFile,
+    db: Session = Depends(get_coklit_database_session),
+):
+    try:
+        content = await _read_upload(file, settings.CORRECTION_MAX_BYTES)
+        if content is None:
+            return Utility.json_response(
+                status=413,
+                message=f"File too large, max {settings.CORRECTION_MAX_BYTES} bytes",
+                error=[],
+                data={},
+            )
+        return await run_blocking(apply_corrections_csv, periode, content, db, heavy=True)
     except Exception as e:
         print(e)
         return Utility.json_response(status=e, message="Server Error", error=[], data={})
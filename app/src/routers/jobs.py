@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from src.core.db import get_coklit_database_session
+from src.core.executor import run_blocking
+from src.core.utility import Utility
+from src.services.job_svc import cancel_sync_job, get_sync_job, list_sync_jobs
+
+router = APIRouter(
+    prefix="/api/jobs",
+    tags=["Sync Jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/")
+async def index(
+    periode: str | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_coklit_database_session),
+):
+    try:
+        return await run_blocking(list_sync_jobs, db, periode, limit)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.get("/{job_id}")
+async def detail(job_id: str, db: Session = Depends(get_coklit_database_session)):
+    try:
+        return await run_blocking(get_sync_job, job_id, db)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.post("/{job_id}/cancel")
+async def cancel(job_id: str, db: Session = Depends(get_coklit_database_session)):
+    try:
+        return await run_blocking(cancel_sync_job, job_id, db)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
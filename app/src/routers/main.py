@@ -1,9 +1,13 @@
 from fastapi import APIRouter
 
-from . import export, master, rekair, satker
+from . import export, jobs, master, metrics, rekair, satker, search, system
 api_route = APIRouter()
 
 api_route.include_router(master.router)
 api_route.include_router(export.router)
+api_route.include_router(jobs.router)
 api_route.include_router(rekair.router)
 api_route.include_router(satker.router)
+api_route.include_router(search.router)
+api_route.include_router(system.router)
+api_route.include_router(metrics.router)
@@ -1,8 +1,9 @@
-from typing import Annotated
+from typing import Annotated, Literal
 from ..schema.master_tni import MasterTniSchema
 from ..services.master_tni_svc import delete_master_tni, export_master_tni, export_master_tni_csv, get_master_tni, get_master_tni_by_nosamw, save_master_tni, update_master_tni
+from ..core.executor import run_blocking
 from ..core.utility import Utility
-from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.orm import Session
 from src.core.db import get_coklit_database_session, get_database_session
 
@@ -22,14 +23,20 @@ async def root(
     nama: str | None = None,
     is_aktif: bool = True,
     satker_id: str | None = None,
+    cursor: str | None = None,
+    count: Literal["exact", "window", "cached", "none"] | None = None,
+    fields: Annotated[list[str] | None, Query()] = None,
+    format: Literal["json", "ndjson"] = "json",
     db: Session = Depends(get_database_session),
     dbCoklit: Session = Depends(get_coklit_database_session),
 ):
     try:
         if satker_id is not None:
             satker_id = Utility.decodeId(satker_id)
-        master_tni = get_master_tni(
-            db, dbCoklit, page, limit, sort, nosamw, nama, is_aktif, satker_id)
+        master_tni = await run_blocking(
+            get_master_tni,
+            db, dbCoklit, page, limit, sort, nosamw, nama, is_aktif, satker_id,
+            cursor, count, fields, format)
         return master_tni
     except Exception as e:
         print(e)
@@ -37,9 +44,13 @@ async def root(
 
 
 @router.get("/{nosamw}")
-async def detail(nosamw: int, db: Session = Depends(get_database_session)):
+async def detail(
+    nosamw: int,
+    fields: Annotated[list[str] | None, Query()] = None,
+    db: Session = Depends(get_database_session),
+):
     try:
-        return get_master_tni_by_nosamw(db, nosamw)
+        return await run_blocking(get_master_tni_by_nosamw, db, nosamw, fields)
     except Exception as e:
         print(e)
         return Utility.json_response(status=e, message="Server Error", error=[], data={})
@@ -48,7 +59,7 @@ async def detail(nosamw: int, db: Session = Depends(get_database_session)):
 @router.post("/")
 async def create(request: MasterTniSchema, db: Session = Depends(get_database_session)):
     try:
-        return save_master_tni(db, request)
+        return await run_blocking(save_master_tni, db, request)
     except Exception as e:
         print(e)
         return Utility.dict_response(status=e, message="Server Error", error=[], data={})
@@ -57,7 +68,7 @@ async def create(request: MasterTniSchema, db: Session = Depends(get_database_se
 @router.put("/{nosamw}")
 async def update(nosamw: int, request: MasterTniSchema, db: Session = Depends(get_database_session)):
     try:
-        return update_master_tni(db, request, nosamw)
+        return await run_blocking(update_master_tni, db, request, nosamw)
     except Exception as e:
         print(e)
         return Utility.dict_response(status=e, message="Server Error", error=[], data={})
@@ -66,7 +77,7 @@ async def update(nosamw: int, request: MasterTniSchema, db: Session = Depends(ge
 @router.delete("/{nosamw}")
 async def delete(nosamw: int, db: Session = Depends(get_database_session)):
     try:
-        return delete_master_tni(db, nosamw)
+        return await run_blocking(delete_master_tni, db, nosamw)
     except Exception as e:
         print(e)
         return Utility.json_response(status=e, message="Server Error", error=[], data={})
@@ -80,13 +91,15 @@ async def export(
     satker_id: str | None = None,
     db: Session = Depends(get_database_session),
     dbCoklit: Session = Depends(get_coklit_database_session),
-    background_task: BackgroundTasks = None,
+    if_none_match: str | None = Header(None),
 ):
     try:
         if satker_id is not None:
             satker_id = Utility.decodeId(satker_id)
-        master_tni = export_master_tni(
-            db, dbCoklit, nosamw, nama, is_aktif, satker_id, background_task)
+        master_tni = await run_blocking(
+            export_master_tni,
+            db, dbCoklit, nosamw, nama, is_aktif, satker_id, if_none_match,
+            heavy=True)
         return master_tni
     except Exception as e:
         print(e)
@@ -101,12 +114,15 @@ async def export(
     satker_id: str | None = None,
     db: Session = Depends(get_database_session),
     dbCoklit: Session = Depends(get_coklit_database_session),
+    if_none_match: str | None = Header(None),
 ):
     try:
         if satker_id is not None:
             satker_id = Utility.decodeId(satker_id)
-        master_tni = export_master_tni_csv(
-            db, dbCoklit, nosamw, nama, is_aktif, satker_id)
+        master_tni = await run_blocking(
+            export_master_tni_csv,
+            db, dbCoklit, nosamw, nama, is_aktif, satker_id, if_none_match,
+            heavy=True)
         return master_tni
     except Exception as e:
         print(e)
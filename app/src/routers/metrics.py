@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from src.core.db import pool_stats
+from src.core.metrics import PROMETHEUS, render_metrics
+
+router = APIRouter(tags=["System"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(pool_stats()), media_type=PROMETHEUS)
@@ -1,7 +1,11 @@
+from typing import Literal
+
 from fastapi import APIRouter
 from src.core.contant import SUCCESS
+from ..core.executor import run_blocking
+from ..core.serializer import iter_ndjson, ndjson_response
 from ..core.utility import Utility
-from ..services.rekair import getRekair
+from ..services.rekair import getRekair, iter_rekair
 
 router = APIRouter(
     prefix="/api/rekair",
@@ -11,9 +15,11 @@ router = APIRouter(
 
 
 @router.get("/{periode}")
-async def root(periode: str):
+async def root(periode: str, format: Literal["json", "ndjson"] = "json"):
     try:
-        data = getRekair(periode)
+        if format == "ndjson":
+            return ndjson_response(iter_ndjson(iter_rekair(periode)))
+        data = await run_blocking(getRekair, periode, heavy=True)
         return Utility.dict_response(
             status=SUCCESS,
             message="Success",
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from src.services.satker import get_satker
-from src.core.db import get_coklit_database_session
+from src.services.satker_map_svc import rebuild_satker_map, satker_reconciliation
+from src.core.db import get_coklit_database_session, get_database_session
+from src.core.executor import run_blocking
 from src.core.utility import Utility
 
 router = APIRouter(
@@ -14,7 +16,25 @@ router = APIRouter(
 @router.get("/")
 async def root(db: Session = Depends(get_coklit_database_session)):
     try:
-        return get_satker(db)
+        return await run_blocking(get_satker, db)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.get("/reconciliation")
+async def reconciliation(db: Session = Depends(get_database_session)):
+    try:
+        return await run_blocking(satker_reconciliation, db, heavy=True)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.post("/map/rebuild")
+async def rebuild_map(db: Session = Depends(get_database_session)):
+    try:
+        return await run_blocking(rebuild_satker_map, db, heavy=True)
     except Exception as e:
         print(e)
         return Utility.json_response(status=e, message="Server Error", error=[], data={})
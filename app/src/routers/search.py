@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from src.core.db import get_coklit_database_session, get_database_session
+from src.core.executor import run_blocking
+from src.core.utility import Utility
+from src.services.search_svc import search_master_tni, search_tagihan
+
+router = APIRouter(
+    prefix="/api/search",
+    tags=["Search"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/master_tni")
+async def master_tni(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_database_session),
+):
+    try:
+        return await run_blocking(search_master_tni, db, q, limit)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
+
+
+@router.get("/tni/{periode}")
+async def tagihan(
+    periode: str,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_coklit_database_session),
+):
+    try:
+        return await run_blocking(search_tagihan, db, periode, q, limit)
+    except Exception as e:
+        print(e)
+        return Utility.json_response(status=e, message="Server Error", error=[], data={})
@@ -0,0 +1,77 @@
+from typing import Literal
+
+from fastapi import APIRouter
+from src.core.artifact_cache import artifact_cache
+from src.core.contant import SUCCESS
+from src.core.db import pool_stats
+from src.core.pagination import count_cache
+from src.core.query_log import query_log
+from src.services.cust_svc import invalidate_urjlw_cache, urjlw_cache
+from src.services.satker import invalidate_satker_cache, satker_cache
+from src.services.search_svc import search_index_stats
+from src.core.utility import Utility
+
+router = APIRouter(
+    prefix="/api/system",
+    tags=["System"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/pool")
+async def pool():
+    return Utility.dict_response(
+        status=SUCCESS, message="Success", error=[], data=pool_stats()
+    )
+
+
+@router.get("/cache")
+async def cache():
+    return Utility.dict_response(
+        status=SUCCESS,
+        message="Success",
+        error=[],
+        data={
+            "artifact": artifact_cache.stats(),
+            "count": count_cache.stats(),
+            "satker": satker_cache.stats(),
+            "urjlw": urjlw_cache.stats(),
+        },
+    )
+
+
+@router.post("/cache/invalidate")
+async def invalidate(name: Literal["artifact", "count", "satker", "urjlw", "all"] = "all"):
+    if name in ("artifact", "all"):
+        artifact_cache.clear()
+    if name in ("count", "all"):
+        count_cache.invalidate()
+    if name in ("satker", "all"):
+        invalidate_satker_cache()
+    if name in ("urjlw", "all"):
+        invalidate_urjlw_cache()
+    return Utility.dict_response(
+        status=SUCCESS, message="Cache Invalidated", error=[], data={"name": name}
+    )
+
+
+@router.get("/search")
+async def search():
+    return Utility.dict_response(
+        status=SUCCESS, message="Success", error=[], data=search_index_stats()
+    )
+
+
+@router.get("/queries")
+async def queries():
+    return Utility.dict_response(
+        status=SUCCESS, message="Success", error=[], data=query_log.report()
+    )
+
+
+@router.post("/queries/reset")
+async def reset_queries():
+    query_log.clear()
+    return Utility.dict_response(
+        status=SUCCESS, message="Query Log Cleared", error=[], data={}
+    )
@@ -1,4 +1,7 @@
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import Any, Literal
+
 from pydantic import BaseModel
 
 from src.schema.rekair_schm import RekairSchema
@@ -25,6 +28,13 @@ class RekeningTniUpdateRequest(BaseModel):
     met_l: Decimal
     met_k: Decimal
 
+
+class RekeningTniCorrection(BaseModel):
+    id: str | None = None
+    nosamw: str | None = None
+    met_l: Decimal
+    met_k: Decimal
+
 ExportColumns = [
     "pdam",
     "matra",
@@ -50,3 +60,44 @@ ExportColumns = [
     "ang_sb",
     "jasa_sb"
 ]
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """
+    One column of an export layout.
+
+    source is a rekening_tni column, a tuple of columns to add up (NULL
+    counts as 0), or None for the constant value. "int" columns are
+    truncated like int().
+    """
+    header: str
+    source: str | tuple[str, ...] | None = None
+    type: Literal["str", "int"] = "str"
+    value: Any = None
+
+
+CsvColumns = [
+    ExportColumn("PDAM", "pdam"),
+    ExportColumn("Matra/Kesatuan", "matra"),
+    ExportColumn("Nama Satker", "satker"),
+    ExportColumn("Nomor Sambungan", "nosamw"),
+    ExportColumn("Nama", "nama"),
+    ExportColumn("Alamat", "alamat"),
+    ExportColumn("Periode", "periode"),
+    ExportColumn("Stan Lalu", "met_l", "int"),
+    ExportColumn("Stan Kini", "met_k", "int"),
+    ExportColumn("Stan Angkat", value=0),
+    ExportColumn("Pakai (m3)", "pakai", "int"),
+    ExportColumn("Tarif", value=0),
+    ExportColumn("Tagihan", ("r1", "r2", "r3", "r4", "dnmet"), "int"),
+    ExportColumn("Denda", "denda", "int"),
+    ExportColumn(
+        "Total Tagihan",
+        ("dnmet", "r1", "r2", "r3", "r4", "denda", "ang_sb", "jasa_sb"),
+        "int",
+    ),
+    ExportColumn("Pemeliharaan", value=0),
+    ExportColumn("Administrasi", value=0),
+    ExportColumn("Kelainan", value=""),
+]
@@ -0,0 +1,195 @@
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from operator import itemgetter
+from typing import Any, Callable, Dict
+
+from pymysql.cursors import SSCursor
+
+from ..core.config import settings
+from ..core.db import abort_unbuffered, coklitEngine, get_raw_database_session
+from ..core.query_log import ProfiledConnection
+from .rekair import PDAM, REKENING_TNI_COMPACT_COLUMNS, REKENING_TNI_COMPACT_SQL
+from .sync_svc import HASH_FIELDS, hash_values
+
+TARGET_COLUMNS = [
+    "pdam",
+    "matra",
+    "satker",
+    "nosamw",
+    "nama",
+    "alamat",
+    "periode",
+    "met_l",
+    "met_l_ori",
+    "met_k",
+    "met_k_ori",
+    "pakai",
+    "pakai_ori",
+    "rata2",
+    "rata2_ori",
+    "dnmet",
+    "r1",
+    "r2",
+    "r3",
+    "r4",
+    "t1",
+    "t2",
+    "t3",
+    "t4",
+    "denda",
+    "ang_sb",
+    "jasa_sb",
+    "row_hash",
+]
+
+# Source positions of every target column between pdam and row_hash; the
+# _ori columns reuse the position of their source column.
+_target_values = itemgetter(*[
+    REKENING_TNI_COMPACT_COLUMNS.index(column.removesuffix("_ori"))
+    for column in TARGET_COLUMNS[1:-1]
+])
+_hash_values = itemgetter(*[
+    REKENING_TNI_COMPACT_COLUMNS.index(column) for column in HASH_FIELDS
+])
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size of the process, where /proc reports it."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class LoadStats:
+    periode: str
+    rows: int = 0
+    batches: int = 0
+    batch_size: int = 0
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    # Largest RSS increase over the start of the load, sampled after each
+    # batch. None where RSS cannot be read; other work in the process
+    # (e.g. a concurrent load) counts too.
+    rss_growth_mb: float | None = None
+    stages: Dict[str, float] = field(
+        default_factory=lambda: {"extract": 0.0, "transform": 0.0, "load": 0.0, "commit": 0.0}
+    )
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["seconds"] = round(self.seconds, 3)
+        data["rows_per_sec"] = round(self.rows_per_sec, 1)
+        if self.rss_growth_mb is not None:
+            data["rss_growth_mb"] = round(self.rss_growth_mb, 1)
+        data["stages"] = {k: round(v, 3) for k, v in self.stages.items()}
+        return data
+
+
+def next_batch_size(current: int, elapsed: float) -> int:
+    """
+    Adapt the batch size so each batch takes about SYNC_TARGET_BATCH_SECONDS.
+
+    Args:
+        current (int): Size of the batch that was just loaded.
+        elapsed (float): Seconds it took to extract, transform and load it.
+
+    Returns:
+        int: Size for the next batch, within SYNC_MIN/MAX_BATCH_SIZE.
+    """
+    target = settings.SYNC_TARGET_BATCH_SECONDS
+    if elapsed < target / 2:
+        current *= 2
+    elif elapsed > target * 2:
+        current //= 2
+    return max(settings.SYNC_MIN_BATCH_SIZE, min(settings.SYNC_MAX_BATCH_SIZE, current))
+
+
+def bulk_load(
+    periode: str,
+    table: str = "rekening_tni",
+    progress: Callable[[LoadStats], None] | None = None,
+) -> LoadStats:
+    """
+    Copy a periode of rekair x master_tni rows from billing into coklit.
+
+    Rows are read from an unbuffered billing cursor with a compact SELECT (no
+    constant pdam, no duplicated _ori columns) and written with executemany,
+    which pymysql sends as multi-row INSERTs. The batch size adapts to the
+    observed batch time. Everything is committed in one transaction.
+
+    Args:
+        periode (str): The periode to copy.
+        table (str): Target table.
+        progress (Callable | None): Called with the running stats after each
+            batch. Raising from it aborts and rolls back the load, without
+            reading the rest of the periode.
+
+    Returns:
+        LoadStats: Row count, throughput, RSS growth and per-stage timings.
+    """
+    stats = LoadStats(periode=periode)
+    insert_sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        table, ", ".join(TARGET_COLUMNS), ", ".join(["%s"] * len(TARGET_COLUMNS))
+    )
+    batch_size = settings.SYNC_BATCH_SIZE
+    start = time.perf_counter()
+    rss_start = _rss_mb()
+
+    target = ProfiledConnection(coklitEngine.raw_connection(), "coklit")
+    try:
+        with get_raw_database_session() as source, \
+                source.cursor(SSCursor) as reader, target.cursor() as writer:
+            reader.execute(REKENING_TNI_COMPACT_SQL, (periode,))
+            try:
+                while True:
+                    t0 = time.perf_counter()
+                    rows = reader.fetchmany(batch_size)
+                    t1 = time.perf_counter()
+                    if not rows:
+                        break
+                    values = [
+                        (PDAM, *_target_values(row), hash_values(_hash_values(row)))
+                        for row in rows
+                    ]
+                    t2 = time.perf_counter()
+                    writer.executemany(insert_sql, values)
+                    t3 = time.perf_counter()
+
+                    stats.stages["extract"] += t1 - t0
+                    stats.stages["transform"] += t2 - t1
+                    stats.stages["load"] += t3 - t2
+                    stats.rows += len(rows)
+                    stats.batches += 1
+                    stats.batch_size = batch_size
+                    stats.seconds = t3 - start
+                    stats.rows_per_sec = stats.rows / stats.seconds
+                    rss = _rss_mb()
+                    if rss_start is not None and rss is not None:
+                        stats.rss_growth_mb = max(stats.rss_growth_mb or 0.0, rss - rss_start)
+                    if progress:
+                        progress(stats)
+                    batch_size = next_batch_size(batch_size, t3 - t0)
+            except BaseException:
+                # A cancelled job stops here; closing the reader would first
+                # pull the rest of the periode off the unbuffered cursor.
+                abort_unbuffered(source)
+                raise
+
+        t0 = time.perf_counter()
+        target.commit()
+        stats.stages["commit"] = time.perf_counter() - t0
+    except BaseException:
+        target.rollback()
+        raise
+    finally:
+        target.close()
+
+    stats.seconds = time.perf_counter() - start
+    stats.rows_per_sec = stats.rows / stats.seconds if stats.seconds else 0.0
+    return stats
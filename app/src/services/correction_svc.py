@@ -0,0 +1,214 @@
+import csv
+import io
+from typing import Any, Dict
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..core.cache import bump_version
+from ..core.config import settings
+from ..core.utility import Utility
+from ..models.detail_export_model import RekeningTniModel
+from ..schema.rekening_tni import RekeningTniCorrection
+from .tariff import beban_tiers
+
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def parse_corrections_csv(
+    content: bytes, max_rows: int | None = None
+) -> list[RekeningTniCorrection | str]:
+    """
+    Parse an uploaded CSV with an id or nosamw column plus met_l and met_k.
+
+    Both "," and ";" separated files are accepted. Rows that fail
+    validation are returned as their error message so they can be reported
+    next to the others.
+
+    Args:
+        content (bytes): The uploaded file.
+        max_rows (int | None): Stop after this many data rows.
+
+    Returns:
+        list[RekeningTniCorrection | str]: One entry per data row.
+    """
+    text = content.decode("utf-8-sig")
+    first_line = text.split("\n", 1)[0]
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    items = []
+    for row in csv.DictReader(io.StringIO(text), delimiter=delimiter):
+        if max_rows is not None and len(items) >= max_rows:
+            break
+        row = {key.strip().lower(): (value or "").strip() or None
+               for key, value in row.items() if key}
+        try:
+            items.append(RekeningTniCorrection(**row))
+        except ValidationError as e:
+            items.append("; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            ))
+    return items
+
+
+def _chunks(values: list, size: int = LOOKUP_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _lookup(db: Session, periode: str, ids: list[int], nosamws: list[str]):
+    columns = (
+        RekeningTniModel.id,
+        RekeningTniModel.nosamw,
+        RekeningTniModel.t1,
+        RekeningTniModel.t2,
+        RekeningTniModel.t3,
+    )
+    # Rows gone from billing (is_removed) cannot be corrected.
+    live = (RekeningTniModel.periode == periode, RekeningTniModel.is_removed.is_not(True))
+    by_id, by_nosamw = {}, {}
+    for chunk in _chunks(ids):
+        for row in db.execute(select(*columns).where(*live, RekeningTniModel.id.in_(chunk))):
+            by_id[row.id] = row
+    for chunk in _chunks(nosamws):
+        for row in db.execute(select(*columns).where(
+            *live, RekeningTniModel.nosamw.in_(chunk)
+        )):
+            by_nosamw.setdefault(row.nosamw, []).append(row)
+    return by_id, by_nosamw
+
+
+def apply_corrections(
+    periode: str, items: list[RekeningTniCorrection | str], db: Session
+) -> Dict[str, Any]:
+    """
+    Apply many meter corrections of a periode in one transaction.
+
+    Each item names its row by encoded id or by nosamw; removed rows are
+    not found, and a row named again by a later item is reported as a
+    duplicate of the first, which is the one applied. pakai and r1-r3 are
+    recomputed for the whole batch at once with the tariff tiers used by
+    update_tagihan, and the rows are written with a single executemany
+    UPDATE by primary key.
+
+    Args:
+        periode (str): Periode of the rows.
+        items (list[RekeningTniCorrection | str]): Corrections; a str is a
+            row that already failed parsing.
+        db (Session): The coklit database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary with one result per item, in order.
+    """
+    if len(items) > settings.CORRECTION_MAX_ROWS:
+        return Utility.dict_response(
+            status=413,
+            message=f"Too many rows, max {settings.CORRECTION_MAX_ROWS}",
+            error=[],
+            data={},
+        )
+
+    tokens = [item.id for item in items if isinstance(item, RekeningTniCorrection) and item.id]
+    decoded = dict(zip(tokens, Utility.decodeIds(tokens)))
+    nosamws = list({
+        item.nosamw for item in items
+        if isinstance(item, RekeningTniCorrection) and item.nosamw and not item.id
+    })
+    by_id, by_nosamw = _lookup(db, periode, [id for id in decoded.values() if id], nosamws)
+
+    results, matched, targets = [], [], []
+    first_item = {}
+    for i, item in enumerate(items):
+        result = {"row": i + 1, "status": "invalid"}
+        results.append(result)
+        if isinstance(item, str):
+            result["message"] = item
+            continue
+        result["nosamw"] = item.nosamw
+        if item.id:
+            result["id"] = item.id
+            target = by_id.get(decoded[item.id])
+            if target is None:
+                result.update(status="not_found", message="Tagihan not found")
+                continue
+            if item.nosamw and item.nosamw != target.nosamw:
+                result["message"] = "nosamw does not match id"
+                continue
+        elif item.nosamw:
+            candidates = by_nosamw.get(item.nosamw, [])
+            if len(candidates) != 1:
+                result.update(
+                    status="not_found" if not candidates else "ambiguous",
+                    message="Tagihan not found" if not candidates else "nosamw matches several rows",
+                )
+                continue
+            target = candidates[0]
+        else:
+            result["message"] = "id or nosamw is required"
+            continue
+        if target.id in first_item:
+            result.update(
+                status="duplicate",
+                message=f"Same tagihan as row {first_item[target.id]}, which is applied",
+            )
+            continue
+        first_item[target.id] = i + 1
+        matched.append((result, item))
+        targets.append(target)
+
+    if targets:
+        met_l = np.array([float(item.met_l) for _, item in matched])
+        met_k = np.array([float(item.met_k) for _, item in matched])
+        tarif = np.array(
+            [(row.t1 or 0, row.t2 or 0, row.t3 or 0) for row in targets], dtype=float
+        )
+        pakai = met_k - met_l
+        beban = np.column_stack(beban_tiers(pakai))
+        r = beban * tarif
+
+        params = []
+        for k, ((result, _), row) in enumerate(zip(matched, targets)):
+            values = {
+                "met_l": met_l[k].item(),
+                "met_k": met_k[k].item(),
+                "pakai": pakai[k].item(),
+                "r1": r[k, 0].item(),
+                "r2": r[k, 1].item(),
+                "r3": r[k, 2].item(),
+            }
+            params.append({"id": row.id, **values})
+            result.update(status="updated", nosamw=row.nosamw, **values)
+        db.execute(update(RekeningTniModel), params)
+        db.commit()
+        bump_version("rekening_tni")
+
+    for (result, _), token in zip(matched, Utility.encodeIds([row.id for row in targets])):
+        result["id"] = token
+    updated = len(matched)
+
+    return Utility.dict_response(
+        status=200 if updated else 422,
+        message="Corrections Applied" if updated else "No Corrections Applied",
+        error=[],
+        data={"updated": updated, "failed": len(results) - updated, "rows": results},
+    )
+
+
+def apply_corrections_csv(periode: str, content: bytes, db: Session) -> Dict[str, Any]:
+    """
+    Parse an uploaded corrections CSV and apply it, see apply_corrections.
+
+    Parsing stops one row past CORRECTION_MAX_ROWS, so an oversized file is
+    rejected without validating all of it.
+
+    Args:
+        periode (str): Periode of the rows.
+        content (bytes): The uploaded file.
+        db (Session): The coklit database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary with one result per item, in order.
+    """
+    items = parse_corrections_csv(content, settings.CORRECTION_MAX_ROWS + 1)
+    return apply_corrections(periode, items, db)
@@ -0,0 +1,62 @@
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.cache import TTLCache, bump_version, get_version
+from ..core.config import settings
+from ..models.cust_model import CustModel
+
+urjlw_cache = TTLCache(maxsize=settings.URJLW_CACHE_SIZE, ttl=settings.REFERENCE_CACHE_TTL)
+
+_MISSING = object()
+
+
+def get_urjlw_map(db: Session, nosamws: Iterable[str]) -> Dict[str, str | None]:
+    """
+    Resolve nosamw -> urjlw, fetching only the cache misses in one query.
+
+    Args:
+        db (Session): The billing database session.
+        nosamws (Iterable[str]): Connection numbers to resolve.
+
+    Returns:
+        Dict[str, str | None]: urjlw per nosamw, None when there is no cust row.
+    """
+    result = {}
+    missing = []
+    for nosamw in nosamws:
+        urjlw = urjlw_cache.get(nosamw, _MISSING)
+        if urjlw is _MISSING:
+            missing.append(nosamw)
+        else:
+            result[nosamw] = urjlw
+
+    if missing:
+        found = dict.fromkeys(missing)
+        rows = db.execute(
+            select(CustModel.nosamw, CustModel.urjlw).where(CustModel.nosamw.in_(missing))
+        )
+        for nosamw, urjlw in rows:
+            found[nosamw] = urjlw
+        for nosamw, urjlw in found.items():
+            urjlw_cache.set(nosamw, urjlw)
+        result.update(found)
+    return result
+
+
+def invalidate_urjlw_cache() -> None:
+    urjlw_cache.invalidate()
+    bump_version("cust")
+
+
+def cust_version() -> tuple[int, int]:
+    """
+    Data version of cust, for keys of caches built from it.
+
+    cust is written by billing, not through this API, so besides the bump
+    from invalidate_urjlw_cache the version also rolls over every
+    REFERENCE_CACHE_TTL: no cached export is staler than the urjlw cache.
+    """
+    return get_version("cust"), int(time.time() // settings.REFERENCE_CACHE_TTL)
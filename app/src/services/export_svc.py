@@ -1,73 +1,212 @@
-from ast import And
-import io
 import math
-from typing import Any, Dict
-
+import os
+import re
+from functools import lru_cache
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator
+
+from fastapi import Response
 from fastapi.responses import StreamingResponse
-from src.models.satker import SatkerModel
 from src.models.detail_export_model import RekeningTniModel
 from src.models.sync_log_model import SyncLogModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import pandas as pd
-from src.schema.rekening_tni import RekeningTniUpdateRequest
-from src.services.rekair import get_rekening_tni
+from src.schema.rekening_tni import CsvColumns, RekeningTniUpdateRequest
+from src.services.bulk_loader import bulk_load
+from src.services.satker import get_satker_by_id
+from src.services.search_svc import invalidate_periode_index, tagihan_nama_filter
+from src.services.sync_svc import delta_sync
+from src.services.tariff import beban_tiers
 from src.core.db import coklitEngine
+from src.core.exporter import (
+    columnar, iter_csv, iter_ordered, iter_zip, select_columns, stream_rows, write_xlsx
+)
+from src.core.artifact_cache import artifact_cache, artifact_response, etag_matches
+from src.core.cache import bump_version, get_version
+from src.core.config import settings
+from src.core.executor import iterate_blocking
+from src.core.pagination import (
+    SortSpec, decode_cursor, encode_cursor, filter_key, keyset_filter, order_by, paginate,
+    parse_sort,
+)
+from src.core.serializer import (
+    RawJSONResponse, iter_ndjson, model_serializer, ndjson_response, parse_fields
+)
 from src.core.utility import Utility
 
 
+TAGIHAN_SORTABLE = {
+    column.key: column
+    for column in (
+        RekeningTniModel.id,
+        RekeningTniModel.nosamw,
+        RekeningTniModel.nama,
+        RekeningTniModel.alamat,
+        RekeningTniModel.satker,
+        RekeningTniModel.matra,
+        RekeningTniModel.met_l,
+        RekeningTniModel.met_k,
+        RekeningTniModel.pakai,
+    )
+}
+
+# Read endpoints select these columns and serialize the Core rows directly,
+# without hydrating ORM instances. The sync bookkeeping columns (row_hash,
+# is_removed) are internal and neither returned nor selectable by fields=.
+TAGIHAN_COLUMNS = [
+    RekeningTniModel.id,
+    RekeningTniModel.pdam,
+    RekeningTniModel.matra,
+    RekeningTniModel.satker,
+    RekeningTniModel.nosamw,
+    RekeningTniModel.nama,
+    RekeningTniModel.alamat,
+    RekeningTniModel.periode,
+    RekeningTniModel.met_l,
+    RekeningTniModel.met_l_ori,
+    RekeningTniModel.met_k,
+    RekeningTniModel.met_k_ori,
+    RekeningTniModel.pakai,
+    RekeningTniModel.pakai_ori,
+    RekeningTniModel.rata2,
+    RekeningTniModel.rata2_ori,
+    RekeningTniModel.dnmet,
+    RekeningTniModel.r1,
+    RekeningTniModel.r2,
+    RekeningTniModel.r3,
+    RekeningTniModel.r4,
+    RekeningTniModel.t1,
+    RekeningTniModel.t2,
+    RekeningTniModel.t3,
+    RekeningTniModel.t4,
+    RekeningTniModel.denda,
+    RekeningTniModel.ang_sb,
+    RekeningTniModel.jasa_sb,
+]
+TAGIHAN_FIELDS = {column.key: column for column in TAGIHAN_COLUMNS}
+serialize_tagihan = model_serializer(TAGIHAN_COLUMNS, {"id": Utility.encodeId})
+
+
+@lru_cache(maxsize=128)
+def _tagihan_serializer(keys: tuple[str, ...]) -> Callable:
+    return model_serializer([TAGIHAN_FIELDS[key] for key in keys], {"id": Utility.encodeId})
+
+
+def tagihan_projection(fields: list[str] | None, spec: SortSpec = ()) -> tuple[list, Callable]:
+    """
+    Columns to select and the serializer for a fields= parameter.
+
+    id is always returned. Sort columns outside the fieldset are selected
+    after the requested ones, for the cursor, but not serialized.
+
+    Raises:
+        ValueError: If a field is not a rekening_tni column.
+    """
+    keys = parse_fields(fields, TAGIHAN_FIELDS, always=("id",))
+    if keys is None:
+        return TAGIHAN_COLUMNS, serialize_tagihan
+    columns = [TAGIHAN_FIELDS[key] for key in keys]
+    columns += [column for column, _ in spec if column.key not in keys]
+    return columns, _tagihan_serializer(tuple(keys))
+
+
 def get_tagihan(
     db: Session,
     periode: str,
     page: int,
     limit: int,
-    sort: list[list[str]] | None = None,
+    sort: list[str] | None = None,
     nosamw: str | None = None,
     nama: str | None = None,
     satker_id: int | None = None,
+    cursor: str | None = None,
+    count: str | None = None,
+    fields: list[str] | None = None,
+    format: str = "json",
 ) -> Dict[str, any]:
     """
     Retrieve tagihan data from the database.
 
+    When cursor is given (empty string for the first page) the page is read
+    with keyset pagination on the sort columns plus id, so every page costs
+    the same however deep it is. Otherwise page/limit offset pagination is used.
+    limit is capped at MAX_PAGE_LIMIT. With format "ndjson" every matching
+    row is streamed from a server-side cursor instead, one object per line,
+    and page, limit, cursor and count do not apply.
+
     Args:
     db (Session): Database session.
     periode (str): Periode.
-    offset (int): Offset.
+    page (int): Page number for offset pagination.
     limit (int): Limit.
-    sort (list[list[str]] | None): Sort query.
+    sort (list[str] | None): Sort query, "field,asc|desc" on TAGIHAN_SORTABLE.
     nosamw (str | None): Filter by nosamw.
     nama (str | None): Filter by nama.
+    satker_id (int | None): Filter by satker.
+    cursor (str | None): Cursor token from the previous page.
+    count (str | None): Count strategy for offset pagination, one of
+        COUNT_STRATEGIES. Defaults to TAGIHAN_COUNT_STRATEGY.
+    fields (list[str] | None): Columns to return; only these are selected.
+    format (str): "json" for a page, "ndjson" to stream the whole result.
 
     Returns:
     Dict[str, any]: A dictionary containing the response data.
     """
-    offset = max(0, page - 1) * limit
-    stmt = db.query(RekeningTniModel)
-    stmt = stmt.filter(RekeningTniModel.periode == periode)
+    limit = max(1, min(limit, settings.MAX_PAGE_LIMIT))
+    try:
+        spec = parse_sort(sort, TAGIHAN_SORTABLE, "id")
+        after = decode_cursor(spec, cursor) if cursor else None
+        columns, serialize = tagihan_projection(fields, spec)
+    except ValueError as e:
+        return Utility.dict_response(status=400, message=str(e), error=[], data={})
+
+    stmt = db.query(*columns)
+    stmt = stmt.filter(
+        RekeningTniModel.periode == periode, RekeningTniModel.is_removed.is_not(True)
+    )
     if nosamw:
         stmt = stmt.filter(RekeningTniModel.nosamw == nosamw)
     if nama:
-        stmt = stmt.filter(RekeningTniModel.nama.like(f"%{nama}%"))
+        stmt = stmt.filter(tagihan_nama_filter(periode, nama))
     if satker_id:
-        satker = db.query(SatkerModel).filter(
-            SatkerModel.id == satker_id).first()
+        satker = get_satker_by_id(satker_id, db)
         stmt = stmt.filter(RekeningTniModel.satker == satker.nama)
 
-    total = stmt.count()
-    if sort:
-        for s in sort:
-            slist = s.split(",")
-            field = getattr(RekeningTniModel, slist[0])
-            order = slist[1] if len(slist) > 1 else "asc"
-            stmt = stmt.order_by(field.asc() if order ==
-                                 "asc" else field.desc())
-
-    result: list[RekeningTniModel] = stmt.offset(offset).limit(limit).all()
-    totalPages = math.ceil(total / limit)
-
-    for r in result:
-        r.id = Utility.encodeId(r.id)
+    if format == "ndjson":
+        batches = stream_rows(
+            coklitEngine, stmt.order_by(*order_by(spec)).statement, settings.NDJSON_BATCH_SIZE
+        )
+        return ndjson_response(iter_ndjson(batches, serialize))
+
+    if cursor is not None:
+        if after:
+            stmt = stmt.filter(keyset_filter(spec, after))
+        rows = stmt.order_by(*order_by(spec)).limit(limit + 1).all()
+        hasNext = len(rows) > limit
+        rows = rows[:limit]
+        nextCursor = encode_cursor(spec, rows[-1]) if hasNext else None
+        result = [serialize(row) for row in rows]
+        return RawJSONResponse(Utility.cursor_pagination(
+            status=200 if result else 404,
+            message="Data Found" if result else "Not Found",
+            error=[],
+            data=result,
+            limit=limit,
+            nextCursor=nextCursor,
+            hasNext=hasNext,
+        ))
+
+    strategy = count or settings.TAGIHAN_COUNT_STRATEGY
+    key = filter_key(
+        "tagihan", "rekening_tni", periode=periode, nosamw=nosamw,
+        nama=nama.lower() if nama else None, satker_id=satker_id,
+    )
+    rows, total, hasNext = paginate(stmt, spec, page, limit, strategy, key)
+    totalPages = math.ceil(total / limit) if total is not None else None
+    result = [serialize(row) for row in rows]
 
-    return Utility.pagination(
+    return RawJSONResponse(Utility.pagination(
         status=200 if result else 404,
         message="Data Found" if result else "Not Found",
         error=[],
@@ -77,31 +216,35 @@ def get_tagihan(
         page=page,
         totalPages=totalPages,
         isFirst=page == 1,
-        isLast=page == totalPages,
-    )
+        isLast=not hasNext,
+    ))
 
 
-def getTagihanById(id: int, db: Session) -> Dict[str, Any]:
+def getTagihanById(id: int, db: Session, fields: list[str] | None = None) -> Dict[str, Any]:
     """
     Retrieve a tagihan by ID from the database.
 
     Args:
         id (int): Tagihan ID.
         db (Session): Database session.
+        fields (list[str] | None): Columns to return; only these are selected.
 
     Returns:
         Dict[str, Any]: A dictionary containing the response data.
     """
-    query = db.query(RekeningTniModel).filter(RekeningTniModel.id == id)
-    result: RekeningTniModel | None = query.first()
-    if result:
-        result.id = Utility.encodeId(result.id)
-    return Utility.dict_response(
-        status=200 if result else 404,
-        message="Data Found" if result else "Not Found",
+    try:
+        columns, serialize = tagihan_projection(fields)
+    except ValueError as e:
+        return Utility.dict_response(status=400, message=str(e), error=[], data={})
+    row = db.execute(select(*columns).where(
+        RekeningTniModel.id == id, RekeningTniModel.is_removed.is_not(True)
+    )).first()
+    return RawJSONResponse(Utility.dict_response(
+        status=200 if row else 404,
+        message="Data Found" if row else "Not Found",
         error=[],
-        data=result if result else {},
-    )
+        data=serialize(row) if row else {},
+    ))
 
 
 def get_latest_sync(periode: str, db: Session) -> bool:
@@ -136,47 +279,66 @@ def save_sync(periode: str, db: Session) -> None:
     db.commit()
 
 
-def tarik_data(periode: str, db: Session) -> Dict[str, Any]:
+def tarik_data(
+    periode: str,
+    db: Session,
+    mode: str = "full",
+    progress: Callable[[int], None] | None = None,
+) -> Dict[str, Any]:
     """
     Retrieve data from the database and save it to the coklit database.
 
+    In "full" mode a periode can only be pulled once. In "delta" mode only
+    new and changed billing rows are written and coklit edits are kept, see
+    sync_svc.delta_sync.
+
     Args:
         periode (str): The periode to retrieve.
         db (Session): The database session.
+        mode (str): "full" or "delta".
+        progress (Callable | None): Called with the rows processed so far.
 
     Returns:
         Dict[str, Any]: A dictionary containing the response data.
     """
     isSynced = get_latest_sync(periode, db)
+    if mode == "delta":
+        counts = delta_sync(periode, db, progress)
+        bump_version("rekening_tni")
+        invalidate_periode_index(periode)
+        if not isSynced:
+            save_sync(periode, db)
+        return Utility.dict_response(
+            status=201,
+            message="Success Synced",
+            error=[],
+            data={"periode": periode, "mode": mode, **counts},
+        )
+
     if isSynced:
         return Utility.dict_response(
             status=403, message="Already Synced", error=[], data={}
         )
 
-    data: pd.DataFrame = get_rekening_tni(periode)
-    if data is None:
-        return Utility.dict_response(status=404, message="Not Found", error=[], data={})
-
-    data.to_sql(
-        con=coklitEngine,
-        name="rekening_tni",
-        if_exists="append",
-        index=False,
-        method="multi",
-        chunksize=1000,
+    stats = bulk_load(
+        periode, progress=(lambda stats: progress(stats.rows)) if progress else None
     )
+    if stats.rows == 0:
+        return Utility.dict_response(status=404, message="Not Found", error=[], data={})
     save_sync(periode, db)
+    bump_version("rekening_tni")
+    invalidate_periode_index(periode)
 
     return Utility.dict_response(
         status=201,
         message="Success Synced",
         error=[],
-        data={"periode": periode, "total": len(data)},
+        data={"periode": periode, "total": stats.rows, "stats": stats.as_dict()},
     )
 
 
 def update_tagihan(
-    id: int, data: RekeningTniUpdateRequest, db: Session, db_billing: Session
+    id: int, data: RekeningTniUpdateRequest, db: Session
 ) -> Dict[str, Any]:
     """
     Update a tagihan by ID from the database.
@@ -185,23 +347,20 @@ def update_tagihan(
         id (int): Tagihan ID.
         data (RekeningTniUpdateRequest): The data to update.
         db (Session): Database session.
-        db_billing (Session): Billing database session.
 
     Returns:
         Utility.Response: A dictionary containing the response data.
     """
     tagihan = db.get(RekeningTniModel, id)
-    if tagihan is None:
+    # Rows gone from billing are not billed, so they cannot be corrected.
+    if tagihan is None or tagihan.is_removed:
         return Utility.dict_response(
             status=404, message="Tagihan not found", error=[], data={}
         )
 
     pakai = data.met_k-data.met_l
 
-    # rekening = detail_rekening(tagihan.nosamw, tagihan.periode, db_billing)
-    beban1 = float(min(10, float(pakai)))
-    beban2 = float(min(10, max(0, float(pakai) - beban1)))
-    beban3 = float(max(0, float(pakai) - beban1 - beban2))
+    beban1, beban2, beban3 = (float(beban) for beban in beban_tiers(pakai))
 
     tagihan.met_l = data.met_l
     tagihan.met_k = data.met_k
@@ -211,69 +370,139 @@ def update_tagihan(
     tagihan.r3 = beban3 * tagihan.t3
 
     db.commit()
+    bump_version("rekening_tni")
     return Utility.json_response(
         status=201, message="Tagihan updated", error=[], data={}
     )
 
 
-def export_csv(periode: str, satker_id: int, db: Session) -> StreamingResponse:
+def export_csv(
+    periode: str, satker_id: int, db: Session, if_none_match: str | None = None
+) -> StreamingResponse:
     """Export Rekening TNI to CSV.
 
+    Rows are read from a server-side cursor in batches of EXPORT_BATCH_SIZE and
+    each batch is encoded straight to CSV bytes, so memory stays flat. The
+    layout is CsvColumns; totals are summed in the SELECT and each batch is
+    converted column-wise. The file is kept in the artifact cache until
+    rekening_tni changes, and repeated downloads are sent from there.
+
     Args:
         periode (str): Periode.
         satker_id (int): Satker ID.
         db (Session): Database session.
+        if_none_match (str | None): The request's If-None-Match header.
 
     Returns:
         StreamingResponse: A StreamingResponse with the CSV data.
     """
-    satker = db.query(SatkerModel).filter(SatkerModel.id == satker_id).first()
-    stmt = db.query(RekeningTniModel).filter(
-        RekeningTniModel.periode == periode)
-    stmt = stmt.filter(RekeningTniModel.satker == satker.nama)
-    rows = stmt.all()
-    if rows is None:
-        return Utility.dict_response(status=404, message="Not Found", error=[], data={})
+    satker = get_satker_by_id(satker_id, db)
+    if satker is None:
+        return Utility.json_response(status=404, message="Not Found", error=[], data={})
+
+    key = ("export_csv", periode, satker_id, get_version("rekening_tni"))
+    etag = artifact_cache.etag(key)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    artifact = artifact_cache.get(key)
+    if artifact:
+        return artifact_response(artifact)
+
+    stmt = select_columns(RekeningTniModel, CsvColumns).where(
+        RekeningTniModel.periode == periode,
+        RekeningTniModel.satker == satker.nama,
+        RekeningTniModel.is_removed.is_not(True),
+    )
+    filename = f"rekening_tni_{satker.nama}_{periode}.csv"
+    chunks = iter_csv(
+        [column.header for column in CsvColumns],
+        map(columnar(CsvColumns), stream_rows(coklitEngine, stmt)),
+    )
+    response = StreamingResponse(
+        iterate_blocking(artifact_cache.tee(key, chunks, filename, "text/csv")),
+        media_type="text/csv",
+        headers={"ETag": etag},
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
 
-    data = []
-    for row in rows:
-        data.append(
-            {
-                "PDAM": row.pdam,
-                "Matra/Kesatuan": row.matra,
-                "Nama Satker": row.satker,
-                "Nomor Sambungan": row.nosamw,
-                "Nama": row.nama,
-                "Alamat": row.alamat,
-                "Periode": row.periode,
-                "Stan Lalu": int(row.met_l),
-                "Stan Kini": int(row.met_k),
-                "Stan Angkat": int(0),
-                "Pakai (m3)": int(row.pakai),
-                "Tarif": int(0),
-                "Tagihan": int(row.r1 + row.r2 + row.r3 + row.r4+row.dnmet),
-                "Denda": int(row.denda),
-                "Total Tagihan": int(
-                    row.dnmet
-                    + row.r1
-                    + row.r2
-                    + row.r3
-                    + row.r4
-                    + row.denda
-                    + row.ang_sb
-                    + row.jasa_sb
-                ),
-                "Pemeliharaan": int(0),
-                "Administrasi": int(0),
-                "Kelainan": "",
-            }
-        )
-    df = pd.DataFrame(data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
+
+def _satker_groups(periode: str) -> Iterator[tuple[str, list]]:
+    # One scan of the periode ordered by satker, so each satker's rows are
+    # contiguous and only one group is assembled at a time.
+    stmt = (
+        select_columns(RekeningTniModel, CsvColumns)
+        .add_columns(RekeningTniModel.satker)
+        .where(RekeningTniModel.periode == periode, RekeningTniModel.is_removed.is_not(True))
+        .order_by(RekeningTniModel.satker, RekeningTniModel.id)
+    )
+    rows = chain.from_iterable(stream_rows(coklitEngine, stmt))
+    for satker, group in groupby(rows, key=itemgetter(-1)):
+        yield satker, list(group)
+
+
+def _render_csv(rows: list) -> bytes:
+    header = [column.header for column in CsvColumns]
+    return b"".join(iter_csv(header, [columnar(CsvColumns)(rows)]))
+
+
+def _render_xlsx(rows: list) -> bytes:
+    header = [column.header for column in CsvColumns]
+    path = write_xlsx(header, [columnar(CsvColumns)(rows)], title="Rekening TNI")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def _zip_entries(
+    files: Iterator[tuple[str, bytes]], periode: str, format: str
+) -> Iterator[tuple[str, bytes]]:
+    # Different satker names can clean up to the same file name ("A/B",
+    # "A:B"); number the later ones so no entry is shadowed.
+    used = set()
+    for satker, content in files:
+        base = re.sub(r"[\\/:*?\"<>|]+", "_", satker or "TANPA SATKER")
+        name, n = base, 1
+        while name.upper() in used:
+            n += 1
+            name = f"{base}_{n}"
+        used.add(name.upper())
+        yield f"rekening_tni_{name}_{periode}.{format}", content
+
+
+def export_zip(periode: str, db: Session, format: str = "csv") -> StreamingResponse:
+    """Export every satker of a periode as one ZIP of per-satker files.
+
+    The periode is scanned once and split by satker. Each satker's file is
+    rendered on the shared export pool while the archive is streamed, so
+    neither the rows nor the archive are held in memory whole.
+
+    Args:
+        periode (str): Periode.
+        db (Session): Database session.
+        format (str): "csv" or "xlsx" for the files inside the archive.
+
+    Returns:
+        StreamingResponse: A StreamingResponse with the ZIP data.
+    """
+    found = db.scalar(select(RekeningTniModel.id).where(
+        RekeningTniModel.periode == periode, RekeningTniModel.is_removed.is_not(True)
+    ).limit(1))
+    if found is None:
+        return Utility.json_response(status=404, message="Not Found", error=[], data={})
+
+    render = _render_xlsx if format == "xlsx" else _render_csv
+    files = iter_ordered(_satker_groups(periode), render)
     response = StreamingResponse(
-        iter([stream.getvalue()]), media_type="text/csv")
+        iterate_blocking(iter_zip(
+            _zip_entries(files, periode, format),
+            compress=lambda name: not name.endswith(".xlsx"),
+        )),
+        media_type="application/zip",
+    )
     response.headers["Content-Disposition"] = (
-        f"attachment; filename=rekening_tni_{satker.nama}_{periode}.csv"
+        f"attachment; filename=rekening_tni_{periode}.zip"
     )
     return response
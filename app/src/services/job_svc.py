@@ -0,0 +1,354 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.db import SessionCoklit
+from ..core.utility import Utility
+from ..models.sync_job_model import SyncJobModel
+from .export_svc import tarik_data
+from .rekair import count_rekening_tni
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_submit_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MAX_SYNC_JOBS, thread_name_prefix="sync-job"
+            )
+        return _executor
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _job_dict(job: SyncJobModel) -> Dict[str, Any]:
+    eta = None
+    if job.status == "running" and job.rows_total and job.rows_per_sec:
+        eta = round(max(0, job.rows_total - job.rows_processed) / job.rows_per_sec, 1)
+    return {
+        "id": job.id,
+        "periode": job.periode,
+        "mode": job.mode,
+        "status": job.status,
+        "stage": job.stage,
+        "rows_processed": job.rows_processed,
+        "rows_total": job.rows_total,
+        "rows_per_sec": job.rows_per_sec,
+        "eta_seconds": eta,
+        "cancel_requested": job.cancel_requested,
+        "message": job.message,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": _isoformat(job.created_at),
+        "started_at": _isoformat(job.started_at),
+        "updated_at": _isoformat(job.updated_at),
+        "finished_at": _isoformat(job.finished_at),
+    }
+
+
+def _release_stale_jobs(db: Session) -> None:
+    # Jobs without a heartbeat for SYNC_JOB_STALE_SECONDS belonged to a
+    # worker that died; fail them so they stop holding their periode.
+    now = datetime.now()
+    db.execute(
+        update(SyncJobModel)
+        .where(
+            SyncJobModel.status.in_(ACTIVE_STATUSES),
+            SyncJobModel.updated_at < now - timedelta(seconds=settings.SYNC_JOB_STALE_SECONDS),
+        )
+        .values(
+            status="failed", stage="done", message="Worker lost", active_periode=None,
+            updated_at=now, finished_at=now,
+        )
+    )
+    db.commit()
+
+
+def _active_jobs(db: Session) -> list[SyncJobModel]:
+    return db.query(SyncJobModel).filter(SyncJobModel.status.in_(ACTIVE_STATUSES)).all()
+
+
+def _conflict(db: Session, periode: str) -> Dict[str, Any]:
+    running = db.query(SyncJobModel).filter(SyncJobModel.active_periode == periode).first()
+    return Utility.dict_response(
+        status=409,
+        message="Sync already running",
+        error=[],
+        data=_job_dict(running) if running else {},
+    )
+
+
+def submit_sync_job(periode: str, mode: str, db: Session) -> Dict[str, Any]:
+    """
+    Queue a tarik_data run and return its job id immediately.
+
+    At most MAX_SYNC_JOBS jobs run at once, and only one per periode. The
+    check and the insert are serialized within the worker by a lock; across
+    workers the unique active_periode column rejects a second job for a
+    periode.
+
+    Args:
+        periode (str): The periode to sync.
+        mode (str): "full" or "delta".
+        db (Session): The coklit database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the queued job.
+    """
+    with _submit_lock:
+        _release_stale_jobs(db)
+        active = _active_jobs(db)
+        if any(job.periode == periode for job in active):
+            return _conflict(db, periode)
+        if len(active) >= settings.MAX_SYNC_JOBS:
+            return Utility.dict_response(
+                status=429, message="Too many sync jobs", error=[], data={}
+            )
+
+        now = datetime.now()
+        job = SyncJobModel(
+            id=Utility.uuid(),
+            periode=periode,
+            active_periode=periode,
+            mode=mode,
+            status="queued",
+            stage="queued",
+            rows_processed=0,
+            cancel_requested=False,
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker queued this periode since the check above.
+            db.rollback()
+            return _conflict(db, periode)
+    _get_executor().submit(run_sync_job, job.id)
+    return Utility.dict_response(
+        status=202, message="Sync Submitted", error=[], data=_job_dict(job)
+    )
+
+
+class _ProgressReporter:
+    """Writes job progress on its own session and raises JobCancelled on request."""
+
+    def __init__(self, job_id: str, started: float):
+        self.job_id = job_id
+        self.started = started
+        self.last_report = 0.0
+
+    def __call__(self, rows: int) -> None:
+        now = time.perf_counter()
+        if now - self.last_report < settings.SYNC_JOB_PROGRESS_SECONDS:
+            return
+        self.last_report = now
+        elapsed = now - self.started
+        with SessionCoklit() as db:
+            db.execute(
+                update(SyncJobModel)
+                .where(SyncJobModel.id == self.job_id)
+                .values(
+                    rows_processed=rows,
+                    rows_per_sec=round(rows / elapsed, 1) if elapsed else None,
+                    updated_at=datetime.now(),
+                )
+            )
+            cancel = db.scalar(
+                select(SyncJobModel.cancel_requested).where(SyncJobModel.id == self.job_id)
+            )
+            db.commit()
+        if cancel:
+            raise JobCancelled()
+
+
+class _Heartbeat:
+    """
+    Touches the job's updated_at on a thread of its own while the job runs.
+
+    The count and the delta preload are single long statements with no
+    progress reports; without this a live job would look stale to the
+    SYNC_JOB_STALE_SECONDS sweep.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.interval = max(1.0, settings.SYNC_JOB_STALE_SECONDS / 4)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with SessionCoklit() as db:
+                    db.execute(
+                        update(SyncJobModel)
+                        .where(
+                            SyncJobModel.id == self.job_id,
+                            SyncJobModel.status.in_(ACTIVE_STATUSES),
+                        )
+                        .values(updated_at=datetime.now())
+                    )
+                    db.commit()
+            except Exception as e:
+                print(e)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _finish(db: Session, job: SyncJobModel, status: str, message: str, result=None) -> None:
+    now = datetime.now()
+    job.status = status
+    job.stage = "done"
+    job.active_periode = None
+    job.message = message[:255]
+    job.result = json.dumps(result) if result is not None else None
+    job.updated_at = now
+    job.finished_at = now
+    db.commit()
+
+
+def run_sync_job(job_id: str) -> None:
+    """
+    Run a queued sync job on the job executor and record its outcome.
+
+    Args:
+        job_id (str): The job to run.
+    """
+    with SessionCoklit() as db:
+        job = db.get(SyncJobModel, job_id)
+        if job.cancel_requested:
+            _finish(db, job, "cancelled", "Cancelled before start")
+            return
+        try:
+            with _Heartbeat(job_id):
+                job.status = "running"
+                job.stage = "counting"
+                job.started_at = job.updated_at = datetime.now()
+                db.commit()
+
+                job.rows_total = count_rekening_tni(job.periode)
+                job.stage = "loading"
+                job.updated_at = datetime.now()
+                db.commit()
+
+                periode, mode = job.periode, job.mode
+                response = tarik_data(
+                    periode, db, mode, _ProgressReporter(job_id, time.perf_counter())
+                )
+                db.refresh(job)
+                data = response["data"]
+                if response["status"] == 201:
+                    job.rows_processed = data.get("total", job.rows_total)
+                _finish(
+                    db,
+                    job,
+                    "succeeded" if response["status"] == 201 else "failed",
+                    response["message"],
+                    data,
+                )
+        except JobCancelled:
+            db.rollback()
+            _finish(db, db.get(SyncJobModel, job_id), "cancelled", "Cancelled")
+        except Exception as e:
+            print(e)
+            db.rollback()
+            _finish(db, db.get(SyncJobModel, job_id), "failed", str(e))
+
+
+def get_sync_job(job_id: str, db: Session) -> Dict[str, Any]:
+    """
+    Retrieve a sync job's stage, progress, throughput and ETA.
+
+    Args:
+        job_id (str): Job ID.
+        db (Session): The coklit database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    job = db.get(SyncJobModel, job_id)
+    return Utility.dict_response(
+        status=200 if job else 404,
+        message="Data Found" if job else "Not Found",
+        error=[],
+        data=_job_dict(job) if job else {},
+    )
+
+
+def list_sync_jobs(db: Session, periode: str | None = None, limit: int = 20) -> Dict[str, Any]:
+    """
+    List the most recent sync jobs.
+
+    Args:
+        db (Session): The coklit database session.
+        periode (str | None): Filter by periode.
+        limit (int): Maximum number of jobs.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    query = db.query(SyncJobModel)
+    if periode:
+        query = query.filter(SyncJobModel.periode == periode)
+    jobs = query.order_by(SyncJobModel.created_at.desc()).limit(limit).all()
+    return Utility.dict_response(
+        status=200 if jobs else 404,
+        message="Data Found" if jobs else "Not Found",
+        error=[],
+        data=[_job_dict(job) for job in jobs],
+    )
+
+
+def cancel_sync_job(job_id: str, db: Session) -> Dict[str, Any]:
+    """
+    Ask a queued or running sync job to stop.
+
+    The worker running the job sees the flag at its next progress report and
+    rolls the sync back.
+
+    Args:
+        job_id (str): Job ID.
+        db (Session): The coklit database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    job = db.get(SyncJobModel, job_id)
+    if job is None:
+        return Utility.dict_response(status=404, message="Not Found", error=[], data={})
+    if job.status not in ACTIVE_STATUSES:
+        return Utility.dict_response(
+            status=409, message="Job already finished", error=[], data=_job_dict(job)
+        )
+    job.cancel_requested = True
+    db.commit()
+    return Utility.dict_response(
+        status=202, message="Cancel Requested", error=[], data=_job_dict(job)
+    )
@@ -1,18 +1,35 @@
 from datetime import datetime
+from functools import lru_cache
+from itertools import count
 import io
-import os
 import math
+from typing import Callable, Iterator, Sequence
 from unittest import result
-from fastapi import BackgroundTasks
+from fastapi import Response
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pandas import DataFrame
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 
+from ..core.db import SessionLocal, billingEngine
+from ..core.exporter import stream_rows, write_xlsx
+from ..core.artifact_cache import artifact_cache, artifact_response, etag_matches
+from ..core.cache import bump_version, get_version
+from ..core.config import settings
+from ..core.pagination import (
+    SortSpec, decode_cursor, encode_cursor, filter_key, keyset_filter, order_by, paginate,
+    parse_sort,
+)
 from ..models.cust_model import CustModel
 from ..schema.master_tni import MasterTniSchema
-from ..services.satker import get_satker_by_id
+from ..services.cust_svc import cust_version, get_urjlw_map
+from ..services.satker_map_svc import map_master_tni_satker, satker_filter
+from ..services.search_svc import index_master_tni, master_nama_filter, unindex_master_tni
 from ..models.master_tni_model import MasterTniModel
 from pydantic import BaseModel
+from ..core.serializer import (
+    RawJSONResponse, iter_ndjson, model_columns, model_serializer, ndjson_response, parse_fields
+)
 from ..core.utility import Utility
 import pandas as pd
 import numpy as np
@@ -25,49 +42,117 @@ class MasterTni(BaseModel):
     satker: str
 
 
+MASTER_TNI_SORTABLE = {
+    column.key: column
+    for column in (
+        MasterTniModel.nosamw,
+        MasterTniModel.nama,
+        MasterTniModel.kotama,
+        MasterTniModel.satker,
+    )
+}
+
+MASTER_TNI_COLUMNS = model_columns(MasterTniModel)
+MASTER_TNI_FIELDS = {column.key: column for column in MASTER_TNI_COLUMNS}
+serialize_master_tni = model_serializer(MASTER_TNI_COLUMNS)
+
+# The list and the exports show the same rows: master rows with a cust row,
+# once each. The exports read urjlw per row; the list fills it in from the
+# urjlw cache.
+HAS_CUST = exists().where(CustModel.nosamw == MasterTniModel.nosamw)
+CUST_URJLW = (
+    select(func.min(CustModel.urjlw))
+    .where(CustModel.nosamw == MasterTniModel.nosamw)
+    .scalar_subquery()
+    .label("urjlw")
+)
+
+# urjlw is not a master_tni column; it is filled in from the cust reference
+# cache, and only when the fieldset asks for it.
+MASTER_TNI_LIST_FIELDS = ("nosamw", "nama", "kotama", "satker", "is_aktif", "urjlw")
+
+
+@lru_cache(maxsize=128)
+def _master_tni_serializer(keys: tuple[str, ...]) -> Callable:
+    return model_serializer([MASTER_TNI_FIELDS[key] for key in keys])
+
+
+def master_tni_projection(
+    fields: list[str] | None, default: Sequence[str], spec: SortSpec = ()
+) -> tuple[list, Callable, bool]:
+    """
+    Columns to select, their serializer and whether to add urjlw.
+
+    nosamw is always returned. Sort columns outside the fieldset are
+    selected after the requested ones, for the cursor, but not serialized.
+
+    Raises:
+        ValueError: If a field is neither a master_tni column nor urjlw.
+    """
+    keys = parse_fields(fields, [*MASTER_TNI_FIELDS, "urjlw"], always=("nosamw",)) or default
+    names = tuple(key for key in keys if key != "urjlw")
+    columns = [MASTER_TNI_FIELDS[key] for key in names]
+    columns += [column for column, _ in spec if column.key not in names]
+    return columns, _master_tni_serializer(names), "urjlw" in keys
+
+
 def get_master_tni(
     db_session: Session,
     db_coklit_session: Session,
     page: int,
     limit: int,
-    sort: list[tuple[str, str]] | None,
+    sort: list[str] | None,
     nosamw: str | None,
     nama: str | None,
     is_aktif: bool = True,
     satker_id: int = 0,
+    cursor: str | None = None,
+    count: str | None = None,
+    fields: list[str] | None = None,
+    format: str = "json",
 ) -> JSONResponse:
     """
     Retrieve a list of MasterTniModel based on the provided parameters.
 
+    When cursor is given (empty string for the first page) the page is read
+    with keyset pagination on the sort columns plus nosamw instead of offset.
+    limit is capped at MAX_PAGE_LIMIT. With format "ndjson" every matching
+    row is streamed from a server-side cursor instead, one object per line.
+
     Args:
         db_session (Session): The database session.
         db_coklit_session (Session): The coklit database session.
         page (int): Page number for pagination.
         limit (int): Number of items per page.
-        sort (list[tuple[str, str]] | None): List of fields to sort by and their order.
+        sort (list[str] | None): "field,asc|desc" on MASTER_TNI_SORTABLE.
         nosamw (str | None): Filter by nosamw.
         nama (str | None): Filter by nama.
         is_aktif (bool, optional): Flag to filter by active status. Defaults to True.
         satker_id (int, optional): ID of the satker. Defaults to 0.
+        cursor (str | None): Cursor token from the previous page.
+        count (str | None): Count strategy for offset pagination, one of
+            COUNT_STRATEGIES. Defaults to MASTER_TNI_COUNT_STRATEGY.
+        fields (list[str] | None): Fields to return; only the matching
+            columns are selected. Defaults to MASTER_TNI_LIST_FIELDS.
+        format (str): "json" for a page, "ndjson" to stream the whole result.
 
     Returns:
         JSONResponse: A JSON response containing the retrieved data.
     """
-    offset = max(0, page - 1) * limit
-    satker = get_satker_by_id(satker_id, db_coklit_session)
-    query = db_session.query(
-        MasterTniModel.nosamw,
-        MasterTniModel.nama,
-        MasterTniModel.kotama,
-        MasterTniModel.satker,
-        MasterTniModel.is_aktif,
-        CustModel.urjlw
-    ).join(CustModel, MasterTniModel.nosamw == CustModel.nosamw).filter(MasterTniModel.is_aktif == is_aktif)
-
-    if satker:
-        query = query.filter(
-            MasterTniModel.satker.like(f"%{satker.nama}%")
+    limit = max(1, min(limit, settings.MAX_PAGE_LIMIT))
+    try:
+        spec = parse_sort(sort, MASTER_TNI_SORTABLE, "nosamw")
+        after = decode_cursor(spec, cursor) if cursor else None
+        columns, serialize, with_urjlw = master_tni_projection(
+            fields, MASTER_TNI_LIST_FIELDS, spec
         )
+    except ValueError as e:
+        return Utility.dict_response(status=400, message=str(e), error=[], data={})
+
+    query = db_session.query(*columns).filter(MasterTniModel.is_aktif == is_aktif, HAS_CUST)
+
+    if satker_id:
+        query = query.filter(satker_filter(satker_id))
 
     if nosamw:
         query = query.filter(
@@ -75,33 +160,38 @@ def get_master_tni(
         )
 
     if nama:
-        query = query.filter(
-            MasterTniModel.nama.like(f"%{nama}%")
+        query = query.filter(master_nama_filter(nama))
+
+    if format == "ndjson":
+        return ndjson_response(iter_ndjson(_iter_master_tni(
+            query.order_by(*order_by(spec)).statement, serialize, with_urjlw
+        )))
+
+    if cursor is not None:
+        if after:
+            query = query.filter(keyset_filter(spec, after))
+        rows = query.order_by(*order_by(spec)).limit(limit + 1).all()
+        hasNext = len(rows) > limit
+        rows = rows[:limit]
+        result = _master_tni_rows(db_session, rows, serialize, with_urjlw)
+        return Utility.cursor_pagination(
+            status=200 if result else 404,
+            message="Data Found" if result else "Not Found",
+            error=[],
+            data=result,
+            limit=limit,
+            nextCursor=encode_cursor(spec, rows[-1]) if hasNext else None,
+            hasNext=hasNext,
         )
 
-    total = query.count()
-
-    if sort:
-        for sort_field, sort_order in sort:
-            field = getattr(MasterTniModel, sort_field)
-            query = query.order_by(
-                field.asc() if sort_order == "asc" else field.desc()
-            )
-
-    query = query.offset(offset).limit(limit)
-
-    rows = query.all()
-    result = []
-    for row in rows:
-        result.append({
-            "nosamw": row.nosamw,
-            "nama": row.nama,
-            "kotama": row.kotama,
-            "satker": row.satker,
-            "is_aktif": row.is_aktif,
-            "urjlw": row.urjlw,
-        })
-    total_pages = math.ceil(total / limit)
+    strategy = count or settings.MASTER_TNI_COUNT_STRATEGY
+    key = filter_key(
+        "master_tni", "master_tni", nosamw=nosamw,
+        nama=nama.lower() if nama else None, is_aktif=is_aktif, satker_id=satker_id,
+    )
+    rows, total, hasNext = paginate(query, spec, page, limit, strategy, key)
+    result = _master_tni_rows(db_session, rows, serialize, with_urjlw)
+    total_pages = math.ceil(total / limit) if total is not None else None
 
     return Utility.pagination(
         status=200 if result else 404,
@@ -113,28 +203,55 @@ def get_master_tni(
         page=page,
         totalPages=total_pages,
         isFirst=page == 1,
-        isLast=page == total_pages,
+        isLast=not hasNext,
     )
 
 
-def get_master_tni_by_nosamw(db: Session, nosamw: str) -> MasterTniModel | None:
+def _master_tni_rows(
+    db: Session, rows: list, serialize: Callable, with_urjlw: bool
+) -> list[dict]:
+    result = [serialize(row) for row in rows]
+    if with_urjlw:
+        # urjlw comes from the reference cache instead of a join to cust.
+        urjlw = get_urjlw_map(db, [item["nosamw"] for item in result])
+        for item in result:
+            item["urjlw"] = urjlw.get(item["nosamw"])
+    return result
+
+
+def _iter_master_tni(stmt, serialize: Callable, with_urjlw: bool) -> Iterator[list[dict]]:
+    # The request's session is gone by the time the body is streamed, so
+    # the urjlw lookups get a session of their own.
+    with SessionLocal() as db:
+        for rows in stream_rows(billingEngine, stmt, settings.NDJSON_BATCH_SIZE):
+            yield _master_tni_rows(db, rows, serialize, with_urjlw)
+
+
+def get_master_tni_by_nosamw(
+    db: Session, nosamw: str, fields: list[str] | None = None
+) -> MasterTniModel | None:
     """Retrieve MasterTniModel by nosamw from the database.
 
     Args:
         db (Session): The database session.
         nosamw (str): The nosamw of the MasterTniModel to retrieve.
+        fields (list[str] | None): Fields to return; only the matching
+            columns are selected. Defaults to every column.
 
     Returns:
         MasterTniModel | None: The retrieved MasterTniModel or None if not found.
     """
-    result = db.query(MasterTniModel).filter(
-        MasterTniModel.nosamw == nosamw).first()
-    return Utility.dict_response(
-        status=200 if result else 404,
-        message="Data Found" if result else "Not Found",
+    try:
+        columns, serialize, with_urjlw = master_tni_projection(fields, list(MASTER_TNI_FIELDS))
+    except ValueError as e:
+        return Utility.dict_response(status=400, message=str(e), error=[], data={})
+    row = db.execute(select(*columns).where(MasterTniModel.nosamw == nosamw)).first()
+    return RawJSONResponse(Utility.dict_response(
+        status=200 if row else 404,
+        message="Data Found" if row else "Not Found",
         error=[],
-        data=result,
-    )
+        data=_master_tni_rows(db, [row], serialize, with_urjlw)[0] if row else None,
+    ))
 
 
 def save_master_tni(db: Session, master_tni: MasterTniSchema) -> JSONResponse:
@@ -164,7 +281,10 @@ def save_master_tni(db: Session, master_tni: MasterTniSchema) -> JSONResponse:
         )
 
         db.add(new_data)
+        map_master_tni_satker(db, new_data.nosamw, new_data.satker)
         db.commit()
+        bump_version("master_tni")
+        index_master_tni(new_data.nosamw, new_data.nama)
         db.refresh(new_data)
         return Utility.dict_response(
             status=201, message="Master Tni created", error=[], data=master_tni
@@ -199,7 +319,10 @@ def update_master_tni(
     existing_master_tni.kotama = updated_master_tni.kotama
     existing_master_tni.satker = updated_master_tni.satker
     existing_master_tni.is_aktif = updated_master_tni.is_aktif
+    map_master_tni_satker(db_session, existing_master_tni.nosamw, existing_master_tni.satker)
     db_session.commit()
+    bump_version("master_tni")
+    index_master_tni(existing_master_tni.nosamw, existing_master_tni.nama)
     db_session.refresh(existing_master_tni)
 
     return Utility.dict_response(status=200, message="Update Success", error=[], data=existing_master_tni)
@@ -224,17 +347,26 @@ def delete_master_tni(db_session: Session, nosamw: str) -> JSONResponse:
             status=404, message="Data Not Found", error=[], data={})
 
     db_session.delete(master_tni)
+    map_master_tni_satker(db_session, master_tni.nosamw, None)
     db_session.commit()
+    bump_version("master_tni")
+    unindex_master_tni(master_tni.nosamw)
 
     return Utility.json_response(
         status=200, message="Delete Success", error=[], data={})
 
 
-def remove_file(path: str):
-    try:
-        os.remove(path)
-    except Exception as e:
-        print(e)
+MASTER_TNI_XLSX_HEADER = ["urut", "nosamw", "nama", "kotama", "satker", "is_aktif", "urjlw"]
+
+
+MASTER_TNI_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _export_key(endpoint, nosamw, nama, is_aktif, satker_id) -> tuple:
+    return (
+        endpoint, nosamw or None, nama.lower() if nama else None, is_aktif,
+        satker_id or None, get_version("master_tni"), cust_version(),
+    )
 
 
 def export_master_tni(
@@ -244,55 +376,64 @@ def export_master_tni(
     nama: str | None,
     is_aktif: bool,
     satker_id: int | None,
-    background_task: BackgroundTasks,
+    if_none_match: str | None = None,
 ):
+    """
+    Export Master TNI to XLSX.
+
+    Rows are streamed from a server-side cursor into a temporary file written
+    in openpyxl's write-only mode, so memory stays bounded. The file is then
+    kept in the artifact cache until master_tni changes, and repeated
+    downloads are sent from there.
+
+    Args:
+        db (Session): The database session.
+        dbCoklit (Session): The coklit database session.
+        nosamw (str | None): Filter by nosamw.
+        nama (str | None): Filter by nama.
+        is_aktif (bool): Filter by active status.
+        satker_id (int | None): ID of the satker.
+        if_none_match (str | None): The request's If-None-Match header.
+
+    Returns:
+        FileResponse: The XLSX download.
+    """
     try:
-        query = db.query(
+        key = _export_key("export_master_tni", nosamw, nama, is_aktif, satker_id)
+        etag = artifact_cache.etag(key)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        artifact = artifact_cache.get(key)
+        if artifact:
+            return artifact_response(artifact)
+
+        stmt = select(
             MasterTniModel.nosamw,
             MasterTniModel.nama,
             MasterTniModel.kotama,
             MasterTniModel.satker,
             MasterTniModel.is_aktif,
-            CustModel.urjlw
-        ).join(
-            CustModel,
-            MasterTniModel.nosamw == CustModel.nosamw
-        ).filter(MasterTniModel.is_aktif == is_aktif)
+            CUST_URJLW,
+        ).where(MasterTniModel.is_aktif == is_aktif, HAS_CUST)
 
         if satker_id:
-            satker = get_satker_by_id(satker_id, dbCoklit)
-            likeNama = "%{}%".format(satker.nama)
-            query = query.filter(MasterTniModel.satker.like(likeNama))
+            stmt = stmt.where(satker_filter(satker_id))
 
         if nosamw:
-            query = query.filter(MasterTniModel.nosamw == nosamw)
+            stmt = stmt.where(MasterTniModel.nosamw == nosamw)
 
         if nama:
-            likeNama = "%{}%".format(nama)
-            query = query.filter(MasterTniModel.nama.like(likeNama))
-
-        data = []
-        urut = 1
-        for row in query.all():
-            data.append(
-                {
-                    "urut": urut,
-                    "nosamw": row.nosamw,
-                    "nama": row.nama,
-                    "kotama": row.kotama,
-                    "satker": row.satker,
-                    "is_aktif": row.is_aktif,
-                    "urjlw": row.urjlw
-                }
-            )
-            urut += 1
-
-        df: DataFrame = pd.DataFrame(data)
-        df.to_excel("master_tni.xlsx", index=False)
-        file_response = FileResponse(
-            "master_tni.xlsx", filename="master_tni.xlsx")
-        background_task.add_task(remove_file, "master_tni.xlsx")
-        return file_response
+            stmt = stmt.where(master_nama_filter(nama))
+
+        urut = count(1)
+        path = write_xlsx(
+            MASTER_TNI_XLSX_HEADER,
+            stream_rows(billingEngine, stmt),
+            lambda row: (next(urut), *row),
+        )
+        return artifact_response(
+            artifact_cache.put(key, path, "master_tni.xlsx", MASTER_TNI_XLSX)
+        )
     except Exception as e:
         print(e)
         return Utility.json_response(
@@ -307,28 +448,31 @@ def export_master_tni_csv(
     nama: str | None,
     is_aktif: bool,
     satker_id: int | None,
+    if_none_match: str | None = None,
 ):
     try:
+        key = _export_key("export_master_tni_csv", nosamw, nama, is_aktif, satker_id)
+        etag = artifact_cache.etag(key)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        artifact = artifact_cache.get(key)
+        if artifact:
+            return artifact_response(artifact)
+
         query = db.query(
             MasterTniModel.nosamw,
             MasterTniModel.satker,
-            CustModel.urjlw
-        ).join(
-            CustModel,
-            MasterTniModel.nosamw == CustModel.nosamw
-        ).filter(MasterTniModel.is_aktif == is_aktif)
+            CUST_URJLW,
+        ).filter(MasterTniModel.is_aktif == is_aktif, HAS_CUST)
 
         if satker_id:
-            satker = get_satker_by_id(satker_id, dbCoklit)
-            likeNama = "%{}%".format(satker.nama)
-            query = query.filter(MasterTniModel.satker.like(likeNama))
+            query = query.filter(satker_filter(satker_id))
 
         if nosamw:
             query = query.filter(MasterTniModel.nosamw == nosamw)
 
         if nama:
-            likeNama = "%{}%".format(nama)
-            query = query.filter(MasterTniModel.nama.like(likeNama))
+            query = query.filter(master_nama_filter(nama))
 
         rows = query.all()
 
@@ -339,13 +483,10 @@ def export_master_tni_csv(
         df = pd.DataFrame(data)
         stream = io.StringIO()
         df.to_csv(stream, index=False)
-        response = StreamingResponse(
-            iter([stream.getvalue()]), media_type="text/csv")
-        response.headers["Content-Disposition"] = (
-            f"attachment; filename=master_tni_{
-                datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
-        )
-        return response
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        return artifact_response(artifact_cache.put_bytes(
+            key, stream.getvalue().encode(), f"master_tni_{timestamp}.csv", "text/csv"
+        ))
     except Exception as e:
         print(e)
         return Utility.json_response(
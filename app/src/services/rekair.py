@@ -1,81 +1,166 @@
+from typing import Iterator
+
+from pymysql.cursors import SSDictCursor
+from src.core.config import settings
 from src.models.rekair_model import RekairModel
 from src.schema.rekair_schm import RekairSchema
-from ..core.db import get_raw_database_session
+from ..core.db import abort_unbuffered, get_raw_database_session
 import pandas as pd
 from sqlalchemy.orm import Session
 
 
+REKAIR_SQL = """
+    SELECT
+        nosamw,
+        alamat,
+        periode,
+        met_l,
+        met_k,
+        pakai,
+        dnmet,
+        r1,
+        r2,
+        r3,
+        r4,
+        denda,
+        ang_sb,
+        jasa_sb
+    FROM
+        rekair
+    WHERE
+        periode = %s
+"""
+
+
 def getRekair(periode):
-    connection = get_raw_database_session()
-    with connection:
+    with get_raw_database_session() as connection:
         with connection.cursor() as cursor:
-            sql = """
-                    SELECT
-                        nosamw,
-                        alamat,
-                        periode,
-                        met_l,
-                        met_k,
-                        pakai,
-                        dnmet,
-                        r1,
-                        r2,
-                        r3,
-                        r4,
-                        denda,
-                        ang_sb,
-                        jasa_sb
-                    FROM
-                        rekair
-                    WHERE
-                        periode = %s
-                """
-            cursor.execute(sql, (periode,))
+            cursor.execute(REKAIR_SQL, (periode,))
             rows = cursor.fetchall()
             cursor.close()
             return rows
 
 
+def iter_rekair(periode: str, batch_size: int | None = None) -> Iterator[list[dict]]:
+    """
+    Stream the rekair rows of a periode from an unbuffered cursor.
+
+    Args:
+        periode (str): Periode to read.
+        batch_size (int | None): Rows per batch. Defaults to NDJSON_BATCH_SIZE.
+
+    Returns:
+        Iterator[list[dict]]: Batches of rows keyed by column name.
+    """
+    batch_size = batch_size or settings.NDJSON_BATCH_SIZE
+    with get_raw_database_session() as connection:
+        with connection.cursor(SSDictCursor) as cursor:
+            cursor.execute(REKAIR_SQL, (periode,))
+            while batch := cursor.fetchmany(batch_size):
+                yield batch
+
+
+REKENING_TNI_SQL = """
+    SELECT
+        'PDAM Kabupaten Banyumas' AS pdam,
+        m.kotama AS matra,
+        m.satker,
+        r.nosamw,
+        m.nama,
+        r.alamat,
+        r.periode,
+        r.met_l,
+        r.met_l as met_l_ori,
+        r.met_k,
+        r.met_k as met_k_ori,
+        r.pakai,
+        r.pakai as pakai_ori,
+        r.rata2,
+        r.rata2 as rata2_ori,
+        r.dnmet,
+        r.r1,
+        r.r2,
+        r.r3,
+        r.r4,
+        r.t1,
+        r.t2,
+        r.t3,
+        r.t4,
+        r.denda,
+        r.ang_sb,
+        r.jasa_sb
+    FROM
+        rekair r
+    INNER JOIN master_tni m ON r.nosamw = m.nosamw
+    WHERE
+        r.periode = %s
+"""
+
+
+PDAM = "PDAM Kabupaten Banyumas"
+
+# Same rows as REKENING_TNI_SQL without the constant pdam and the duplicated
+# _ori columns, for the bulk loader.
+REKENING_TNI_COMPACT_COLUMNS = [
+    "matra",
+    "satker",
+    "nosamw",
+    "nama",
+    "alamat",
+    "periode",
+    "met_l",
+    "met_k",
+    "pakai",
+    "rata2",
+    "dnmet",
+    "r1",
+    "r2",
+    "r3",
+    "r4",
+    "t1",
+    "t2",
+    "t3",
+    "t4",
+    "denda",
+    "ang_sb",
+    "jasa_sb",
+]
+REKENING_TNI_COMPACT_SQL = """
+    SELECT
+        m.kotama AS matra,
+        m.satker,
+        r.nosamw,
+        m.nama,
+        r.alamat,
+        r.periode,
+        r.met_l,
+        r.met_k,
+        r.pakai,
+        r.rata2,
+        r.dnmet,
+        r.r1,
+        r.r2,
+        r.r3,
+        r.r4,
+        r.t1,
+        r.t2,
+        r.t3,
+        r.t4,
+        r.denda,
+        r.ang_sb,
+        r.jasa_sb
+    FROM
+        rekair r
+    INNER JOIN master_tni m ON r.nosamw = m.nosamw
+    WHERE
+        r.periode = %s
+"""
+
+
 def get_rekening_tni(periode: str) -> pd.DataFrame:
-    connection = get_raw_database_session()
-    with connection:
+    with get_raw_database_session() as connection:
         with connection.cursor() as cursor:
-            sql = """
-                    SELECT
-                        'PDAM Kabupaten Banyumas' AS pdam,
-                        m.kotama AS matra,
-                        m.satker,
-                        r.nosamw,
-                        m.nama,
-                        r.alamat,
-                        r.periode,
-                        r.met_l,
-                        r.met_l as met_l_ori,
-                        r.met_k,
-                        r.met_k as met_k_ori,
-                        r.pakai,
-                        r.pakai as pakai_ori,
-                        r.rata2,
-                        r.rata2 as rata2_ori,
-                        r.dnmet,
-                        r.r1,
-                        r.r2,
-                        r.r3,
-                        r.r4,
-                        r.t1,
-                        r.t2,
-                        r.t3,
-                        r.t4,
-                        r.denda,
-                        r.ang_sb,
-                        r.jasa_sb
-                    FROM
-                        rekair r
-                    INNER JOIN master_tni m ON r.nosamw = m.nosamw
-                    WHERE
-                        r.periode = %s
-                """
-            cursor.execute(sql, (periode,))
+            cursor.execute(REKENING_TNI_SQL, (periode,))
             data = cursor.fetchall()
             if len(data) == 0: return None
             columns = [desc[0] for desc in cursor.description]
@@ -84,6 +169,46 @@ def get_rekening_tni(periode: str) -> pd.DataFrame:
             return df
 
 
+def count_rekening_tni(periode: str) -> int:
+    with get_raw_database_session() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                    SELECT COUNT(*)
+                    FROM rekair r
+                    INNER JOIN master_tni m ON r.nosamw = m.nosamw
+                    WHERE r.periode = %s
+                """,
+                (periode,),
+            )
+            return cursor.fetchone()[0]
+
+
+def iter_rekening_tni(periode: str, batch_size: int | None = None) -> Iterator[list[dict]]:
+    """
+    Stream the rekair x master_tni rows of a periode from an unbuffered cursor.
+
+    Args:
+        periode (str): Periode to read.
+        batch_size (int | None): Rows per batch. Defaults to EXPORT_BATCH_SIZE.
+
+    Returns:
+        Iterator[list[dict]]: Batches of rows keyed by column name.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    with get_raw_database_session() as connection:
+        with connection.cursor(SSDictCursor) as cursor:
+            cursor.execute(REKENING_TNI_SQL, (periode,))
+            try:
+                while batch := cursor.fetchmany(batch_size):
+                    yield batch
+            except BaseException:
+                # Closed before the end (e.g. the consumer failed): drop the
+                # connection rather than read the rows nobody will use.
+                abort_unbuffered(connection)
+                raise
+
+
 def detail_rekening(nosamw: str, periode: str, db: Session) -> RekairSchema | None:
     stmt = db.query(RekairModel).filter(
         RekairModel.nosamw == nosamw,
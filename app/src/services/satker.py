@@ -1,22 +1,58 @@
 from typing import Dict
 from sqlalchemy.orm import Session
 
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.serializer import RawJSONResponse, json_bytes
 from ..schema.satker import SatkerSchema
 from ..core.utility import Utility
 from ..models.satker import SatkerModel
 
+# The whole satker table is small, so it is cached as one entry.
+satker_cache = TTLCache(maxsize=2, ttl=settings.REFERENCE_CACHE_TTL)
 
-def get_satker(db: Session) -> Dict[str, any]:
-    rows = db.query(SatkerModel).all()
-    for row in rows:
-        row.id = Utility.encodeId(row.id)
-    return Utility.dict_response(
+
+def _satker_map(db: Session) -> Dict[int, SatkerSchema]:
+    return satker_cache.get_or_set(
+        "by_id",
+        lambda: {
+            row.id: SatkerSchema(id=row.id, nama=row.nama)
+            for row in db.query(SatkerModel).all()
+        },
+    )
+
+
+def _encoded_satker(db: Session) -> list[dict]:
+    satkers = list(_satker_map(db).values())
+    tokens = Utility.encodeIds([satker.id for satker in satkers])
+    return [
+        {"id": token, "nama": satker.nama}
+        for satker, token in zip(satkers, tokens)
+    ]
+
+
+def _satker_json(db: Session) -> bytes:
+    rows = _encoded_satker(db)
+    return json_bytes(Utility.dict_response(
         status=200 if rows else 404,
         message="Data Found" if rows else "Not Found",
         error=[],
         data=rows if rows else {},
-    )
+    ))
+
+
+def get_satker(db: Session) -> RawJSONResponse:
+    # The whole response is cached as JSON bytes.
+    return RawJSONResponse(satker_cache.get_or_set("json", lambda: _satker_json(db)))
 
 
 def get_satker_by_id(id: int, db: Session) -> SatkerSchema | None:
-    return db.query(SatkerModel).filter(SatkerModel.id == id).first()
+    return _satker_map(db).get(id)
+
+
+def list_satker(db: Session) -> list[SatkerSchema]:
+    return list(_satker_map(db).values())
+
+
+def invalidate_satker_cache() -> None:
+    satker_cache.invalidate()
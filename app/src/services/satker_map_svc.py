@@ -0,0 +1,203 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from ..core.cache import bump_version, get_version, set_version
+from ..core.db import SessionCoklit, SessionLocal
+from ..core.search_index import normalize
+from ..core.utility import Utility
+from ..models.master_tni_model import MasterTniModel
+from ..models.master_tni_satker_model import MasterTniSatkerModel
+from ..schema.satker import SatkerSchema
+from .satker import list_satker
+
+INSERT_BATCH_SIZE = 1000
+# MySQL named lock serializing rebuilds across workers, and how long to wait for it.
+REBUILD_LOCK = "export_tni.master_tni_satker"
+REBUILD_LOCK_TIMEOUT = 600
+
+_rebuild_lock = threading.Lock()
+
+
+def _satkers() -> list[SatkerSchema]:
+    with SessionCoklit() as db:
+        return list_satker(db)
+
+
+def resolve_satker(text: str | None, satkers: Iterable[SatkerSchema]) -> list[int]:
+    """
+    Match a master_tni satker text against the satker table.
+
+    An exact (case-insensitive) name wins. Otherwise every satker whose name
+    occurs in the text is a candidate, minus candidates whose name is part of
+    another candidate's name, so "KODIM 0701" no longer also matches "KODIM".
+
+    Args:
+        text (str | None): master_tni.satker.
+        satkers (Iterable[SatkerSchema]): All satkers.
+
+    Returns:
+        list[int]: Matching satker ids; exactly one when resolved.
+    """
+    text = normalize(text)
+    if not text:
+        return []
+    names = [(satker.id, normalize(satker.nama)) for satker in satkers]
+    exact = [id for id, name in names if name == text]
+    if exact:
+        return exact
+    found = [(id, name) for id, name in names if name and name in text]
+    return [
+        id for id, name in found
+        if not any(name != other and name in other for _, other in found)
+    ]
+
+
+def map_master_tni_satker(db: Session, nosamw: str, satker: str | None) -> None:
+    """
+    Refresh the satker mapping of one master row in the caller's transaction.
+
+    Args:
+        db (Session): The billing database session.
+        nosamw (str): The master row.
+        satker (str | None): Its satker text; None when the row is deleted.
+    """
+    db.execute(delete(MasterTniSatkerModel).where(MasterTniSatkerModel.nosamw == nosamw))
+    ids = resolve_satker(satker, _satkers()) if satker is not None else []
+    if len(ids) == 1:
+        db.add(MasterTniSatkerModel(nosamw=nosamw, satker_id=ids[0]))
+
+
+def satker_filter(satker_id: int):
+    """SQL filter for master_tni rows resolved to satker_id, an indexed semi-join."""
+    return MasterTniModel.nosamw.in_(
+        select(MasterTniSatkerModel.nosamw).where(MasterTniSatkerModel.satker_id == satker_id)
+    )
+
+
+def _satker_fingerprint(satkers: Iterable[SatkerSchema]) -> int:
+    names = "|".join(
+        f"{satker.id}:{satker.nama}" for satker in sorted(satkers, key=lambda s: s.id)
+    )
+    return int(hashlib.md5(names.encode("utf-8")).hexdigest()[:15], 16)
+
+
+@contextmanager
+def _map_lock(db: Session) -> Iterator[None]:
+    """
+    Hold the rebuild lock: a process lock, plus GET_LOCK on MySQL so workers
+    on every host take turns. The named lock lives on a connection of its
+    own, since the session may switch connections at commit.
+    """
+    with _rebuild_lock:
+        bind = db.get_bind()
+        if bind.dialect.name != "mysql":
+            yield
+            return
+        with bind.connect() as conn:
+            params = {"name": REBUILD_LOCK, "timeout": REBUILD_LOCK_TIMEOUT}
+            if not conn.scalar(text("SELECT GET_LOCK(:name, :timeout)"), params):
+                raise TimeoutError("satker map rebuild still running on another worker")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), params)
+
+
+def _rebuild(db: Session, satkers: list[SatkerSchema]) -> Dict[str, int]:
+    mapped, unresolved = [], 0
+    for nosamw, satker in db.execute(select(MasterTniModel.nosamw, MasterTniModel.satker)):
+        ids = resolve_satker(satker, satkers)
+        if len(ids) == 1:
+            mapped.append({"nosamw": nosamw, "satker_id": ids[0]})
+        else:
+            unresolved += 1
+
+    # Delete and insert commit together, so readers never see an empty map.
+    db.execute(delete(MasterTniSatkerModel))
+    for i in range(0, len(mapped), INSERT_BATCH_SIZE):
+        db.execute(insert(MasterTniSatkerModel), mapped[i:i + INSERT_BATCH_SIZE])
+    db.commit()
+    set_version("master_tni_satker.satkers", _satker_fingerprint(satkers))
+    bump_version("master_tni")
+    return {"mapped": len(mapped), "unresolved": unresolved}
+
+
+def rebuild_satker_map(db: Session) -> Dict[str, Any]:
+    """
+    Recompute master_tni_satker for every master row in one transaction.
+
+    Run after satkers are added or renamed. Rebuilds are serialized across
+    workers (see _map_lock).
+
+    Args:
+        db (Session): The billing database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the mapping counts.
+    """
+    with _map_lock(db):
+        counts = _rebuild(db, _satkers())
+    return Utility.dict_response(
+        status=201, message="Satker Map Rebuilt", error=[], data=counts
+    )
+
+
+def ensure_satker_map() -> None:
+    """
+    Build the mapping at startup when it is empty or stale.
+
+    Stale means the satker table changed since the last rebuild on this host
+    (its fingerprint is kept with the data versions). The check is repeated
+    under the rebuild lock, so of several workers starting together only the
+    first rebuilds.
+    """
+    try:
+        with SessionLocal() as db, _map_lock(db):
+            satkers = _satkers()
+            empty = db.scalar(select(MasterTniSatkerModel.nosamw).limit(1)) is None
+            if empty or get_version("master_tni_satker.satkers") != _satker_fingerprint(satkers):
+                _rebuild(db, satkers)
+    except Exception as e:
+        print(e)
+
+
+def satker_reconciliation(db: Session) -> Dict[str, Any]:
+    """
+    List master rows whose satker text matches no satker or more than one.
+
+    Args:
+        db (Session): The billing database session.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    satkers = _satkers()
+    names = {satker.id: satker.nama for satker in satkers}
+    tokens = dict(zip(names, Utility.encodeIds(list(names))))
+    rows = db.execute(
+        select(MasterTniModel.nosamw, MasterTniModel.nama, MasterTniModel.satker)
+        .order_by(MasterTniModel.nosamw)
+    )
+    data = []
+    for nosamw, nama, satker in rows:
+        ids = resolve_satker(satker, satkers)
+        if len(ids) == 1:
+            continue
+        data.append({
+            "nosamw": nosamw,
+            "nama": nama,
+            "satker": satker,
+            "status": "ambiguous" if ids else "unmatched",
+            "candidates": [{"id": tokens[id], "nama": names[id]} for id in ids],
+        })
+    return Utility.dict_response(
+        status=200 if data else 404,
+        message="Data Found" if data else "Not Found",
+        error=[],
+        data=data,
+    )
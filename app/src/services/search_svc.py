@@ -0,0 +1,289 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Iterable
+
+from sqlalchemy import false, func, select
+from sqlalchemy.orm import Session
+
+from ..core.cache import bump_version, get_version
+from ..core.config import settings
+from ..core.db import SessionCoklit, SessionLocal
+from ..core.search_index import NgramIndex
+from ..core.utility import Utility
+from ..models.cust_model import CustModel
+from ..models.detail_export_model import RekeningTniModel
+from ..models.master_tni_model import MasterTniModel
+
+SEARCH_FIELDS = ("nama", "nosamw", "alamat")
+
+
+class SearchIndex:
+    """
+    An NgramIndex with its build lock and the data version it was built from.
+
+    Only one thread builds at a time. Once built, a stale index keeps being
+    served while one background thread rebuilds it: stale means older than
+    SEARCH_INDEX_TTL, or behind its data version (see core.cache.get_version).
+    The version is the index's own, bumped only by writes to the indexed
+    text, so meter corrections or another periode's sync leave it current.
+    Writers that can update the index in place do so through apply().
+    """
+
+    def __init__(self, version_name: str, session_factory: Callable[[], Session],
+                 load: Callable[[Session], Iterable]):
+        self.version_name = version_name
+        self.session_factory = session_factory
+        self.load = load
+        self.index = NgramIndex(SEARCH_FIELDS)
+        self.version = -1
+        self._build_lock = threading.Lock()
+
+    def is_current(self) -> bool:
+        return self.index.ready and self.version == get_version(self.version_name)
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self.index.built_at > settings.SEARCH_INDEX_TTL
+
+    def _build(self, db: Session | None) -> None:
+        # Read the version first, so a write landing during the build makes
+        # the result stale rather than current.
+        version = get_version(self.version_name)
+        if db is None:
+            with self.session_factory() as db:
+                self.index.rebuild(self.load(db))
+        else:
+            self.index.rebuild(self.load(db))
+        self.version = version
+
+    def build(self, db: Session | None = None) -> None:
+        """Build now, or wait for the build in progress, unless already current."""
+        with self._build_lock:
+            if not self.is_current() or self._expired():
+                self._build(db)
+
+    def _build_in_background(self) -> None:
+        try:
+            self._build(None)
+        except Exception as e:
+            print(e)
+        finally:
+            self._build_lock.release()
+
+    def refresh(self) -> None:
+        """Start a background rebuild if stale and no build is running."""
+        if self.is_current() and not self._expired():
+            return
+        if self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._build_in_background, daemon=True).start()
+
+    def apply(self, change: Callable[[NgramIndex], None]) -> None:
+        """
+        Bump the version after a committed write and apply it to the index.
+
+        The index moves to the new version when it was current just before
+        (no other write in between, from any worker) and no build is
+        running, so the SQL filter keeps using it. Otherwise the change
+        still reaches typeahead and the next refresh rebuilds.
+
+        Args:
+            change (Callable[[NgramIndex], None]): Adds or removes documents.
+        """
+        version = bump_version(self.version_name)
+        if not self._build_lock.acquire(blocking=False):
+            # The running build read its version before or after this bump
+            # and loads rows committed before it; either way it is right.
+            change(self.index)
+            return
+        try:
+            current = self.index.ready and self.version == version - 1
+            change(self.index)
+            if current:
+                self.version = version
+        finally:
+            self._build_lock.release()
+
+    def get(self, db: Session) -> NgramIndex:
+        """The index for typeahead: built on first use, then possibly stale."""
+        if not self.index.ready:
+            self.build(db)
+        else:
+            self.refresh()
+        return self.index
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.index.stats(), "version": self.version, "building": self._build_lock.locked()}
+
+
+def _load_master(db: Session) -> Iterable:
+    rows = db.execute(
+        select(MasterTniModel.nosamw, MasterTniModel.nama, func.min(CustModel.alamat))
+        .outerjoin(CustModel, MasterTniModel.nosamw == CustModel.nosamw)
+        .group_by(MasterTniModel.nosamw, MasterTniModel.nama)
+    )
+    return (
+        (nosamw, {"nosamw": nosamw, "nama": nama, "alamat": alamat})
+        for nosamw, nama, alamat in rows
+    )
+
+
+def _load_periode(periode: str, db: Session) -> Iterable:
+    rows = db.execute(
+        select(
+            RekeningTniModel.id,
+            RekeningTniModel.nosamw,
+            RekeningTniModel.nama,
+            RekeningTniModel.alamat,
+        ).where(RekeningTniModel.periode == periode, RekeningTniModel.is_removed.is_not(True))
+    )
+    return (
+        (id, {"id": id, "nosamw": nosamw, "nama": nama, "alamat": alamat})
+        for id, nosamw, nama, alamat in rows
+    )
+
+
+master_index = SearchIndex("master_tni.search", SessionLocal, _load_master)
+_periode_indexes: OrderedDict[str, SearchIndex] = OrderedDict()
+_periode_lock = threading.Lock()
+
+
+def _periode_version(periode: str) -> str:
+    return f"rekening_tni.{periode}.search"
+
+
+def invalidate_periode_index(periode: str) -> None:
+    """Mark a periode's index stale after its rows were pulled from billing."""
+    bump_version(_periode_version(periode))
+
+
+def get_periode_index(periode: str) -> SearchIndex:
+    """
+    Return the rekening_tni index of a periode, unbuilt on first use.
+
+    At most SEARCH_MAX_PERIODES indexes are kept.
+    """
+    with _periode_lock:
+        index = _periode_indexes.get(periode)
+        if index is None:
+            index = _periode_indexes[periode] = SearchIndex(
+                _periode_version(periode), SessionCoklit, partial(_load_periode, periode)
+            )
+        _periode_indexes.move_to_end(periode)
+        while len(_periode_indexes) > settings.SEARCH_MAX_PERIODES:
+            _periode_indexes.popitem(last=False)
+    return index
+
+
+def index_master_tni(nosamw: str, nama: str) -> None:
+    """Add or refresh one master row after save/update has committed."""
+    def change(index: NgramIndex) -> None:
+        current = index.get(nosamw) or {}
+        index.add(nosamw, {"nosamw": nosamw, "nama": nama, "alamat": current.get("alamat")})
+
+    master_index.apply(change)
+
+
+def unindex_master_tni(nosamw: str) -> None:
+    """Drop one master row after its delete has committed."""
+    master_index.apply(lambda index: index.remove(nosamw))
+
+
+def _candidate_filter(index: SearchIndex, column, key_column, query: str):
+    # The key list is only complete for an index built from the current
+    # data version; until the rebuild lands, filter with LIKE.
+    index.refresh()
+    if not index.is_current():
+        return column.like(f"%{query}%")
+    keys = index.index.search(query, ("nama",))
+    if keys is None or len(keys) > settings.SEARCH_MAX_CANDIDATES:
+        return column.like(f"%{query}%")
+    return key_column.in_(keys) if keys else false()
+
+
+def master_nama_filter(nama: str):
+    """
+    SQL filter for master_tni.nama containing nama.
+
+    Resolved through the n-gram index into an indexed nosamw IN (...) lookup;
+    falls back to LIKE when too many rows match or the index is behind.
+    """
+    return _candidate_filter(master_index, MasterTniModel.nama, MasterTniModel.nosamw, nama)
+
+
+def tagihan_nama_filter(periode: str, nama: str):
+    """SQL filter for rekening_tni.nama containing nama within a periode."""
+    index = get_periode_index(periode)
+    return _candidate_filter(index, RekeningTniModel.nama, RekeningTniModel.id, nama)
+
+
+def _typeahead(index: NgramIndex, q: str, limit: int) -> list[Dict[str, Any]]:
+    keys = index.search(q) or set()
+    docs = [index.get(key) for key in keys]
+    docs = [doc for doc in docs if doc]
+    docs.sort(key=lambda doc: (str(doc.get("nama") or ""), str(doc.get("nosamw"))))
+    return docs[:limit]
+
+
+def search_master_tni(db: Session, q: str, limit: int) -> Dict[str, Any]:
+    """
+    Typeahead over master_tni nama, nosamw and alamat.
+
+    Args:
+        db (Session): The billing database session.
+        q (str): Search text.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    data = _typeahead(master_index.get(db), q, limit)
+    return Utility.dict_response(
+        status=200 if data else 404,
+        message="Data Found" if data else "Not Found",
+        error=[],
+        data=data,
+    )
+
+
+def search_tagihan(db: Session, periode: str, q: str, limit: int) -> Dict[str, Any]:
+    """
+    Typeahead over rekening_tni nama, nosamw and alamat of a periode.
+
+    Args:
+        db (Session): The coklit database session.
+        periode (str): Periode.
+        q (str): Search text.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the response data.
+    """
+    docs = _typeahead(get_periode_index(periode).get(db), q, limit)
+    tokens = Utility.encodeIds([doc["id"] for doc in docs])
+    data = [{**doc, "id": token} for doc, token in zip(docs, tokens)]
+    return Utility.dict_response(
+        status=200 if data else 404,
+        message="Data Found" if data else "Not Found",
+        error=[],
+        data=data,
+    )
+
+
+def build_search_indexes() -> None:
+    """Warm up the master index and the latest periode index at startup."""
+    try:
+        master_index.build()
+        with SessionCoklit() as db:
+            latest = db.scalar(select(func.max(RekeningTniModel.periode)))
+        if latest:
+            get_periode_index(latest).build()
+    except Exception as e:
+        print(e)
+
+
+def search_index_stats() -> Dict[str, Any]:
+    with _periode_lock:
+        periodes = dict(_periode_indexes)
+    periodes = {p: index.stats() for p, index in periodes.items()}
+    return {"master_tni": master_index.stats(), "rekening_tni": periodes}
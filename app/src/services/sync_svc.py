@@ -0,0 +1,217 @@
+import hashlib
+import math
+from contextlib import closing
+from decimal import Decimal
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.detail_export_model import RekeningTniModel
+from .rekair import iter_rekening_tni
+from .tariff import beban_tiers
+
+# Source fields that make up a row's fingerprint. Coklit edits never touch
+# these on the source side, so a changed hash always means a billing change.
+HASH_FIELDS = [
+    "matra",
+    "satker",
+    "nama",
+    "alamat",
+    "met_l",
+    "met_k",
+    "pakai",
+    "rata2",
+    "dnmet",
+    "r1",
+    "r2",
+    "r3",
+    "r4",
+    "t1",
+    "t2",
+    "t3",
+    "t4",
+    "denda",
+    "ang_sb",
+    "jasa_sb",
+]
+
+# Fields refreshed on every changed row.
+BILLING_FIELDS = [
+    "matra",
+    "satker",
+    "nama",
+    "alamat",
+    "met_l_ori",
+    "met_k_ori",
+    "pakai_ori",
+    "rata2",
+    "rata2_ori",
+    "dnmet",
+    "r4",
+    "t1",
+    "t2",
+    "t3",
+    "t4",
+    "denda",
+    "ang_sb",
+    "jasa_sb",
+]
+
+# Fields owned by coklit once a row has been edited through update_tagihan.
+COKLIT_FIELDS = ["met_l", "met_k", "pakai", "r1", "r2", "r3"]
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (int, float, Decimal)):
+        value = float(value)
+        return "" if math.isnan(value) else f"{value:.4f}"
+    return str(value)
+
+
+def hash_values(values: Sequence[Any]) -> str:
+    """
+    Fingerprint the HASH_FIELDS values of a source row, in HASH_FIELDS order.
+
+    Args:
+        values (Sequence[Any]): The field values.
+
+    Returns:
+        str: Hex MD5 of the normalised values.
+    """
+    payload = "|".join(map(_normalize, values))
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    """
+    Fingerprint a source row from rekair x master_tni.
+
+    Args:
+        row (Dict[str, Any]): Source row keyed by column name.
+
+    Returns:
+        str: Hex MD5 of the normalised HASH_FIELDS.
+    """
+    return hash_values([row.get(field) for field in HASH_FIELDS])
+
+
+def _is_edited(existing) -> bool:
+    return (
+        float(existing.met_l or 0) != float(existing.met_l_ori or 0)
+        or float(existing.met_k or 0) != float(existing.met_k_ori or 0)
+    )
+
+
+def _reprice(updates: list[dict], meters: list[tuple[Any, Any]]) -> None:
+    # Edited rows keep coklit's met_l/met_k, but the tariffs t1-t3 come
+    # from billing; recompute r1-r3 from both, as update_tagihan does.
+    if not updates:
+        return
+    met = np.array(meters, dtype=float).reshape(-1, 2)
+    beban = np.column_stack(beban_tiers(met[:, 1] - met[:, 0]))
+    tarif = np.array(
+        [(u["t1"] or 0, u["t2"] or 0, u["t3"] or 0) for u in updates], dtype=float
+    )
+    for u, (r1, r2, r3) in zip(updates, (beban * tarif).tolist()):
+        u.update(r1=r1, r2=r2, r3=r3)
+
+
+def _apply(db: Session, inserts: list, updates: list, counts: Dict[str, int]) -> None:
+    if inserts:
+        db.execute(insert(RekeningTniModel), inserts)
+        counts["inserted"] += len(inserts)
+        inserts.clear()
+    # ORM bulk UPDATE by primary key, executemany per distinct key set.
+    if updates:
+        db.execute(update(RekeningTniModel), updates)
+        counts["updated"] += len(updates)
+        updates.clear()
+
+
+def delta_sync(
+    periode: str, db: Session, progress: Callable[[int], None] | None = None
+) -> Dict[str, int]:
+    """
+    Bring rekening_tni for a periode in line with billing without a full re-pull.
+
+    Source rows are fingerprinted by (nosamw, periode) and content hash. New
+    rows are inserted and rows whose hash changed get their _ori and billing
+    fields refreshed. met_l/met_k (and the pakai/r1-r3 derived from them) are
+    only overwritten when the row has not been edited in coklit; edited rows
+    get r1-r3 recomputed from their kept meters and the new tariffs. Rows
+    that disappeared from billing are flagged with is_removed; every read,
+    export and correction path leaves those out, so they are never billed.
+
+    Args:
+        periode (str): The periode to sync.
+        db (Session): The coklit database session.
+        progress (Callable | None): Called with the number of source rows
+            processed after each batch. Raising from it aborts the sync.
+
+    Returns:
+        Dict[str, int]: Counts of inserted, updated, removed and unchanged rows.
+    """
+    existing = {
+        row.nosamw: row
+        for row in db.execute(
+            select(
+                RekeningTniModel.id,
+                RekeningTniModel.nosamw,
+                RekeningTniModel.row_hash,
+                RekeningTniModel.is_removed,
+                RekeningTniModel.met_l,
+                RekeningTniModel.met_l_ori,
+                RekeningTniModel.met_k,
+                RekeningTniModel.met_k_ori,
+            ).where(RekeningTniModel.periode == periode)
+        )
+    }
+
+    seen = set()
+    inserts = []
+    updates = []
+    counts = {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    # Close the stream as soon as a batch fails, so billing is not read to
+    # the end first (see iter_rekening_tni).
+    with closing(iter_rekening_tni(periode)) as batches:
+        for batch in batches:
+            edited, meters = [], []
+            for row in batch:
+                seen.add(row["nosamw"])
+                digest = row_hash(row)
+                current = existing.get(row["nosamw"])
+                if current is None:
+                    inserts.append({**row, "row_hash": digest, "is_removed": False})
+                elif current.row_hash != digest or current.is_removed:
+                    edit = _is_edited(current)
+                    fields = BILLING_FIELDS if edit else BILLING_FIELDS + COKLIT_FIELDS
+                    values = {field: row[field] for field in fields}
+                    updates.append(
+                        {"id": current.id, "row_hash": digest, "is_removed": False, **values}
+                    )
+                    if edit:
+                        edited.append(updates[-1])
+                        meters.append((current.met_l or 0, current.met_k or 0))
+                else:
+                    counts["unchanged"] += 1
+            _reprice(edited, meters)
+            # Flush per source batch so memory is bounded by the batch size.
+            _apply(db, inserts, updates, counts)
+            if progress:
+                progress(len(seen))
+
+    removed = [
+        {"id": row.id, "is_removed": True}
+        for nosamw, row in existing.items()
+        if nosamw not in seen and not row.is_removed
+    ]
+
+    if removed:
+        db.execute(update(RekeningTniModel), removed)
+        counts["removed"] = len(removed)
+    db.commit()
+    return counts
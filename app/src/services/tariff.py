@@ -0,0 +1,25 @@
+import numpy as np
+
+TIER1_LIMIT = 10
+TIER2_LIMIT = 10
+
+
+def beban_tiers(pakai):
+    """
+    Split usage (m3) into the three tariff tiers.
+
+    Works element-wise on NumPy arrays as well as on a scalar, so a single
+    correction and a bulk batch share the same rules: the first 10 m3, the
+    next 10 m3, and the rest.
+
+    Args:
+        pakai (float | np.ndarray): Usage, met_k - met_l.
+
+    Returns:
+        tuple: beban1, beban2 and beban3, shaped like pakai.
+    """
+    pakai = np.asarray(pakai, dtype=float)
+    beban1 = np.minimum(TIER1_LIMIT, pakai)
+    beban2 = np.minimum(TIER2_LIMIT, np.maximum(0, pakai - beban1))
+    beban3 = np.maximum(0, pakai - beban1 - beban2)
+    return beban1, beban2, beban3
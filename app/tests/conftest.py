@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+# src.core.config reads these at import time. The engines point at
+# in-memory SQLite and data versions go to a scratch directory, so the
+# tests never touch MySQL.
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_NAME", "billing")
+os.environ.setdefault("COKLIT_DB_NAME", "coklit")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("SQUIDS_MIN_LENGTH", "8")
+os.environ.setdefault("ALLOWED_ORIGINS", '["*"]')
+os.environ.setdefault("BILLING_DB_URL", "sqlite://")
+os.environ.setdefault("COKLIT_DB_URL", "sqlite://")
+os.environ.setdefault("DATA_VERSION_DIR", tempfile.mkdtemp(prefix="export-tni-test-"))
@@ -0,0 +1,31 @@
+import pytest
+
+from src.core.config import settings
+from src.services.bulk_loader import LoadStats, _rss_mb, next_batch_size
+
+
+@pytest.mark.parametrize("elapsed, expected", [
+    (settings.SYNC_TARGET_BATCH_SECONDS / 4, 4000),
+    (settings.SYNC_TARGET_BATCH_SECONDS, 2000),
+    (settings.SYNC_TARGET_BATCH_SECONDS * 4, 1000),
+])
+def test_next_batch_size_tracks_target(elapsed, expected):
+    assert next_batch_size(2000, elapsed) == expected
+
+
+def test_next_batch_size_stays_in_bounds():
+    assert next_batch_size(settings.SYNC_MAX_BATCH_SIZE, 0) == settings.SYNC_MAX_BATCH_SIZE
+    assert next_batch_size(settings.SYNC_MIN_BATCH_SIZE, 60) == settings.SYNC_MIN_BATCH_SIZE
+
+
+def test_rss_is_read_per_call():
+    rss = _rss_mb()
+    assert rss is None or rss > 0
+
+
+def test_stats_as_dict():
+    stats = LoadStats(periode="202406", rows=3, seconds=1.23456, rows_per_sec=2.4321)
+    assert stats.as_dict()["rss_growth_mb"] is None
+    stats.rss_growth_mb = 12.345
+    data = stats.as_dict()
+    assert (data["seconds"], data["rows_per_sec"], data["rss_growth_mb"]) == (1.235, 2.4, 12.3)
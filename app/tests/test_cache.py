@@ -0,0 +1,47 @@
+import pytest
+
+from src.core import cache
+from src.core.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_eviction(clock):
+    lru = TTLCache(2, 60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+
+def test_entries_expire(clock):
+    ttl = TTLCache(10, 60)
+    ttl.set("a", 1)
+    clock[0] += 59
+    assert ttl.get("a") == 1
+    clock[0] += 2
+    assert ttl.get("a", "gone") == "gone"
+    assert ttl.stats()["size"] == 0
+
+
+def test_get_or_set_and_invalidate(clock):
+    calls = []
+    memo = TTLCache(10, 60)
+
+    def factory():
+        calls.append(1)
+        return len(calls)
+
+    assert memo.get_or_set("k", factory) == 1
+    assert memo.get_or_set("k", factory) == 1
+    memo.invalidate("k")
+    assert memo.get_or_set("k", factory) == 2
+    memo.invalidate()
+    assert memo.stats() == {"size": 0, "maxsize": 10, "ttl": 60, "hits": 1, "misses": 2}
@@ -0,0 +1,103 @@
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.core.compression import CompressionMiddleware, negotiate
+
+BODY = b"nosamw;nama;pakai\n" + b"1000001;BUDI SANTOSO;25\n" * 200
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip, deflate, br", "gzip"),
+    ("deflate, gzip", "gzip"),
+    ("deflate", "deflate"),
+    ("gzip;q=0, deflate", "deflate"),
+    ("gzip;q=0.5, deflate;q=0.8", "deflate"),
+    ("GZIP", "gzip"),
+    ("*", "gzip"),
+    ("*;q=0, deflate", "deflate"),
+    ("br", None),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("gzip;q=oops", None),
+    ("", None),
+])
+def test_negotiate(header, encoding):
+    assert negotiate(header) == encoding
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse(b"ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY[:100], BODY[100:2000], BODY[2000:]]),
+                                 media_type="text/csv")
+
+    @app.get("/zip")
+    def zip_():
+        return Response(BODY, media_type="application/zip")
+
+    @app.get("/missing")
+    def missing():
+        return PlainTextResponse(BODY, status_code=404)
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024,
+                       skip_types=["application/zip"])
+    return app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(make_app())
+
+
+def raw_get(client, path, accept="gzip"):
+    # Read the body undecoded, as sent on the wire.
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_gzip(client):
+    response, body = raw_get(client, "/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers.get("content-length", len(body))) == len(body)
+    assert gzip.decompress(body) == BODY
+
+
+def test_deflate(client):
+    response, body = raw_get(client, "/big", accept="deflate")
+    assert response.headers["content-encoding"] == "deflate"
+    assert zlib.decompress(body) == BODY
+
+
+def test_streaming_body(client):
+    response, body = raw_get(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize("path, accept", [
+    ("/small", "gzip"),
+    ("/zip", "gzip"),
+    ("/missing", "gzip"),
+    ("/big", "identity"),
+])
+def test_sent_unchanged(client, path, accept):
+    response, body = raw_get(client, path, accept)
+    assert "content-encoding" not in response.headers
+    assert body in (BODY, b"ok")
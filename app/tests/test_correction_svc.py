@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.core.utility import Utility
+from src.models.detail_export_model import RekeningTniModel
+from src.schema.rekening_tni import RekeningTniCorrection
+from src.services.correction_svc import apply_corrections, parse_corrections_csv
+from src.services.tariff import beban_tiers
+
+PERIODE = "202406"
+
+
+@pytest.mark.parametrize("pakai, tiers", [
+    (0, (0, 0, 0)),
+    (5, (5, 0, 0)),
+    (10, (10, 0, 0)),
+    (15, (10, 5, 0)),
+    (20, (10, 10, 0)),
+    (37.5, (10, 10, 17.5)),
+])
+def test_beban_tiers_scalar(pakai, tiers):
+    assert tuple(float(b) for b in beban_tiers(pakai)) == tiers
+
+
+def test_beban_tiers_array_matches_scalar():
+    pakai = np.array([0, 5, 15, 37.5])
+    beban = np.column_stack(beban_tiers(pakai))
+    assert beban.tolist() == [[float(b) for b in beban_tiers(p)] for p in pakai]
+
+
+def test_parse_corrections_csv():
+    content = "\ufeffNosamw;Met_L;Met_K\n1000001;100;125\n1000002;;12\n1000003;1;2\n".encode()
+    items = parse_corrections_csv(content, max_rows=2)
+    assert len(items) == 2
+    assert items[0] == RekeningTniCorrection(nosamw="1000001", met_l=100, met_k=125)
+    assert isinstance(items[1], str) and "met_l" in items[1]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    RekeningTniModel.__table__.create(engine)
+    tariffs = {"t1": 1000.0, "t2": 2000.0, "t3": 3000.0}
+    with Session(engine) as session:
+        session.execute(insert(RekeningTniModel), [
+            {"id": 1, "periode": PERIODE, "nosamw": "1000001", **tariffs},
+            {"id": 2, "periode": PERIODE, "nosamw": "1000002", **tariffs},
+            {"id": 3, "periode": PERIODE, "nosamw": "1000003", "is_removed": True, **tariffs},
+            {"id": 4, "periode": PERIODE, "nosamw": "1000004", **tariffs},
+            {"id": 5, "periode": PERIODE, "nosamw": "1000004", **tariffs},
+            {"id": 6, "periode": "202405", "nosamw": "1000006", **tariffs},
+        ])
+        session.commit()
+        yield session
+
+
+def correction(met_k, **kwargs):
+    return RekeningTniCorrection(met_l=100, met_k=met_k, **kwargs)
+
+
+def test_apply_corrections(db):
+    token = Utility.encodeIds([2])[0]
+    response = apply_corrections(PERIODE, [
+        correction(125, nosamw="1000001"),
+        correction(108, id=token),
+        correction(130, nosamw="1000001"),
+        correction(110, nosamw="1000003"),
+        correction(110, nosamw="1000004"),
+        correction(110, nosamw="1000006"),
+        correction(110, id=token, nosamw="1000001"),
+        correction(110),
+        "met_k: Field required",
+    ], db)
+
+    assert response["status"] == 200
+    assert response["data"]["updated"] == 2
+    rows = response["data"]["rows"]
+    assert [row["status"] for row in rows] == [
+        "updated", "updated", "duplicate", "not_found", "ambiguous",
+        "not_found", "invalid", "invalid", "invalid",
+    ]
+    assert rows[1]["id"] == token and rows[1]["nosamw"] == "1000002"
+
+    stored = {
+        row.id: row for row in db.execute(select(
+            RekeningTniModel.id, RekeningTniModel.pakai,
+            RekeningTniModel.r1, RekeningTniModel.r2, RekeningTniModel.r3,
+        ))
+    }
+    assert tuple(stored[1])[1:] == (25.0, 10000.0, 20000.0, 15000.0)
+    assert tuple(stored[2])[1:] == (8.0, 8000.0, 0.0, 0.0)
+    assert stored[3].pakai is None
+
+
+def test_apply_corrections_nothing_applied(db):
+    response = apply_corrections(PERIODE, [correction(110, nosamw="9999999")], db)
+    assert response["status"] == 422
+    assert response["data"]["updated"] == 0
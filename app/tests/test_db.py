@@ -0,0 +1,42 @@
+import pymysql
+import pytest
+from pymysql.connections import MySQLResult
+from pymysql.cursors import SSCursor
+
+from src.core.db import abort_unbuffered
+
+
+class _Fairy:
+    def __init__(self, dbapi_connection):
+        self.dbapi_connection = dbapi_connection
+        self.invalidated = False
+
+    def invalidate(self):
+        self.invalidated = True
+        self.dbapi_connection.close()
+
+
+def _streaming_cursor():
+    # Never connected: reading a packet fails, so a drain shows up as an error.
+    connection = pymysql.connect(defer_connect=True)
+    cursor = SSCursor(connection)
+    result = MySQLResult(connection)
+    result.unbuffered_active = True
+    connection._result = cursor._result = result
+    return connection, cursor
+
+
+def test_closing_unbuffered_cursor_drains():
+    _, cursor = _streaming_cursor()
+    with pytest.raises(AttributeError):
+        cursor.close()
+    cursor._result.unbuffered_active = False
+    cursor.connection = None
+
+
+def test_abort_unbuffered_skips_the_drain():
+    connection, cursor = _streaming_cursor()
+    fairy = _Fairy(connection)
+    abort_unbuffered(fairy)
+    assert fairy.invalidated
+    cursor.close()
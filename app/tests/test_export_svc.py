@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.core.utility import Utility
+from src.models.detail_export_model import RekeningTniModel
+from src.schema.rekening_tni import RekeningTniUpdateRequest
+from src.services import export_svc
+from src.services.search_svc import _load_periode
+
+PERIODE = "202406"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    RekeningTniModel.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(RekeningTniModel), [
+            {"id": 1, "periode": PERIODE, "nosamw": "1000001", "satker": "A", "is_removed": False},
+            {"id": 2, "periode": PERIODE, "nosamw": "1000002", "satker": "A", "is_removed": True},
+            {"id": 3, "periode": PERIODE, "nosamw": "1000003", "satker": "B", "is_removed": None},
+            {"id": 4, "periode": PERIODE, "nosamw": "1000004", "satker": "C", "is_removed": True},
+            {"id": 5, "periode": "202405", "nosamw": "1000005", "satker": "A", "is_removed": True},
+        ])
+        session.commit()
+    monkeypatch.setattr(export_svc, "coklitEngine", engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def body(response):
+    return json.loads(response.body)
+
+
+def test_list_leaves_out_removed_rows(db):
+    page = body(export_svc.get_tagihan(db, PERIODE, 1, 10))["data"]
+    assert page["total"] == 2
+    assert [row["nosamw"] for row in page["content"]] == ["1000001", "1000003"]
+    assert Utility.decodeIds([row["id"] for row in page["content"]]) == [1, 3]
+
+    page = body(export_svc.get_tagihan(db, PERIODE, 1, 10, cursor=""))["data"]
+    assert [row["nosamw"] for row in page["content"]] == ["1000001", "1000003"]
+
+
+def test_removed_row_is_not_found(db):
+    assert body(export_svc.getTagihanById(1, db))["status"] == 200
+    assert body(export_svc.getTagihanById(2, db))["status"] == 404
+    request = RekeningTniUpdateRequest(nosamw="1000002", met_l=1, met_k=2)
+    assert export_svc.update_tagihan(2, request, db)["status"] == 404
+
+
+def test_exports_leave_out_removed_rows(db):
+    groups = {satker: len(rows) for satker, rows in export_svc._satker_groups(PERIODE)}
+    assert groups == {"A": 1, "B": 1}
+    assert body(export_svc.export_zip("202405", db))["status"] == 404
+
+
+def test_search_index_leaves_out_removed_rows(db):
+    assert [key for key, _ in _load_periode(PERIODE, db)] == [1, 3]
+
+
+
+def test_sync_columns_are_not_public(db):
+    row = body(export_svc.getTagihanById(1, db))["data"]
+    assert "nosamw" in row and "t4" in row
+    assert "row_hash" not in row and "is_removed" not in row
+    for field in ("row_hash", "is_removed"):
+        assert export_svc.getTagihanById(1, db, fields=[field])["status"] == 400
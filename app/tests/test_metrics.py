@@ -0,0 +1,50 @@
+from src.core.metrics import Counter, Histogram, queries_total, record_query, render_metrics
+
+
+def test_counter_escapes_labels():
+    counter = Counter("test_total", "A test counter.", ("route",))
+    counter.inc('/api/"x"\\y')
+    counter.inc('/api/"x"\\y', value=2)
+    assert counter.render() == [
+        "# HELP test_total A test counter.",
+        "# TYPE test_total counter",
+        'test_total{route="/api/\\"x\\"\\\\y"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "A test histogram.", ("db",), (0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe("billing", value=value)
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{db="billing",le="0.1"} 1',
+        'test_seconds_bucket{db="billing",le="1"} 3',
+        'test_seconds_bucket{db="billing",le="+Inf"} 4',
+        'test_seconds_sum{db="billing"} 4.05',
+        'test_seconds_count{db="billing"} 4',
+    ]
+
+
+def test_render_metrics():
+    before = queries_total._values.get(("coklit",), 0)
+    record_query("coklit", 0.25)
+    assert queries_total._values[("coklit",)] == before + 1
+
+    text = render_metrics({"billing": {
+        "size": 5, "checked_out": 1, "checked_in": 4, "overflow": -4, "checkouts": 10,
+        "connects": 5, "invalidated": 0, "wait_seconds": 0.5, "max_wait_seconds": 0.25,
+    }})
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# TYPE http_requests_total counter" in lines
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert f'db_queries_total{{db="coklit"}} {before + 1}' in lines
+    assert 'db_pool_size{db="billing"} 5' in lines
+    assert 'db_pool_wait_seconds_total{db="billing"} 0.5' in lines
+    assert "# TYPE db_pool_max_wait_seconds gauge" in lines
+    for line in lines:
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2
+
+
+def test_render_metrics_without_pools():
+    assert "db_pool_size" not in render_metrics()
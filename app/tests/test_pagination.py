@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, insert, select
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from src.core.cache import bump_version
+from src.core.pagination import (
+    COUNT_STRATEGIES,
+    decode_cursor,
+    encode_cursor,
+    filter_key,
+    keyset_filter,
+    order_by,
+    paginate,
+    parse_sort,
+)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Item(Base):
+    __tablename__ = "item"
+
+    id = Column(Integer, primary_key=True)
+    nama = Column(String)
+    satker = Column(String)
+
+
+ALLOWED = {"id": Item.id, "nama": Item.nama, "satker": Item.satker}
+
+
+def keys(spec):
+    return [(column.key, order) for column, order in spec]
+
+
+def test_parse_sort_appends_tie_breaker():
+    assert keys(parse_sort(["nama,desc", "satker"], ALLOWED, "id")) == [
+        ("nama", "desc"), ("satker", "asc"), ("id", "asc"),
+    ]
+
+
+def test_parse_sort_keeps_explicit_tie_breaker():
+    assert keys(parse_sort(["id,desc"], ALLOWED, "id")) == [("id", "desc")]
+    assert keys(parse_sort(None, ALLOWED, "id")) == [("id", "asc")]
+
+
+@pytest.mark.parametrize("sort", [["alamat"], ["nama,up"]])
+def test_parse_sort_rejects_unknown(sort):
+    with pytest.raises(ValueError):
+        parse_sort(sort, ALLOWED, "id")
+
+
+def test_cursor_round_trip():
+    spec = parse_sort(["nama,desc"], ALLOWED, "id")
+    token = encode_cursor(spec, SimpleNamespace(id=42, nama="Budi Santoso"))
+    assert "=" not in token
+    assert decode_cursor(spec, token) == ["Budi Santoso", 42]
+
+
+def test_cursor_rejects_other_sort():
+    token = encode_cursor(parse_sort(["nama"], ALLOWED, "id"), SimpleNamespace(id=1, nama="a"))
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(parse_sort(["nama,desc"], ALLOWED, "id"), token)
+
+
+@pytest.mark.parametrize("token", ["not a cursor", "e30", ""])
+def test_cursor_rejects_garbage(token):
+    with pytest.raises(ValueError):
+        decode_cursor(parse_sort(None, ALLOWED, "id"), token)
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    names = ["budi", None, "andi", "budi", None, "citra", "andi", None, "dewi", "budi"]
+    satkers = ["B", "A", None, "A", "B", "C", "A", None, "B", None]
+    with Session(engine) as session:
+        session.execute(insert(Item), [
+            {"id": i + 1, "nama": nama, "satker": satker}
+            for i, (nama, satker) in enumerate(zip(names, satkers))
+        ])
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize("sort", [
+    ["nama"], ["nama,desc"], ["nama,desc", "satker"], ["satker,desc", "nama"], ["id,desc"],
+])
+def test_keyset_pages_match_full_order(db, sort):
+    spec = parse_sort(sort, ALLOWED, "id")
+    full = db.scalars(select(Item.id).order_by(*order_by(spec))).all()
+
+    seen, values = [], None
+    while True:
+        query = select(Item).order_by(*order_by(spec)).limit(3)
+        if values is not None:
+            query = query.where(keyset_filter(spec, values))
+        page = db.scalars(query).all()
+        if not page:
+            break
+        seen += [row.id for row in page]
+        values = decode_cursor(spec, encode_cursor(spec, page[-1]))
+
+    assert seen == full
+
+
+@pytest.mark.parametrize("strategy", COUNT_STRATEGIES)
+def test_paginate_strategies_agree(db, strategy):
+    spec = parse_sort(["nama"], ALLOWED, "id")
+    full = db.scalars(select(Item.id).order_by(*order_by(spec))).all()
+
+    seen, page, has_next = [], 0, True
+    while has_next:
+        page += 1
+        rows, total, has_next = paginate(
+            db.query(Item), spec, page, 4, strategy, ("item", strategy)
+        )
+        seen += [row.id for row in rows]
+        assert total == (None if strategy == "none" else len(full))
+
+    assert seen == full
+    assert page == 3
+
+
+def test_paginate_past_last_page(db):
+    spec = parse_sort(None, ALLOWED, "id")
+    assert paginate(db.query(Item), spec, 9, 4, "window") == ([], 10, False)
+
+
+def test_filter_key_drops_empty_filters_and_follows_version():
+    key = filter_key("item", "item_test", nama="budi", satker=None, q="")
+    assert key == filter_key("item", "item_test", nama="budi")
+    assert key[1] == (("nama", "budi"),)
+    bump_version("item_test")
+    assert filter_key("item", "item_test", nama="budi") != key
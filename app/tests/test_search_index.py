@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from src.core.search_index import NgramIndex, normalize
+
+DOCS = {
+    "1000001": {"nama": "Budi  Santoso", "alamat": "Jl. Gatot Subroto 1"},
+    "1000002": {"nama": "SANTI", "alamat": "Asrama Kodim"},
+    "1000003": {"nama": "Andi Budiman", "alamat": None},
+    "1000004": {"nama": None, "alamat": "jl. budi utomo"},
+}
+
+
+@pytest.fixture
+def index():
+    index = NgramIndex(["nama", "alamat"])
+    index.rebuild(DOCS.items())
+    return index
+
+
+def test_not_ready_until_built():
+    assert NgramIndex(["nama"]).search("budi") is None
+
+
+def test_search_is_case_insensitive_substring(index):
+    assert index.search("BUDI") == {"1000001", "1000003", "1000004"}
+    assert index.search("budi", fields=["nama"]) == {"1000001", "1000003"}
+    assert index.search("budi santoso") == {"1000001"}
+    assert index.search("zzz") == set()
+
+
+def test_short_queries_scan(index):
+    assert index.search("an", fields=["nama"]) == {"1000001", "1000002", "1000003"}
+    assert index.search("") == set(DOCS)
+
+
+def test_add_and_remove(index):
+    index.add("1000002", {"nama": "Siti", "alamat": ""})
+    assert index.search("santi") == set()
+    assert index.search("siti") == {"1000002"}
+    index.remove("1000001")
+    assert index.search("santoso") == set()
+    assert index.get("1000001") is None
+    assert index.stats()["docs"] == 3
+
+
+def test_matches_like_scan():
+    rng = random.Random(7)
+    words = ["budi", "santoso", "andi", "kodim", "yonif", "wirasaba", "jl.", "asrama"]
+    docs = {
+        i: {"nama": " ".join(rng.choices(words, k=3)), "alamat": " ".join(rng.choices(words, k=2))}
+        for i in range(300)
+    }
+    index = NgramIndex(["nama", "alamat"])
+    index.rebuild(docs.items())
+    for query in ["bu", "budi", "di san", "AMA", "oso a", "wirasaba jl.", "xyz"]:
+        expected = {
+            key for key, doc in docs.items()
+            if any(normalize(query) in normalize(doc[field]) for field in ("nama", "alamat"))
+        }
+        assert index.search(query) == expected, query
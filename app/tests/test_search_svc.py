@@ -0,0 +1,63 @@
+from contextlib import nullcontext
+
+import pytest
+
+from src.core.cache import bump_version
+from src.services import search_svc
+from src.services.search_svc import SearchIndex
+
+DOCS = {
+    "1000001": {"nosamw": "1000001", "nama": "Budi Santoso", "alamat": None},
+    "1000002": {"nosamw": "1000002", "nama": "Andi", "alamat": None},
+}
+
+
+@pytest.fixture
+def index(request):
+    index = SearchIndex(
+        f"test.{request.node.name}.search", lambda: nullcontext(), lambda db: DOCS.items()
+    )
+    index.build()
+    return index
+
+
+def add(nosamw, nama):
+    return lambda index: index.add(nosamw, {"nosamw": nosamw, "nama": nama, "alamat": None})
+
+
+def test_apply_keeps_index_current(index):
+    assert index.is_current()
+    index.apply(add("1000003", "Budiman"))
+    assert index.is_current()
+    assert index.index.search("budi") == {"1000001", "1000003"}
+    index.apply(lambda index: index.remove("1000001"))
+    assert index.is_current()
+    assert index.index.search("budi") == {"1000003"}
+
+
+def test_apply_after_missed_write_leaves_index_stale(index):
+    bump_version(index.version_name)
+    index.apply(add("1000003", "Budiman"))
+    assert not index.is_current()
+    assert index.index.search("budiman") == {"1000003"}
+    index.build()
+    assert index.is_current()
+    assert index.index.search("budiman") == set()
+
+
+def test_apply_during_build_leaves_version_to_the_build(index):
+    with index._build_lock:
+        index.apply(add("1000003", "Budiman"))
+    assert not index.is_current()
+
+
+def test_other_writes_keep_periode_index_current(monkeypatch):
+    monkeypatch.setattr(search_svc, "SessionCoklit", lambda: nullcontext())
+    monkeypatch.setattr(search_svc, "_load_periode", lambda periode, db: DOCS.items())
+    index = search_svc.get_periode_index("209901")
+    index.build()
+    bump_version("rekening_tni")
+    search_svc.invalidate_periode_index("209902")
+    assert index.is_current()
+    search_svc.invalidate_periode_index("209901")
+    assert not index.is_current()
@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from src.core.serializer import (
+    column_converters,
+    compile_serializer,
+    decimal_value,
+    isoformat,
+    json_default,
+    parse_fields,
+)
+from src.models.detail_export_model import RekeningTniModel
+
+
+def test_parse_fields_none_when_not_requested():
+    assert parse_fields(None, ["nama"]) is None
+    assert parse_fields(["", " , "], ["nama"]) is None
+
+
+def test_parse_fields_splits_and_dedupes():
+    assert parse_fields(["nama, alamat", "nama", "pakai"], ["nama", "alamat", "pakai"], ["id"]) == [
+        "id", "nama", "alamat", "pakai",
+    ]
+    assert parse_fields(["id,nama"], ["id", "nama"], ["id"]) == ["id", "nama"]
+
+
+def test_parse_fields_rejects_unknown():
+    with pytest.raises(ValueError, match="Invalid field: r9"):
+        parse_fields(["nama,r9"], ["nama"])
+
+
+ROWS = [
+    ("1000001", Decimal("12.00"), Decimal("1.50"), date(2024, 6, 1), datetime(2024, 6, 1, 8, 30)),
+    ("1000002", None, Decimal("0"), None, None),
+]
+NAMES = ["nosamw", "met_l", "pakai", "tanggal", "created_at"]
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_compiled_serializer_matches_jsonable_encoder(row):
+    serialize = compile_serializer(NAMES, {
+        "met_l": decimal_value,
+        "pakai": decimal_value,
+        "tanggal": isoformat,
+        "created_at": isoformat,
+    })
+    expected = jsonable_encoder(dict(zip(NAMES, row)))
+    assert serialize(row) == expected
+    assert json.dumps(serialize(row)) == json.dumps(expected)
+
+
+def test_compiled_serializer_without_converters():
+    assert compile_serializer(["a", "b"])((1, "x")) == {"a": 1, "b": "x"}
+
+
+def test_column_converters_follow_sql_types():
+    convert = column_converters([RekeningTniModel.met_l, RekeningTniModel.nama, RekeningTniModel.pakai])
+    assert convert == {"met_l": decimal_value}
+
+
+def test_json_default():
+    assert json.dumps([Decimal("3"), date(2024, 6, 1)], default=json_default) == '[3, "2024-06-01"]'
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
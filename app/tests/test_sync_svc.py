@@ -0,0 +1,61 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.sync_svc import HASH_FIELDS, _is_edited, _reprice, row_hash
+
+ROW = {
+    "matra": "AD",
+    "satker": "KODIM 0701/BANYUMAS",
+    "nama": "BUDI",
+    "alamat": None,
+    "met_l": 100,
+    "met_k": 125,
+    "pakai": 25,
+    "t1": 1000.0,
+    "denda": Decimal("0.00"),
+}
+
+
+def test_row_hash_normalises_numbers_and_nulls():
+    same = {**ROW, "met_l": 100.0, "met_k": Decimal("125.0000"), "alamat": ""}
+    assert row_hash(same) == row_hash(ROW)
+    assert row_hash({**ROW, "r4": float("nan")}) == row_hash(ROW)
+
+
+def test_row_hash_ignores_other_fields():
+    assert row_hash({**ROW, "periode": "202407", "met_l_ori": 1}) == row_hash(ROW)
+
+
+@pytest.mark.parametrize("field", HASH_FIELDS)
+def test_row_hash_changes_with_every_hash_field(field):
+    assert row_hash({**ROW, field: 7}) != row_hash(ROW)
+
+
+@pytest.mark.parametrize("meters, edited", [
+    ((100, 100.0, 125, 125.0), False),
+    ((None, 0, None, 0), False),
+    ((100, 100.0, 130, 125.0), True),
+    ((90, 100.0, 125, 125.0), True),
+])
+def test_is_edited(meters, edited):
+    met_l, met_l_ori, met_k, met_k_ori = meters
+    row = SimpleNamespace(met_l=met_l, met_l_ori=met_l_ori, met_k=met_k, met_k_ori=met_k_ori)
+    assert _is_edited(row) is edited
+
+
+def test_reprice_uses_coklit_meters_and_billing_tariffs():
+    updates = [
+        {"id": 1, "t1": 1000.0, "t2": 2000.0, "t3": 3000.0},
+        {"id": 2, "t1": 1000.0, "t2": None, "t3": None},
+    ]
+    _reprice(updates, [(100, 125), (Decimal("10"), Decimal("18"))])
+    assert (updates[0]["r1"], updates[0]["r2"], updates[0]["r3"]) == (10000.0, 20000.0, 15000.0)
+    assert (updates[1]["r1"], updates[1]["r2"], updates[1]["r3"]) == (8000.0, 0.0, 0.0)
+
+
+def test_reprice_nothing_to_do():
+    updates = []
+    _reprice(updates, [])
+    assert updates == []
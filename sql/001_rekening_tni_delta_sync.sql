@@ -0,0 +1,5 @@
+-- Delta sync for tarik_data: source fingerprint and removed-row flag.
+ALTER TABLE rekening_tni
+    ADD COLUMN row_hash CHAR(32) NULL,
+    ADD COLUMN is_removed TINYINT(1) NOT NULL DEFAULT 0,
+    ADD INDEX idx_rekening_tni_periode_nosamw (periode, nosamw);
@@ -0,0 +1,20 @@
+-- Background tarik_data jobs, shared by every API worker.
+CREATE TABLE IF NOT EXISTS sync_job (
+    id CHAR(36) NOT NULL PRIMARY KEY,
+    periode VARCHAR(6) NOT NULL,
+    mode VARCHAR(10) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    stage VARCHAR(20) NULL,
+    rows_processed INT NOT NULL DEFAULT 0,
+    rows_total INT NULL,
+    rows_per_sec DOUBLE NULL,
+    cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+    message VARCHAR(255) NULL,
+    result TEXT NULL,
+    created_at DATETIME NOT NULL,
+    started_at DATETIME NULL,
+    updated_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    INDEX idx_sync_job_status (status),
+    INDEX idx_sync_job_periode (periode)
+);
@@ -0,0 +1,8 @@
+-- Composite indexes backing keyset pagination on the common sorts.
+ALTER TABLE rekening_tni
+    ADD INDEX idx_rekening_tni_periode_id (periode, id),
+    ADD INDEX idx_rekening_tni_periode_nama_id (periode, nama, id);
+
+-- master_tni lives in the billing database.
+ALTER TABLE master_tni
+    ADD INDEX idx_master_tni_aktif_nama_nosamw (is_aktif, nama, nosamw);
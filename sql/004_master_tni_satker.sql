@@ -0,0 +1,7 @@
+-- Resolved satker of each master_tni row; lives in the billing database
+-- next to master_tni. Fill it once with POST /api/satker/map/rebuild.
+CREATE TABLE IF NOT EXISTS master_tni_satker (
+    nosamw VARCHAR(20) NOT NULL PRIMARY KEY,
+    satker_id INT NOT NULL,
+    INDEX idx_master_tni_satker_satker (satker_id, nosamw)
+);
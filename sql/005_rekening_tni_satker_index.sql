@@ -0,0 +1,3 @@
+-- Lets the periode ZIP export read a periode in satker order without a filesort.
+ALTER TABLE rekening_tni
+    ADD INDEX idx_rekening_tni_periode_satker_id (periode, satker, id);
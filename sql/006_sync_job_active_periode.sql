@@ -0,0 +1,6 @@
+-- One queued or running sync job per periode, enforced across API workers.
+-- Set while a job is active and cleared when it finishes; NULLs do not
+-- collide in a unique index.
+ALTER TABLE sync_job
+    ADD COLUMN active_periode VARCHAR(6) NULL,
+    ADD UNIQUE INDEX uq_sync_job_active_periode (active_periode);